@@ -1,29 +1,85 @@
 import logging
-from flask import Flask, request
+from flask import Flask, jsonify
 from flask_mail import Mail
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager, get_jwt, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import JWTManager
 from config import Config
+from app.utils.access_log import AccessLog
+from app.utils.audit_log import AuditLogWriter
+from app.utils.cache import TTLCache
+from app.utils.db_tuning import configure_engine, install_engine_events
+from app.utils.mail_queue import MailQueue
+from app.utils.metrics import MetricsRegistry
+from app.utils.password_hasher import HasherBusy, PasswordHasher, TooManyAttempts
+from app.utils.query_profiler import QueryProfiler
+from app.utils.response_cache import ResponseCache
+from app.utils.revocation_cache import RevocationCache
+from app.utils.search_index import SearchIndex, include_name
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
+mail_queue = MailQueue()
+revocation_cache = RevocationCache()
+access_log = AccessLog()
+metrics = MetricsRegistry()
+query_profiler = QueryProfiler()
+catalog_cache = TTLCache('catalog')
+response_cache = ResponseCache()
+search_index = SearchIndex()
+audit_log = AuditLogWriter()
+password_hasher = PasswordHasher()
 
-# Cấu hình logger
-logging.basicConfig(level=logging.DEBUG)  # Đặt mức độ ghi log là DEBUG
-logger = logging.getLogger(__name__)
+def shutdown_extensions():
+    """Flush buffered audit rows and stop background threads and pools.
+
+    Normal interpreter exit flushes the audit and access logs through
+    atexit; servers whose workers leave with ``os._exit`` find this as
+    ``app.extensions['shutdown']`` and call it themselves.
+    """
+    audit_log.close()
+    mail_queue.stop()
+    password_hasher.shutdown()
+    # Sau cùng, để log của các bước trên cũng được ghi ra
+    access_log.stop()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Cấu hình logger
+    logging.basicConfig(level=app.config['LOG_LEVEL'])
+
+    configure_engine(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    install_engine_events(app, db)
+    migrate.init_app(app, db, include_name=include_name)
     jwt.init_app(app)
     mail.init_app(app)
+    mail_queue.init_app(app)
+    revocation_cache.init_app(app)
+    audit_log.init_app(app)
+    password_hasher.init_app(app)
+    # Per-endpoint request/DB metrics, served at /metrics
+    metrics.init_app(app)
+    # Debug only: groups statements per request and flags N+1 lazy loads
+    query_profiler.init_app(app)
+    catalog_cache.init_app(app)
+    response_cache.init_app(app)
+    # Access log: structured, sampled, written off the request thread
+    access_log.init_app(app)
     
+    # Băm mật khẩu: pool quá tải là lỗi của server (503), một tài khoản thử quá nhiều là 429
+    @app.errorhandler(HasherBusy)
+    def hasher_busy(err):
+        return jsonify({'message': 'Server busy, please retry shortly'}), 503
+
+    @app.errorhandler(TooManyAttempts)
+    def too_many_attempts(err):
+        return jsonify({'message': 'Too many attempts, please retry shortly'}), 429
+
     from app.services.user_service import UserService
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
@@ -31,67 +87,32 @@ def create_app(config_class=Config):
 
     # Import các model
     from app.models import user, product, order, cart
+    # Trang danh mục được cache; xoá cache khi sản phẩm/tồn kho/danh mục thay đổi
+    catalog_cache.invalidate_on(db.session, product.Product, product.Inventory, product.Category,
+                                product.Review, product.ProductRating)
+    # Body JSON đã serialize của user/sản phẩm, xoá sau commit ghi vào đúng dòng đó
+    response_cache.watch(db.session, 'user', user.User)
+    response_cache.watch(db.session, 'product', product.Product)
+    # Tổng hợp đánh giá cập nhật cùng transaction với review
+    from app.services.review_service import install_rating_events
+    install_rating_events(db.session)
+    # Thống kê đơn hàng theo user, cập nhật cùng transaction với đơn hàng
+    from app.services.order_service import install_order_stats_events
+    install_order_stats_events(db.session)
+    # Chỉ mục tìm kiếm full-text, đồng bộ với Product qua ORM events
+    search_index.init_app(app)
 
     # Đăng ký các blueprint ở đây (sẽ thêm sau)
-    from app.routes.user_routes import user_bp
+    from app.routes import user_bp, product_bp, order_bp, cart_bp, review_bp, stats_bp
     app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(product_bp, url_prefix='/api')
+    app.register_blueprint(order_bp, url_prefix='/api')
+    app.register_blueprint(cart_bp, url_prefix='/api')
+    app.register_blueprint(review_bp, url_prefix='/api')
+    app.register_blueprint(stats_bp)
 
-    # Middleware để ghi log thông tin request
-    from datetime import datetime
-
-    @app.before_request
-    def log_request_info():
-        method = request.method
-        path = request.path
-        user_info = "Anonymous User"  # Mặc định là Anonymous User
-
-        # Lấy tên người dùng từ token nếu có
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]  # Lấy token từ header
-            try:
-                verify_jwt_in_request() 
-                user = get_jwt()
-                user_info = f"User{{Id:{user['sub']}, name:{user.get('username')}}}"  # Định dạng thông tin người dùng
-            except Exception as e:
-                logger.error(f"Error decoding token: {e}")  # Ghi log lỗi khi giải mã token
-
-        # Ghi log với thông tin cần thiết
-        logger.info(f"{user_info} - {request.remote_addr} - {method} {request.url}")
-
-    @app.after_request
-    def log_response_info(response):
-        status_code = response.status_code
-        status_descriptions = {
-            200: "OK",
-            201: "Created",
-            202: "Accepted",
-            204: "No Content",
-            301: "Moved Permanently",
-            302: "Found",
-            304: "Not Modified",
-            400: "Bad Request",
-            401: "Unauthorized",
-            403: "Forbidden",
-            404: "Not Found",
-            405: "Method Not Allowed",
-            408: "Request Timeout",
-            409: "Conflict",
-            410: "Gone",
-            429: "Too Many Requests",
-            500: "Internal Server Error",
-            501: "Not Implemented",
-            502: "Bad Gateway",
-            503: "Service Unavailable",
-            504: "Gateway Timeout",
-        }
-
-        description = status_descriptions.get(status_code, "Unknown Status")
-        logger.info(f"Response - Status Code: {status_code} - Description: {description}")
-
-        # Ghi log lỗi nếu status code là 4xx hoặc 5xx
-        if status_code >= 400:
-            logger.error(f"Error response - Status Code: {status_code} - Description: {description}")
-
-        return response
+    from app.cli import register_commands
+    register_commands(app)
 
+    app.extensions['shutdown'] = shutdown_extensions
     return app
\ No newline at end of file
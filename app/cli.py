@@ -0,0 +1,115 @@
+import click
+from flask.cli import AppGroup
+
+tokens_cli = AppGroup('tokens', help='Token blocklist maintenance.')
+users_cli = AppGroup('users', help='Bulk user import/export.')
+search_cli = AppGroup('search', help='Product search index maintenance.')
+ratings_cli = AppGroup('ratings', help='Product rating aggregates.')
+inventory_cli = AppGroup('inventory', help='Stock reservations.')
+orders_cli = AppGroup('orders', help='Order statistics.')
+schema_cli = AppGroup('schema', help='Schema checks.')
+
+
+@tokens_cli.command('purge')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction.')
+def purge_tokens(batch_size):
+    """Delete blocklist entries whose tokens have already expired."""
+    from app.services.user_service import UserService
+    deleted = UserService.purge_expired_tokens(batch_size=batch_size)
+    click.echo(f'Purged {deleted} expired token(s) from the blocklist')
+
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Input format (default: from the file extension).')
+@click.option('--chunk-size', default=500, show_default=True, help='Rows validated and inserted per transaction.')
+def import_users(source, fmt, chunk_size):
+    """Create users from a CSV or NDJSON file ('-' for stdin)."""
+    from app.services.user_import_service import UserImportService
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'ndjson')
+    result = UserImportService.import_users(source, fmt, chunk_size=chunk_size)
+    for failure in result['failed']:
+        click.echo(f"row {failure['row']}: {failure['errors']}", err=True)
+    click.echo(f"Created {result['created']} user(s), {len(result['failed'])} row(s) failed")
+
+
+@users_cli.command('export')
+@click.argument('target', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default='ndjson', show_default=True)
+def export_users(target, fmt):
+    """Stream all users to a file ('-' for stdout)."""
+    from app.services.user_import_service import UserImportService
+    for chunk in UserImportService.export_users(fmt):
+        target.write(chunk)
+
+
+@search_cli.command('rebuild')
+def rebuild_search():
+    """Re-index every product (e.g. after bulk loads that bypass the ORM)."""
+    from app import search_index
+    count = search_index.rebuild()
+    click.echo(f'Indexed {count} product(s) with the {search_index.backend.name} backend')
+
+
+@ratings_cli.command('reconcile')
+def reconcile_ratings():
+    """Recompute every product's rating aggregates from the reviews table."""
+    from app.services.review_service import ReviewService
+    drifted = ReviewService.reconcile_ratings()
+    click.echo(f'Rating aggregates rebuilt, {drifted} product(s) had drifted')
+
+
+@inventory_cli.command('release-expired')
+@click.option('--batch-size', default=500, show_default=True, help='Reservations released per transaction.')
+def release_expired_reservations(batch_size):
+    """Put stock held by expired reservations back on sale."""
+    from app.services.inventory_service import InventoryService
+    released = InventoryService.release_expired(batch_size=batch_size)
+    click.echo(f'Released {released} unit(s) from expired reservations')
+
+
+@orders_cli.command('reconcile-stats')
+def reconcile_order_stats():
+    """Recompute every user's order count and total spend from the orders table."""
+    from app.services.order_service import OrderService
+    drifted = OrderService.reconcile_stats()
+    click.echo(f'Order stats rebuilt, {drifted} user(s) had drifted')
+
+
+@schema_cli.command('index-audit')
+@click.option('--strict', is_flag=True, help='Exit with status 1 if anything is reported (for CI).')
+@click.option('--plans/--no-plans', default=True, show_default=True,
+              help='EXPLAIN QUERY PLAN the service queries (SQLite only).')
+def index_audit(strict, plans):
+    """Report foreign keys and service queries that have no usable index."""
+    from app import db
+    from app.utils.index_audit import database_findings, model_findings, plan_findings, service_queries
+
+    problems = 0
+    for source, findings in (('model', model_findings(db.metadata)), ('database', database_findings(db.engine))):
+        for finding in findings:
+            click.echo(f"{source}: {finding.table}({', '.join(finding.columns)}) -> "
+                       f"{finding.referred_table} has no index", err=True)
+        problems += len(findings)
+    if plans:
+        findings = plan_findings(db.engine, service_queries())
+        if findings is None:
+            click.echo(f'Query plans skipped, {db.engine.dialect.name} is not supported')
+        for finding in findings or ():
+            click.echo(f"plan: {finding.name}: {finding.problem}\n    " + '\n    '.join(finding.plan), err=True)
+            problems += 1
+    click.echo(f'{problems} index problem(s) found')
+    if strict and problems:
+        raise SystemExit(1)
+
+
+def register_commands(app):
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(inventory_cli)
+    app.cli.add_command(orders_cli)
+    app.cli.add_command(schema_cli)
@@ -1,4 +1,4 @@
 from .user import User, Log, TokenBlocklist
-from .product import Product, Category, Inventory, Review, Wishlist
-from .order import Order, OrderItem, Shipping, Payment, Coupon
+from .product import Product, Category, Inventory, StockReservation, Review, ProductRating, Wishlist
+from .order import Order, OrderItem, UserOrderStats, Shipping, Payment, Coupon
 from .cart import Cart, CartItem
\ No newline at end of file
@@ -15,10 +15,15 @@ class CartItem(db.Model):
     __tablename__ = 'cart_items'
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'))
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), index=True)
     quantity = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Mỗi sản phẩm một dòng trong giỏ: đích của upsert (cart_id, product_id)
+    __table_args__ = (
+        db.Index('ix_cart_items_cart_id_product_id', 'cart_id', 'product_id', unique=True),
+    )
+
     cart = db.relationship('Cart', back_populates='items')
     product = db.relationship('Product', back_populates='cart_items')
  
@@ -7,11 +7,16 @@ class Order(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     total_price = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), nullable=False)
-    shipping_id = db.Column(db.Integer, db.ForeignKey('shipping.id'))
-    coupon_id = db.Column(db.Integer, db.ForeignKey('coupons.id'))
-    payment_id = db.Column(db.Integer, db.ForeignKey('payment.id'))
+    shipping_id = db.Column(db.Integer, db.ForeignKey('shipping.id'), index=True)
+    coupon_id = db.Column(db.Integer, db.ForeignKey('coupons.id'), index=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payment.id'), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Lịch sử đơn hàng của một user, mới nhất trước (keyset trên created_at, id)
+    __table_args__ = (
+        db.Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+    )
+
     user = db.relationship('User', back_populates='orders')
     shipping = db.relationship('Shipping', back_populates='order')
     coupon = db.relationship('Coupon', back_populates='orders')
@@ -21,14 +26,21 @@ class Order(db.Model):
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
 
     order = db.relationship('Order', back_populates='order_items')
     product = db.relationship('Product', back_populates='order_items')
 
+class UserOrderStats(db.Model):
+    """Lifetime order aggregates per user, maintained incrementally from orders."""
+    __tablename__ = 'user_order_stats'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_spent = db.Column(db.Float, nullable=False, default=0, server_default='0')
+
 class Shipping(db.Model):
     __tablename__ = 'shipping'
     id = db.Column(db.Integer, primary_key=True)
@@ -1,6 +1,8 @@
 from app import db
 from datetime import datetime
 
+RATING_LEVELS = (1, 2, 3, 4, 5)
+
 class Product(db.Model):
     __tablename__ = 'products'
     id = db.Column(db.Integer, primary_key=True)
@@ -9,8 +11,17 @@ class Product(db.Model):
     price = db.Column(db.Float, nullable=False)
     image_url = db.Column(db.String(255))
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
-    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Tăng ngay trong câu UPDATE qua ORM (không kiểm tra phiên bản cũ): cùng updated_at làm ETag
+    version_id = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                           onupdate=db.literal_column('version_id') + 1)
+
+    # Lọc theo danh mục + sắp xếp/lọc theo giá dùng chung một index
+    __table_args__ = (
+        db.Index('ix_products_category_id_price', 'category_id', 'price'),
+    )
 
     category = db.relationship('Category', back_populates='products')
     inventory = db.relationship('Inventory', back_populates='product')
@@ -18,12 +29,17 @@ class Product(db.Model):
     cart_items = db.relationship('CartItem', back_populates='product')
     wishlists = db.relationship('Wishlist', back_populates='product')
     order_items = db.relationship('OrderItem', back_populates='product')
+    # Chỉ đọc: được cập nhật bằng SQL cộng dồn trong cùng transaction với review
+    rating = db.relationship('ProductRating', uselist=False, viewonly=True)
     
 class Category(db.Model):
     __tablename__ = 'categories'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     description = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version_id = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                           onupdate=db.literal_column('version_id') + 1)
 
     products = db.relationship('Product', back_populates='category')
 
@@ -34,11 +50,27 @@ class Inventory(db.Model):
 
     product = db.relationship('Product', back_populates='inventory', uselist=False)
 
+class StockReservation(db.Model):
+    """Stock held for a checkout; already taken out of ``Inventory.quantity``.
+
+    Rows sharing a ``reservation_key`` are one multi-SKU reservation. They are
+    deleted when the order is confirmed, or when released/expired, in which
+    case their quantity goes back to stock.
+    """
+    __tablename__ = 'stock_reservations'
+    id = db.Column(db.Integer, primary_key=True)
+    reservation_key = db.Column(db.String(36), nullable=False, index=True)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 class Review(db.Model):
     __tablename__ = 'reviews'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), index=True)
     rating = db.Column(db.Integer, nullable=False)
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -46,11 +78,31 @@ class Review(db.Model):
     user = db.relationship('User', back_populates='reviews')
     product = db.relationship('Product', back_populates='reviews')
 
+class ProductRating(db.Model):
+    """Rating aggregates per product, maintained incrementally from reviews."""
+    __tablename__ = 'product_ratings'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    count_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    @property
+    def average(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    @property
+    def histogram(self):
+        return {level: getattr(self, f'count_{level}') for level in RATING_LEVELS}
+
 class Wishlist(db.Model):
     __tablename__ = 'wishlists'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship('User', back_populates='wishlists')
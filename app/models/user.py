@@ -1,6 +1,5 @@
-from app import db
+from app import db, password_hasher
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -11,18 +10,27 @@ class User(db.Model):
     role = db.Column(db.String(20), default='user')
     address = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Tăng ngay trong câu UPDATE qua ORM (không kiểm tra phiên bản cũ): cùng updated_at làm ETag
+    version_id = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                           onupdate=db.literal_column('version_id') + 1)
 
     reviews = db.relationship('Review', back_populates='user')
     cart = db.relationship('Cart', back_populates='user', uselist=False)
     orders = db.relationship('Order', back_populates='user')
     wishlists = db.relationship('Wishlist', back_populates='user')
     logs = db.relationship('Log', back_populates='user')
+    # Chỉ đọc: được cập nhật bằng SQL cộng dồn trong cùng transaction với đơn hàng
+    order_stats = db.relationship('UserOrderStats', uselist=False, viewonly=True)
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password, key=self.email)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -35,10 +43,16 @@ class Log(db.Model):
     details = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Nhật ký của một user theo thời gian (keyset trên timestamp, id)
+    __table_args__ = (
+        db.Index('ix_logs_user_id_timestamp', 'user_id', 'timestamp'),
+    )
+
     user = db.relationship('User', back_populates='logs')
     
 class TokenBlocklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, unique=True)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, index=True)
     
\ No newline at end of file
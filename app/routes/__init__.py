@@ -4,8 +4,12 @@ user_bp = Blueprint('user', __name__)
 product_bp = Blueprint('product', __name__)
 order_bp = Blueprint('order', __name__)
 cart_bp = Blueprint('cart', __name__)
+review_bp = Blueprint('review', __name__)
+stats_bp = Blueprint('stats', __name__)
 
 from . import user_routes
 from . import product_routes
 from . import order_routes
-from . import cart_routes
\ No newline at end of file
+from . import cart_routes
+from . import review_routes
+from . import stats_routes
\ No newline at end of file
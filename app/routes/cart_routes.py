@@ -0,0 +1,55 @@
+from flask import request, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from marshmallow import ValidationError
+from app.schemas import cart_item_schema, cart_items_schema
+from app.services.cart_service import CartService
+from . import cart_bp
+
+def _cart_response(user_id, status=200):
+    cart = CartService.get_cart(user_id)
+    cart['items'] = cart_item_schema.dump(cart['items'], many=True)
+    return jsonify(cart), status
+
+def _write_items(write):
+    try:
+        data = cart_items_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    user_id = get_jwt_identity()
+    try:
+        write(user_id, data['items'])
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 404
+    return _cart_response(user_id)
+
+@cart_bp.route('/cart', methods=['GET'])
+@jwt_required()
+def get_cart():
+    return _cart_response(get_jwt_identity())
+
+# Thêm vào giỏ: cộng dồn số lượng
+@cart_bp.route('/cart/items', methods=['POST'])
+@jwt_required()
+def add_cart_items():
+    return _write_items(CartService.add_items)
+
+# Đặt số lượng; 0 để xoá
+@cart_bp.route('/cart/items', methods=['PUT'])
+@jwt_required()
+def set_cart_items():
+    return _write_items(CartService.set_items)
+
+@cart_bp.route('/cart/items/<int:product_id>', methods=['DELETE'])
+@jwt_required()
+def remove_cart_item(product_id):
+    user_id = get_jwt_identity()
+    if not CartService.remove_item(user_id, product_id):
+        return jsonify({'message': 'Product not in cart'}), 404
+    return _cart_response(user_id)
+
+@cart_bp.route('/cart', methods=['DELETE'])
+@jwt_required()
+def clear_cart():
+    user_id = get_jwt_identity()
+    CartService.clear(user_id)
+    return _cart_response(user_id)
@@ -0,0 +1,56 @@
+from flask import request, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from marshmallow import ValidationError
+from app.schemas import OrderSummarySchema, checkout_schema, order_schema, order_summary_schema
+from app.services.inventory_service import InsufficientStock
+from app.services.order_service import OrderService
+from app.services.user_service import UserService
+from app.utils.pagination import keyset_response, parse_page_args
+from app.utils.serializers import serializer_for
+from . import order_bp
+
+@order_bp.route('/checkout', methods=['POST'])
+@jwt_required()
+def checkout():
+    try:
+        data = checkout_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    try:
+        order = OrderService.checkout(get_jwt_identity(), data)
+    except InsufficientStock as err:
+        return jsonify({'message': 'Insufficient stock',
+                        'available': {str(pid): qty for pid, qty in err.shortages.items()}}), 409
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    return jsonify(order_schema.dump(OrderService.get_order(order.id))), 201
+
+# Lịch sử đơn hàng: các dòng tóm tắt, keyset trên (created_at, id) giảm dần
+@order_bp.route('/orders', methods=['GET'])
+@jwt_required()
+def get_orders():
+    try:
+        page = parse_page_args(request.args, order_summary_schema.dump_fields)
+        rows = OrderService.list_orders(get_jwt_identity(), page.cursor, page.limit, page.fields)
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    return keyset_response(rows, page.limit, lambda row: [row.created_at, row.id],
+                           encode=serializer_for(OrderSummarySchema, page.fields))
+
+@order_bp.route('/orders/stats', methods=['GET'])
+@jwt_required()
+def get_order_stats():
+    return jsonify(OrderService.get_stats(get_jwt_identity())), 200
+
+@order_bp.route('/orders/<int:order_id>', methods=['GET'])
+@jwt_required()
+def get_order(order_id):
+    order = OrderService.get_order(order_id)
+    if not order:
+        return jsonify({'message': 'Order not found'}), 404
+    user_id = get_jwt_identity()
+    if order.user_id != user_id:
+        user = UserService.get_user_by_id(user_id)
+        if not user or user.role != 'admin':
+            return jsonify({'message': 'Order not found'}), 404
+    return jsonify(order_schema.dump(order)), 200
@@ -0,0 +1,108 @@
+from flask import current_app, request, jsonify
+from marshmallow import ValidationError
+from app import response_cache
+from app.schemas import category_schema, product_schema
+from app.services.product_service import SORTS, ProductService
+from app.services.search_service import SearchService
+from app.utils.decorators import admin_required
+from app.utils.pagination import parse_page_args
+from . import product_bp
+
+def _optional_number(args, name, cast):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+
+# Danh mục sản phẩm (public, có cache)
+@product_bp.route('/products', methods=['GET'])
+def get_products():
+    sort = request.args.get('sort', 'newest')
+    if sort not in SORTS:
+        return jsonify({'message': f"sort must be one of: {', '.join(SORTS)}"}), 400
+    try:
+        page = parse_page_args(request.args, product_schema.dump_fields)
+        result = ProductService.list_products(
+            category_id=_optional_number(request.args, 'category_id', int),
+            min_price=_optional_number(request.args, 'min_price', float),
+            max_price=_optional_number(request.args, 'max_price', float),
+            sort=sort, cursor=page.cursor, limit=page.limit, fields=page.fields,
+        )
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    return jsonify(result), 200
+
+@product_bp.route('/products/search', methods=['GET'])
+def search_products():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'q is required'}), 400
+    max_limit = current_app.config['API_MAX_PAGE_SIZE']
+    try:
+        category_id = _optional_number(request.args, 'category_id', int)
+        limit = _optional_number(request.args, 'limit', int) or 20
+        offset = _optional_number(request.args, 'offset', int) or 0
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({'message': 'limit must be positive and offset non-negative'}), 400
+    result = SearchService.search_products(query, category_id=category_id, limit=min(limit, max_limit), offset=offset)
+    return jsonify(result), 200
+
+@product_bp.route('/products/<int:product_id>', methods=['GET'])
+def get_product(product_id):
+    version = ProductService.get_product_version(product_id)
+    if version is None:
+        return jsonify({'message': 'Product not found'}), 404
+    return response_cache.respond('product', product_id, version,
+                                  lambda: product_schema.dump(ProductService.get_product(product_id)))
+
+@product_bp.route('/categories', methods=['GET'])
+def get_categories():
+    return jsonify(ProductService.list_categories()), 200
+
+# Quản lý sản phẩm (cho admin)
+@product_bp.route('/categories', methods=['POST'])
+@admin_required
+def create_category():
+    try:
+        data = category_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    category = ProductService.create_category(data)
+    return jsonify(category_schema.dump(category)), 201
+
+@product_bp.route('/products', methods=['POST'])
+@admin_required
+def create_product():
+    try:
+        data = product_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    product = ProductService.create_product(data)
+    return jsonify(product_schema.dump(product)), 201
+
+@product_bp.route('/products/<int:product_id>', methods=['PUT'])
+@admin_required
+def update_product(product_id):
+    product = ProductService.get_product(product_id)
+    if not product:
+        return jsonify({'message': 'Product not found'}), 404
+    try:
+        data = product_schema.load(request.get_json() or {}, partial=True)
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    product = ProductService.update_product(product, data)
+    return jsonify(product_schema.dump(product)), 200
+
+@product_bp.route('/products/<int:product_id>', methods=['DELETE'])
+@admin_required
+def delete_product(product_id):
+    product = ProductService.get_product(product_id)
+    if not product:
+        return jsonify({'message': 'Product not found'}), 404
+    ProductService.delete_product(product)
+    return jsonify({'message': 'Product deleted successfully'}), 200
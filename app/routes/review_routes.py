@@ -0,0 +1,61 @@
+from flask import request, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from marshmallow import ValidationError
+from app.schemas import ReviewSchema, review_schema
+from app.services.product_service import ProductService
+from app.services.review_service import ReviewService
+from app.services.user_service import UserService
+from app.utils.pagination import keyset_response, parse_page_args
+from app.utils.serializers import serializer_for
+from . import review_bp
+
+@review_bp.route('/products/<int:product_id>/reviews', methods=['GET'])
+def get_reviews(product_id):
+    try:
+        page = parse_page_args(request.args, review_schema.dump_fields)
+        rows = ReviewService.list_reviews(product_id, page.cursor, page.limit, page.fields)
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    return keyset_response(rows, page.limit, lambda row: [row.id],
+                           encode=serializer_for(ReviewSchema, page.fields))
+
+@review_bp.route('/products/<int:product_id>/reviews', methods=['POST'])
+@jwt_required()
+def create_review(product_id):
+    if not ProductService.get_product(product_id):
+        return jsonify({'message': 'Product not found'}), 404
+    try:
+        data = review_schema.load(request.get_json() or {})
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    review = ReviewService.create_review(get_jwt_identity(), product_id, data)
+    return jsonify(review_schema.dump(review)), 201
+
+@review_bp.route('/reviews/<int:review_id>', methods=['PUT'])
+@jwt_required()
+def update_review(review_id):
+    review = ReviewService.get_review(review_id)
+    if not review:
+        return jsonify({'message': 'Review not found'}), 404
+    if review.user_id != get_jwt_identity():
+        return jsonify({'message': 'You can only edit your own reviews'}), 403
+    try:
+        data = review_schema.load(request.get_json() or {}, partial=True)
+    except ValidationError as err:
+        return jsonify(err.messages), 422
+    review = ReviewService.update_review(review, data)
+    return jsonify(review_schema.dump(review)), 200
+
+@review_bp.route('/reviews/<int:review_id>', methods=['DELETE'])
+@jwt_required()
+def delete_review(review_id):
+    review = ReviewService.get_review(review_id)
+    if not review:
+        return jsonify({'message': 'Review not found'}), 404
+    user_id = get_jwt_identity()
+    if review.user_id != user_id:
+        user = UserService.get_user_by_id(user_id)
+        if not user or user.role != 'admin':
+            return jsonify({'message': 'You can only delete your own reviews'}), 403
+    ReviewService.delete_review(review, user_id)
+    return jsonify({'message': 'Review deleted successfully'}), 200
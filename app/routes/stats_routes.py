@@ -0,0 +1,28 @@
+from flask import Response, current_app, jsonify, request
+from app import db
+from app.utils.db_tuning import pool_stats
+from app.utils.decorators import admin_required
+from . import stats_bp
+
+@stats_bp.route('/api/stats', methods=['GET'])
+@admin_required
+def get_stats():
+    return jsonify({
+        'revocation_cache': current_app.extensions['revocation_cache'].stats(),
+        'access_log': {'dropped': current_app.extensions['access_log'].dropped},
+        'mail_queue': current_app.extensions['mail_queue'].stats(),
+        'audit_log': current_app.extensions['audit_log'].stats(),
+        'db_pool': pool_stats(db),
+        'catalog_cache': current_app.extensions['catalog_cache'].stats(),
+        'response_cache': current_app.extensions['response_cache'].stats(),
+        'search_index': current_app.extensions['search_index'].stats(),
+        'query_profiler': current_app.extensions['query_profiler'].stats(),
+    }), 200
+
+@stats_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    metrics = current_app.extensions['metrics']
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.snapshot()), 200
+    return Response(metrics.render_text(), mimetype='text/plain; version=0.0.4')
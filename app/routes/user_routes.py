@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify
+import io
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from marshmallow import ValidationError
-from app.schemas import user_schema, users_schema, logs_schema, reset_password_schema
+from app import response_cache
+from app.schemas import UserSchema, LogSchema, user_schema, log_schema, reset_password_schema
 from app.services.user_service import UserService
+from app.services.user_import_service import FORMATS, UserImportService
+from app.utils.decorators import admin_required
+from app.utils.pagination import keyset_response, parse_page_args
+from app.utils.serializers import serializer_for
 from flask_jwt_extended import create_access_token, create_refresh_token, decode_token, get_jwt, jwt_required, get_jwt_identity
 from . import user_bp
 
@@ -24,7 +30,10 @@ def register():
     except ValidationError as err:
         return jsonify(err.messages), 422
 
-    user = UserService.create_user(data)
+    try:
+        user = UserService.create_user(data)
+    except ValidationError as err:
+        return jsonify(err.messages), 422
     return jsonify(user_schema.dump(user)), 201
 
 @user_bp.route('/login', methods=['POST'])
@@ -50,8 +59,8 @@ def login():
 @user_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    jti = get_jwt()['jti']
-    UserService.add_token_to_blocklist(jti)
+    claims = get_jwt()
+    UserService.add_token_to_blocklist(claims['jti'], claims.get('exp'))
     return jsonify({'message': 'Logged out successfully'}), 200
 
 @user_bp.route('/forgot-password', methods=['POST'])
@@ -89,11 +98,7 @@ def verify_email(token):
 @user_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    user_id = get_jwt_identity()
-    user = UserService.get_user_by_id(user_id)
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-    return jsonify(user_schema.dump(user)), 200
+    return _user_response(get_jwt_identity())
 
 @user_bp.route('/change-password', methods=['POST'])
 @jwt_required()
@@ -118,16 +123,58 @@ def change_password():
 @user_bp.route('/users', methods=['GET'])
 @jwt_required()
 def get_users():
-    users = UserService.get_all_users()
-    return jsonify(users_schema.dump(users)), 200
+    try:
+        page = parse_page_args(request.args, user_schema.dump_fields)
+        rows = UserService.list_users(page.cursor, page.limit, page.fields)
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    return keyset_response(rows, page.limit, lambda row: [row.id],
+                           encode=serializer_for(UserSchema, page.fields))
+
+@user_bp.route('/users/import', methods=['POST'])
+@admin_required
+def import_users():
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    if fmt not in FORMATS:
+        return jsonify({'message': f"format must be one of: {', '.join(FORMATS)}"}), 400
+
+    # Đọc dạng stream, không nạp toàn bộ file vào bộ nhớ
+    upload = request.files.get('file')
+    raw = upload.stream if upload else request.stream
+    stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+    chunk_size = request.args.get('chunk_size', 500, type=int)
+    try:
+        result = UserImportService.import_users(stream, fmt, chunk_size=max(chunk_size, 1))
+    except UnicodeDecodeError:
+        return jsonify({'message': 'The upload must be UTF-8 text'}), 400
+    # Không tạo được dòng nào vẫn là một lần import hợp lệ: lỗi từng dòng nằm trong 'failed'
+    status = 201 if result['created'] else 200
+    return jsonify(result), status
+
+@user_bp.route('/users/export', methods=['GET'])
+@admin_required
+def export_users():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'message': f"format must be one of: {', '.join(FORMATS)}"}), 400
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(UserImportService.export_users(fmt)), mimetype=mimetype)
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user(user_id):
-    user = UserService.get_user_by_id(user_id)
-    if not user:
+    return _user_response(user_id)
+
+def _user_response(user_id):
+    # ETag theo version_id + updated_at: 304 mà không cần load hay serialize user
+    version = UserService.get_user_version(user_id)
+    if version is None:
         return jsonify({'message': 'User not found'}), 404
-    return jsonify(user_schema.dump(user)), 200
+    return response_cache.respond('user', user_id, version,
+                                  lambda: user_schema.dump(UserService.get_user_by_id(user_id)))
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 @jwt_required()
@@ -148,7 +195,10 @@ def update_user(user_id):
     except ValidationError as err:
         return jsonify(err.messages), 422
     
-    updated_user = UserService.update_user(user, data)
+    try:
+        updated_user = UserService.update_user(user, data)
+    except ValidationError as err:
+        return jsonify(err.messages), 422
     return jsonify(user_schema.dump(updated_user)), 200
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -173,6 +223,11 @@ def get_user_logs(user_id):
     if current_user_id != user_id:
         return jsonify({'message': 'Unauthorized'}), 403
 
-    logs = UserService.get_user_logs(user_id)
-    return jsonify(logs_schema.dump(logs)), 200
+    try:
+        page = parse_page_args(request.args, log_schema.dump_fields)
+        rows = UserService.list_user_logs(user_id, page.cursor, page.limit, page.fields)
+    except ValueError as err:
+        return jsonify({'message': str(err)}), 400
+    return keyset_response(rows, page.limit, lambda row: [row.timestamp, row.id],
+                           encode=serializer_for(LogSchema, page.fields))
 
@@ -1,4 +1,8 @@
 from .user_schema import ResetPasswordSchema, UserSchema, LogSchema
+from .product_schema import CategorySchema, InventorySchema, ProductSchema
+from .review_schema import ReviewSchema
+from .cart_schema import CartItemSchema, CartItemsSchema
+from .order_schema import CheckoutSchema, OrderSchema, OrderSummarySchema
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
@@ -7,3 +11,18 @@ log_schema = LogSchema()
 logs_schema = LogSchema(many=True)
 
 reset_password_schema = ResetPasswordSchema()
+
+product_schema = ProductSchema()
+products_schema = ProductSchema(many=True)
+
+category_schema = CategorySchema()
+categories_schema = CategorySchema(many=True)
+
+review_schema = ReviewSchema()
+
+cart_item_schema = CartItemSchema()
+cart_items_schema = CartItemsSchema()
+
+checkout_schema = CheckoutSchema()
+order_schema = OrderSchema()
+order_summary_schema = OrderSummarySchema()
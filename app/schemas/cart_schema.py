@@ -0,0 +1,21 @@
+from marshmallow import Schema, fields, pre_load, validate
+
+class CartItemSchema(Schema):
+    product_id = fields.Int(required=True)
+    # Khi đặt số lượng (PUT), 0 nghĩa là bỏ sản phẩm khỏi giỏ
+    quantity = fields.Int(required=True, validate=validate.Range(min=0, max=1000))
+    name = fields.Str(dump_only=True)
+    price = fields.Float(dump_only=True)
+    stock = fields.Int(dump_only=True, allow_none=True)
+    line_total = fields.Float(dump_only=True)
+
+class CartItemsSchema(Schema):
+    items = fields.List(fields.Nested(CartItemSchema(only=('product_id', 'quantity'))),
+                        required=True, validate=validate.Length(min=1, max=100))
+
+    @pre_load
+    def wrap_single_item(self, data, **kwargs):
+        # Chấp nhận cả một item đơn lẻ: {"product_id": 1, "quantity": 2}
+        if isinstance(data, dict) and 'items' not in data:
+            return {'items': [data]}
+        return data
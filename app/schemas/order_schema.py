@@ -0,0 +1,43 @@
+from marshmallow import Schema, fields, validate
+
+class CheckoutSchema(Schema):
+    coupon_code = fields.Str(allow_none=True, validate=validate.Length(max=20))
+    # Mặc định lấy địa chỉ trong hồ sơ người dùng
+    address = fields.Str(allow_none=True, validate=validate.Length(min=1, max=255))
+    shipping_method = fields.Str(load_default='standard', validate=validate.Length(min=1, max=50))
+    payment_method = fields.Str(load_default='cod', validate=validate.Length(min=1, max=50))
+
+class OrderItemSchema(Schema):
+    product_id = fields.Int()
+    quantity = fields.Int()
+    # Giá tại thời điểm đặt hàng
+    price = fields.Float()
+
+class ShippingSchema(Schema):
+    address = fields.Str()
+    shipping_method = fields.Str()
+    tracking_number = fields.Str(allow_none=True)
+    status = fields.Str()
+
+class PaymentSchema(Schema):
+    payment_method = fields.Str()
+    status = fields.Str()
+    transaction_id = fields.Str(allow_none=True)
+
+class OrderSchema(Schema):
+    id = fields.Int(dump_only=True)
+    user_id = fields.Int(dump_only=True)
+    total_price = fields.Float(dump_only=True)
+    status = fields.Str(dump_only=True)
+    coupon_code = fields.Str(attribute='coupon.code', dump_only=True, allow_none=True)
+    created_at = fields.DateTime(dump_only=True)
+    items = fields.List(fields.Nested(OrderItemSchema), attribute='order_items', dump_only=True)
+    shipping = fields.Nested(ShippingSchema, dump_only=True, allow_none=True)
+    payment = fields.Nested(PaymentSchema, dump_only=True, allow_none=True)
+
+class OrderSummarySchema(Schema):
+    id = fields.Int()
+    status = fields.Str()
+    total_price = fields.Float()
+    item_count = fields.Int()
+    created_at = fields.DateTime()
@@ -0,0 +1,33 @@
+from marshmallow import Schema, fields, validate
+
+from app.models.product import RATING_LEVELS
+
+class CategorySchema(Schema):
+    id = fields.Int(dump_only=True)
+    name = fields.Str(required=True, validate=validate.Length(min=1, max=50))
+    description = fields.Str(allow_none=True)
+
+class InventorySchema(Schema):
+    id = fields.Int(dump_only=True)
+    quantity = fields.Int(required=True, validate=validate.Range(min=0))
+
+class ProductSchema(Schema):
+    id = fields.Int(dump_only=True)
+    name = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    description = fields.Str(allow_none=True)
+    price = fields.Float(required=True, validate=validate.Range(min=0))
+    image_url = fields.Str(allow_none=True, validate=validate.Length(max=255))
+    category_id = fields.Int(allow_none=True)
+    # Số lượng tồn kho ban đầu khi tạo sản phẩm
+    quantity = fields.Int(load_only=True, validate=validate.Range(min=0))
+    created_at = fields.DateTime(dump_only=True)
+    category = fields.Nested(CategorySchema, dump_only=True, allow_none=True)
+    inventory = fields.Nested(InventorySchema, dump_only=True, allow_none=True)
+    # Đọc từ bảng product_ratings đã tính sẵn, không AVG trên reviews
+    rating = fields.Method('get_rating', dump_only=True)
+
+    def get_rating(self, product):
+        rating = product.rating
+        if rating is None:
+            return {'average': None, 'count': 0, 'histogram': dict.fromkeys(RATING_LEVELS, 0)}
+        return {'average': rating.average, 'count': rating.rating_count, 'histogram': rating.histogram}
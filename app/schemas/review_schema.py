@@ -0,0 +1,9 @@
+from marshmallow import Schema, fields, validate
+
+class ReviewSchema(Schema):
+    id = fields.Int(dump_only=True)
+    user_id = fields.Int(dump_only=True)
+    product_id = fields.Int(dump_only=True)
+    rating = fields.Int(required=True, validate=validate.Range(min=1, max=5))
+    comment = fields.Str(allow_none=True)
+    created_at = fields.DateTime(dump_only=True)
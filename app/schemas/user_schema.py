@@ -1,6 +1,7 @@
 from flask_jwt_extended import get_jwt_identity
-from marshmallow import Schema, ValidationError, fields, validate, validates
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
 
+from app import db
 from app.models.user import User
 
 class UserSchema(Schema):
@@ -12,25 +13,55 @@ class UserSchema(Schema):
     address = fields.Str(required=True)
     created_at = fields.DateTime(dump_only=True)
     
-    @validates('username')
-    def validate_username(self, value):
-        try:
-            current_user_id = get_jwt_identity()
-        except RuntimeError:
-            current_user_id = None
-        existing_user = User.query.filter_by(username=value).first()
-        if existing_user and existing_user.id != current_user_id:
-            raise ValidationError('Username already exists.')
-
-    @validates('email')
-    def validate_email(self, value):
-        try:
-            current_user_id = get_jwt_identity()
-        except RuntimeError:
-            current_user_id = None
-        existing_user = User.query.filter_by(email=value).first()
-        if existing_user and existing_user.id != current_user_id:
-            raise ValidationError('Email already exists.')
+    @validates_schema(pass_many=True, skip_on_field_errors=False)
+    def validate_unique(self, data, many, **kwargs):
+        # Một truy vấn duy nhất cho cả username và email (và cho cả lô khi many=True)
+        if 'exclude_id' in self.context:
+            current_user_id = self.context['exclude_id']
+        else:
+            try:
+                current_user_id = get_jwt_identity()
+            except RuntimeError:
+                current_user_id = None
+        rows = data if many else [data]
+        errors = unique_field_errors(rows, exclude_id=current_user_id)
+        if errors:
+            raise ValidationError(errors if many else errors[0])
+
+
+def unique_field_errors(rows, exclude_id=None):
+    """Map rows whose username/email is already taken to field errors, keyed by row index.
+
+    Checks the whole batch with one query and also catches duplicates
+    inside the batch itself.
+    """
+    usernames = {row['username'] for row in rows if row.get('username')}
+    emails = {row['email'] for row in rows if row.get('email')}
+    if not usernames and not emails:
+        return {}
+
+    existing = db.session.execute(
+        db.select(User.id, User.username, User.email)
+        .where(db.or_(User.username.in_(usernames), User.email.in_(emails)))
+    ).all()
+    taken = {
+        'username': {username for id, username, _ in existing if id != exclude_id},
+        'email': {email for id, _, email in existing if id != exclude_id},
+    }
+    messages = {'username': 'Username already exists.', 'email': 'Email already exists.'}
+
+    errors = {}
+    for index, row in enumerate(rows):
+        for field in ('username', 'email'):
+            value = row.get(field)
+            if not value:
+                continue
+            if value in taken[field]:
+                errors.setdefault(index, {})[field] = [messages[field]]
+            else:
+                # Later rows of the same batch can't reuse it either
+                taken[field].add(value)
+    return errors
 
 class LogSchema(Schema):
     id = fields.Int(dump_only=True)
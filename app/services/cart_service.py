@@ -0,0 +1,99 @@
+from app import db
+from app.models.cart import Cart, CartItem
+from app.models.product import Inventory, Product
+from app.utils.helpers import upsert
+
+
+class CartService:
+    """Carts read and written with set-based SQL.
+
+    A cart is always read with one joined query (items, price, stock and the
+    totals as window aggregates), and any number of item changes is one
+    batched upsert on the unique ``(cart_id, product_id)`` index.
+    """
+
+    @staticmethod
+    def get_cart(user_id):
+        """Return ``{'items', 'total_quantity', 'subtotal'}`` for the user's cart in one query."""
+        line_total = (Product.price * CartItem.quantity).label('line_total')
+        rows = db.session.execute(
+            db.select(
+                CartItem.product_id, CartItem.quantity, Product.name, Product.price,
+                Inventory.quantity.label('stock'), line_total,
+                db.func.sum(CartItem.quantity).over().label('total_quantity'),
+                db.func.sum(line_total).over().label('subtotal'),
+            )
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(Product, Product.id == CartItem.product_id)
+            .outerjoin(Inventory, Inventory.id == Product.inventory_id)
+            .where(Cart.user_id == user_id)
+            .order_by(CartItem.id)
+        ).all()
+        return {
+            'items': rows,
+            'total_quantity': rows[0].total_quantity if rows else 0,
+            'subtotal': round(rows[0].subtotal, 2) if rows else 0,
+        }
+
+    @staticmethod
+    def _cart_id(user_id):
+        # carts.user_id là unique: upsert không làm gì nếu giỏ đã có, an toàn khi chạy đồng thời
+        conn = db.session.connection()
+        conn.execute(upsert(conn, Cart.__table__, ['user_id'], lambda new: {'user_id': new.user_id}),
+                     {'user_id': user_id})
+        return db.session.scalar(db.select(Cart.id).where(Cart.user_id == user_id))
+
+    @staticmethod
+    def add_items(user_id, items):
+        """Add ``[{'product_id', 'quantity'}]`` to the cart, summing with what is already there."""
+        CartService._write_items(user_id, items, lambda new: {'quantity': CartItem.quantity + new.quantity})
+
+    @staticmethod
+    def set_items(user_id, items):
+        """Set each item's quantity; a quantity of 0 removes the product from the cart."""
+        CartService._write_items(user_id, items, lambda new: {'quantity': new.quantity})
+
+    @staticmethod
+    def _write_items(user_id, items, on_conflict):
+        quantities = {}
+        for item in items:
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+        known = set(db.session.scalars(db.select(Product.id).where(Product.id.in_(quantities))))
+        unknown = sorted(set(quantities) - known)
+        if unknown:
+            raise ValueError(f'Unknown product(s): {unknown}')
+
+        cart_id = CartService._cart_id(user_id)
+        removed = [pid for pid, quantity in quantities.items() if quantity == 0]
+        rows = [{'cart_id': cart_id, 'product_id': pid, 'quantity': quantity}
+                for pid, quantity in quantities.items() if quantity > 0]
+        if removed:
+            db.session.execute(
+                db.delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id.in_(removed))
+                .execution_options(synchronize_session=False)
+            )
+        if rows:
+            conn = db.session.connection()
+            conn.execute(upsert(conn, CartItem.__table__, ['cart_id', 'product_id'], on_conflict), rows)
+        db.session.commit()
+
+    @staticmethod
+    def remove_item(user_id, product_id):
+        """Remove one product; returns False if it was not in the cart."""
+        result = db.session.execute(
+            db.delete(CartItem)
+            .where(CartItem.product_id == product_id,
+                   CartItem.cart_id.in_(db.select(Cart.id).where(Cart.user_id == user_id)))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    def clear(user_id):
+        db.session.execute(
+            db.delete(CartItem)
+            .where(CartItem.cart_id.in_(db.select(Cart.id).where(Cart.user_id == user_id)))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
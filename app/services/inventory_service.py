@@ -0,0 +1,203 @@
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case
+
+from app import db
+from app.models.product import Inventory, Product, StockReservation
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        # product_id -> số lượng còn lại
+        self.shortages = shortages
+        super().__init__(f'Insufficient stock for product(s): {sorted(shortages)}')
+
+
+class ReservationExpired(Exception):
+    pass
+
+
+class InventoryService:
+    """Stock reservations without read-modify-write.
+
+    Every SKU of a reservation is decremented by one conditional UPDATE
+    (``quantity = quantity - n WHERE quantity >= n``), so concurrent
+    checkouts can never take stock below zero and the row lock is held only
+    for that statement and the commit right after it.
+    """
+
+    @staticmethod
+    def reserve(items, user_id=None, ttl=None):
+        """Reserve ``{product_id: quantity}`` all-or-nothing and commit.
+
+        Returns ``{'key', 'expires_at', 'items'}``. Raises ``ValueError`` for
+        unknown products or bad quantities and ``InsufficientStock`` when any
+        SKU is short; in both cases nothing is reserved.
+        """
+        wanted, amounts = InventoryService._take(items)
+        ttl = ttl or current_app.config['INVENTORY_RESERVATION_TTL']
+        key = str(uuid.uuid4())
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+        db.session.execute(db.insert(StockReservation), [
+            {'reservation_key': key, 'inventory_id': inventory_id, 'quantity': quantity,
+             'user_id': user_id, 'created_at': now, 'expires_at': expires_at}
+            for inventory_id, quantity in amounts.items()
+        ])
+        db.session.commit()
+        return {'key': key, 'expires_at': expires_at, 'items': wanted}
+
+    @staticmethod
+    def sell(items, commit=True):
+        """Take stock for ``{product_id: quantity}`` outright, without a reservation row.
+
+        Same guarantees and errors as ``reserve``. With ``commit=False`` the
+        decrement joins the caller's transaction (e.g. checkout): a shortage
+        undoes only the decrement and raises, leaving the caller's work and
+        the decision to roll back to the caller. Expired reservations are not
+        released on that path, since doing so commits.
+        """
+        wanted, _ = InventoryService._take(items, commit=commit)
+        if commit:
+            db.session.commit()
+        return wanted
+
+    @staticmethod
+    def _take(items, commit=True):
+        wanted = {}
+        for product_id, quantity in items.items():
+            if quantity is None or int(quantity) < 1:
+                raise ValueError('Quantities must be positive integers')
+            wanted[int(product_id)] = wanted.get(int(product_id), 0) + int(quantity)
+        if not wanted:
+            raise ValueError('Nothing to reserve')
+
+        inventory_ids = dict(db.session.execute(
+            db.select(Product.id, Product.inventory_id).where(Product.id.in_(wanted))
+        ).all())
+        unknown = [pid for pid in wanted if inventory_ids.get(pid) is None]
+        if unknown:
+            raise ValueError(f'Unknown product(s) or no inventory: {sorted(unknown)}')
+        amounts = {inventory_ids[pid]: quantity for pid, quantity in wanted.items()}
+
+        if not InventoryService._take_stock(amounts):
+            # Có thể hàng đang bị giữ bởi các reservation đã hết hạn: trả lại rồi thử lần nữa
+            if not (commit and InventoryService.release_expired(inventory_ids=list(amounts))
+                    and InventoryService._take_stock(amounts)):
+                shortages = InventoryService._shortages(wanted, inventory_ids)
+                if commit:
+                    # Tự quản transaction: nhả khoá ghi ngay thay vì chờ caller
+                    db.session.rollback()
+                raise InsufficientStock(shortages)
+        return wanted, amounts
+
+    @staticmethod
+    def _take_stock(amounts):
+        """Decrement every inventory row in one statement; undone (savepoint only) unless all had enough."""
+        amount = case(amounts, value=Inventory.id)
+        with db.session.begin_nested() as savepoint:
+            result = db.session.execute(
+                db.update(Inventory)
+                .where(Inventory.id.in_(amounts), Inventory.quantity >= amount)
+                .values(quantity=Inventory.quantity - amount)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(amounts):
+                savepoint.rollback()
+                return False
+        return True
+
+    @staticmethod
+    def _shortages(wanted, inventory_ids):
+        available = dict(db.session.execute(
+            db.select(Inventory.id, Inventory.quantity).where(Inventory.id.in_(inventory_ids.values()))
+        ).all())
+        return {
+            pid: available.get(inventory_ids[pid], 0)
+            for pid, quantity in wanted.items()
+            if available.get(inventory_ids[pid], 0) < quantity
+        }
+
+    @staticmethod
+    def _take_reservations(condition):
+        """Delete matching reservation rows and return ``{inventory_id: quantity}`` they held.
+
+        Whoever deletes a row owns its stock, so a confirm racing an expiry
+        can never both succeed.
+        """
+        if db.session.get_bind().dialect.delete_returning:
+            rows = db.session.execute(
+                db.delete(StockReservation).where(condition)
+                .returning(StockReservation.inventory_id, StockReservation.quantity)
+                .execution_options(synchronize_session=False)
+            ).all()
+            rows = [(r.inventory_id, r.quantity) for r in rows]
+        else:
+            rows = db.session.execute(
+                db.select(StockReservation.id, StockReservation.inventory_id, StockReservation.quantity)
+                .where(condition).with_for_update()
+            ).all()
+            if rows:
+                db.session.execute(
+                    db.delete(StockReservation).where(StockReservation.id.in_([r.id for r in rows]))
+                    .execution_options(synchronize_session=False)
+                )
+            rows = [(r.inventory_id, r.quantity) for r in rows]
+        taken = {}
+        for inventory_id, quantity in rows:
+            taken[inventory_id] = taken.get(inventory_id, 0) + quantity
+        return taken
+
+    @staticmethod
+    def _restock(amounts):
+        if not amounts:
+            return
+        amount = case(amounts, value=Inventory.id)
+        db.session.execute(
+            db.update(Inventory).where(Inventory.id.in_(amounts))
+            .values(quantity=Inventory.quantity + amount)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def confirm(key, commit=True):
+        """Turn a reservation into a sale: the stock stays taken, the hold goes away.
+
+        Raises ``ReservationExpired`` if it was already released or expired.
+        With ``commit=False`` nothing is committed or rolled back either way.
+        """
+        taken = InventoryService._take_reservations(StockReservation.reservation_key == key)
+        if not taken:
+            # Không xoá được hàng nào nên không có gì để hoàn tác; chỉ nhả khoá khi tự quản transaction
+            if commit:
+                db.session.rollback()
+            raise ReservationExpired(key)
+        if commit:
+            db.session.commit()
+        return taken
+
+    @staticmethod
+    def release(key):
+        """Give a reservation's stock back; returns False if there was nothing left to release."""
+        taken = InventoryService._take_reservations(StockReservation.reservation_key == key)
+        InventoryService._restock(taken)
+        db.session.commit()
+        return bool(taken)
+
+    @staticmethod
+    def release_expired(inventory_ids=None, batch_size=500):
+        """Return stock held by expired reservations; returns the number of units released."""
+        released = 0
+        while True:
+            expired = db.select(StockReservation.id).where(StockReservation.expires_at <= datetime.utcnow())
+            if inventory_ids is not None:
+                expired = expired.where(StockReservation.inventory_id.in_(inventory_ids))
+            taken = InventoryService._take_reservations(StockReservation.id.in_(expired.limit(batch_size)))
+            if not taken:
+                db.session.rollback()
+                return released
+            InventoryService._restock(taken)
+            db.session.commit()
+            released += sum(taken.values())
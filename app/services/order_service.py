@@ -0,0 +1,184 @@
+from datetime import date, datetime
+
+from sqlalchemy.orm import selectinload
+
+from app import audit_log, db
+from app.models.cart import Cart, CartItem
+from app.models.order import Coupon, Order, OrderItem, Payment, Shipping, UserOrderStats
+from app.models.product import Product
+from app.models.user import User
+from app.services.inventory_service import InsufficientStock, InventoryService
+from app.utils.helpers import CounterAggregate
+
+
+def _order_contribution(values):
+    if values['user_id'] is None:
+        return None
+    return values['user_id'], {'order_count': 1, 'total_spent': values['total_price'] or 0}
+
+
+order_stats = CounterAggregate(Order, UserOrderStats, 'user_id', ('order_count', 'total_spent'),
+                               ('user_id', 'total_price'), _order_contribution)
+
+
+def install_order_stats_events(session):
+    """Keep ``user_order_stats`` in step with every flushed Order insert, edit and delete.
+
+    Bulk statements on ``orders`` are not seen; ``OrderService.reconcile_stats``
+    repairs them.
+    """
+    order_stats.install(session)
+
+
+class OrderService:
+    @staticmethod
+    def checkout(user_id, data):
+        """Turn the user's cart into a pending order in one transaction.
+
+        Uses the same number of statements for 1 or 200 cart lines: one
+        joined cart read, one coupon lookup, one conditional stock decrement,
+        one bulk ``order_items`` insert and one cart delete. ``Coupon.discount``
+        is a percentage. Raises ``ValueError`` for an empty cart or an unusable
+        coupon and ``InsufficientStock`` when stock ran out; nothing is
+        written in either case.
+        """
+        lines = db.session.execute(
+            db.select(CartItem.product_id, CartItem.quantity, Product.price, User.address)
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(User, User.id == Cart.user_id)
+            .join(Product, Product.id == CartItem.product_id)
+            .where(Cart.user_id == user_id)
+            .order_by(CartItem.id)
+        ).all()
+        if not lines:
+            raise ValueError('Cart is empty')
+        subtotal = round(sum(line.price * line.quantity for line in lines), 2)
+
+        coupon = None
+        if data.get('coupon_code'):
+            coupon = db.session.scalar(db.select(Coupon).where(Coupon.code == data['coupon_code']))
+            if coupon is None or coupon.expiry_date < date.today():
+                raise ValueError('Invalid or expired coupon')
+            if coupon.min_purchase is not None and subtotal < coupon.min_purchase:
+                raise ValueError(f'Coupon requires a minimum purchase of {coupon.min_purchase}')
+        address = data.get('address') or lines[0].address
+        if not address:
+            raise ValueError('A shipping address is required')
+
+        # Trừ kho trong savepoint của transaction này; hết hàng thì checkout tự huỷ cả transaction
+        try:
+            InventoryService.sell({line.product_id: line.quantity for line in lines}, commit=False)
+        except InsufficientStock:
+            db.session.rollback()
+            raise
+
+        total = subtotal
+        if coupon is not None:
+            total = round(max(subtotal * (1 - coupon.discount / 100), 0), 2)
+        order = Order(
+            user_id=user_id, total_price=total, status='pending', coupon=coupon,
+            shipping=Shipping(address=address, shipping_method=data['shipping_method'], status='pending'),
+            payment=Payment(payment_method=data['payment_method'], status='pending'),
+        )
+        db.session.add(order)
+        db.session.flush()
+        db.session.execute(db.insert(OrderItem), [
+            {'order_id': order.id, 'product_id': line.product_id, 'quantity': line.quantity, 'price': line.price}
+            for line in lines
+        ])
+        # Chỉ xoá những dòng đã đặt: món được thêm vào giỏ trong lúc này vẫn còn
+        db.session.execute(
+            db.delete(CartItem)
+            .where(CartItem.cart_id.in_(db.select(Cart.id).where(Cart.user_id == user_id)),
+                   CartItem.product_id.in_([line.product_id for line in lines]))
+            .execution_options(synchronize_session=False)
+        )
+        audit_log.record(user_id, 'Order placed', f'order {order.id}, {len(lines)} item(s), total {total}')
+        db.session.commit()
+        return order
+
+    @staticmethod
+    def get_order(order_id):
+        return db.session.get(Order, order_id, options=[
+            selectinload(Order.order_items), selectinload(Order.shipping),
+            selectinload(Order.payment), selectinload(Order.coupon),
+        ])
+
+    @staticmethod
+    def list_orders(user_id, cursor=None, limit=50, fields=('id',)):
+        """Summary rows for a user's orders, newest first, from one query.
+
+        ``item_count`` is a correlated SUM over ``order_items`` (indexed on
+        ``order_id``), so the page is read in ``ix_orders_user_id_created_at``
+        order without loading any order or item objects.
+        """
+        item_count = (
+            db.select(db.func.coalesce(db.func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.order_id == Order.id)
+            .scalar_subquery()
+            .label('item_count')
+        )
+        columns = {'status': Order.status, 'total_price': Order.total_price, 'item_count': item_count}
+        stmt = (
+            db.select(Order.id, Order.created_at, *[columns[f] for f in fields if f in columns])
+            .where(Order.user_id == user_id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            try:
+                created_at, before_id = cursor
+                created_at = datetime.fromisoformat(created_at)
+                before_id = int(before_id)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+            stmt = stmt.where(db.tuple_(Order.created_at, Order.id) < (created_at, before_id))
+        return db.session.execute(stmt.execution_options(yield_per=100))
+
+    @staticmethod
+    def get_stats(user_id):
+        stats = db.session.get(UserOrderStats, user_id)
+        if stats is None:
+            return {'order_count': 0, 'total_spent': 0}
+        return {'order_count': stats.order_count, 'total_spent': round(stats.total_spent, 2)}
+
+    @staticmethod
+    def reconcile_stats():
+        """Recompute every user's order stats from ``orders`` in one transaction.
+
+        Returns the number of users whose stored stats had drifted.
+        """
+        table = UserOrderStats.__table__
+        aggregates = (
+            db.select(
+                Order.user_id.label('user_id'),
+                db.func.count().label('order_count'),
+                db.func.sum(Order.total_price).label('total_spent'),
+            )
+            .where(Order.user_id.isnot(None))
+            .group_by(Order.user_id)
+        ).subquery()
+
+        drifted = db.session.scalar(
+            db.select(db.func.count()).select_from(
+                aggregates.outerjoin(table, table.c.user_id == aggregates.c.user_id)
+            ).where(db.or_(
+                table.c.user_id.is_(None),
+                table.c.order_count != aggregates.c.order_count,
+                # Float cộng dồn có thể lệch ở chữ số cuối
+                db.func.abs(table.c.total_spent - aggregates.c.total_spent) > 0.005,
+            ))
+        )
+        drifted += db.session.scalar(
+            db.select(db.func.count()).select_from(table).where(
+                table.c.order_count != 0,
+                ~db.exists().where(Order.user_id == table.c.user_id),
+            )
+        )
+
+        db.session.execute(db.delete(UserOrderStats))
+        db.session.execute(
+            db.insert(UserOrderStats).from_select(['user_id', 'order_count', 'total_spent'], db.select(aggregates))
+        )
+        db.session.commit()
+        return drifted
@@ -0,0 +1,153 @@
+from datetime import datetime
+
+from sqlalchemy.orm import selectinload
+
+from app import catalog_cache, db
+from app.models.product import Category, Inventory, Product, ProductRating
+from app.schemas import ProductSchema
+from app.utils.cache import MISS
+from app.utils.pagination import encode_cursor
+
+# sort -> (cột sắp xếp, thứ tự giảm dần?); id luôn là cột phụ để keyset ổn định
+SORTS = {
+    'newest': (Product.created_at, True),
+    'oldest': (Product.created_at, False),
+    'price_asc': (Product.price, False),
+    'price_desc': (Product.price, True),
+}
+
+
+class ProductService:
+    @staticmethod
+    def list_products(category_id=None, min_price=None, max_price=None, sort='newest',
+                      cursor=None, limit=50, fields=('id',)):
+        """Return one ``{"items": [...], "next_cursor": ...}`` page, from the cache when possible."""
+        key = ('products', category_id, min_price, max_price, sort,
+               tuple(cursor) if cursor else None, limit, tuple(fields))
+        page = catalog_cache.get(key)
+        if page is MISS:
+            page = ProductService._load_page(category_id, min_price, max_price, sort, cursor, limit, fields)
+            catalog_cache.set(key, page)
+        return page
+
+    @staticmethod
+    def _load_page(category_id, min_price, max_price, sort, cursor, limit, fields):
+        column, descending = SORTS[sort]
+        stmt = db.select(Product)
+        if category_id is not None:
+            stmt = stmt.where(Product.category_id == category_id)
+        if min_price is not None:
+            stmt = stmt.where(Product.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(Product.price <= max_price)
+
+        if cursor:
+            try:
+                value, after_id = cursor
+                if column is Product.created_at:
+                    value = datetime.fromisoformat(value)
+                else:
+                    value = float(value)
+                after_id = int(after_id)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+            row = db.tuple_(column, Product.id)
+            stmt = stmt.where(row < (value, after_id) if descending else row > (value, after_id))
+
+        if descending:
+            stmt = stmt.order_by(column.desc(), Product.id.desc())
+        else:
+            stmt = stmt.order_by(column, Product.id)
+        # Một truy vấn cho mỗi quan hệ cho cả trang, thay vì một truy vấn mỗi sản phẩm
+        if 'category' in fields:
+            stmt = stmt.options(selectinload(Product.category))
+        if 'inventory' in fields:
+            stmt = stmt.options(selectinload(Product.inventory))
+        if 'rating' in fields:
+            stmt = stmt.options(selectinload(Product.rating))
+
+        products = db.session.scalars(stmt.limit(limit + 1)).all()
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            last = products[-1]
+            next_cursor = encode_cursor([getattr(last, column.key), last.id])
+        return {
+            'items': ProductSchema(many=True, only=fields).dump(products),
+            'next_cursor': next_cursor,
+        }
+
+    @staticmethod
+    def get_product(product_id):
+        return db.session.get(Product, product_id, options=[
+            selectinload(Product.category), selectinload(Product.inventory), selectinload(Product.rating),
+        ])
+
+    @staticmethod
+    def get_product_version(product_id):
+        """Everything the product detail body depends on, in one row (None if no such product).
+
+        Product and category carry a ``version_id`` and ``updated_at`` (which
+        also differs for a row recreated under a reused id); stock and rating
+        counters are updated with plain SQL, so their values are the version.
+        """
+        row = db.session.execute(
+            db.select(Product.version_id, Product.updated_at, Category.version_id, Category.updated_at,
+                      Inventory.quantity,
+                      *[getattr(ProductRating, c) for c in ('rating_count', 'rating_sum', 'count_1', 'count_2',
+                                                           'count_3', 'count_4', 'count_5')])
+            .outerjoin(Category, Category.id == Product.category_id)
+            .outerjoin(Inventory, Inventory.id == Product.inventory_id)
+            .outerjoin(ProductRating, ProductRating.product_id == Product.id)
+            .where(Product.id == product_id)
+        ).first()
+        return tuple(row) if row is not None else None
+
+    @staticmethod
+    def list_categories():
+        key = ('categories',)
+        categories = catalog_cache.get(key)
+        if categories is MISS:
+            categories = db.session.scalars(db.select(Category).order_by(Category.name)).all()
+            categories = [{'id': c.id, 'name': c.name, 'description': c.description} for c in categories]
+            catalog_cache.set(key, categories)
+        return categories
+
+    @staticmethod
+    def create_category(data):
+        category = Category(**data)
+        db.session.add(category)
+        db.session.commit()
+        return category
+
+    @staticmethod
+    def create_product(data):
+        data = dict(data)
+        quantity = data.pop('quantity', 0)
+        product = Product(**data)
+        product.inventory = Inventory(quantity=quantity)
+        db.session.add(product)
+        db.session.commit()
+        return product
+
+    @staticmethod
+    def update_product(product, data):
+        data = dict(data)
+        quantity = data.pop('quantity', None)
+        for key, value in data.items():
+            setattr(product, key, value)
+        if quantity is not None:
+            if product.inventory is None:
+                product.inventory = Inventory(quantity=quantity)
+            else:
+                product.inventory.quantity = quantity
+        db.session.commit()
+        return product
+
+    @staticmethod
+    def delete_product(product):
+        # Review bị tách khỏi sản phẩm (product_id = NULL) trong lúc flush, hook rating không thấy;
+        # tổng hợp của sản phẩm thì xoá luôn (ON DELETE CASCADE không chạy trên SQLite)
+        db.session.execute(db.delete(ProductRating).where(ProductRating.product_id == product.id))
+        db.session.delete(product)
+        db.session.commit()
@@ -0,0 +1,111 @@
+from sqlalchemy import case
+
+from app import audit_log, db
+from app.models.product import RATING_LEVELS, ProductRating, Review
+from app.utils.helpers import CounterAggregate
+
+COUNTERS = ('rating_count', 'rating_sum') + tuple(f'count_{level}' for level in RATING_LEVELS)
+
+
+def _rating_contribution(values):
+    rating = values['rating']
+    if values['product_id'] is None or rating not in RATING_LEVELS:
+        return None
+    return values['product_id'], {'rating_count': 1, 'rating_sum': rating, f'count_{rating}': 1}
+
+
+ratings = CounterAggregate(Review, ProductRating, 'product_id', COUNTERS, ('product_id', 'rating'),
+                           _rating_contribution)
+
+
+def install_rating_events(session):
+    """Keep ``product_ratings`` in step with every flushed Review insert, edit and delete.
+
+    Bulk ``delete(Review)``/``update(Review)`` and cascades done by the
+    database are not seen; ``ReviewService.reconcile_ratings`` repairs them.
+    """
+    ratings.install(session)
+
+
+class ReviewService:
+    @staticmethod
+    def list_reviews(product_id, cursor=None, limit=50, fields=('id',)):
+        # Keyset trên id giảm dần (mới nhất trước)
+        columns = [Review.id] + [getattr(Review, f) for f in fields if f != 'id']
+        stmt = (db.select(*columns).where(Review.product_id == product_id)
+                .order_by(Review.id.desc()).limit(limit + 1))
+        if cursor:
+            try:
+                (before_id,) = cursor
+                stmt = stmt.where(Review.id < int(before_id))
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+        return db.session.execute(stmt.execution_options(yield_per=100))
+
+    @staticmethod
+    def get_review(review_id):
+        return db.session.get(Review, review_id)
+
+    @staticmethod
+    def create_review(user_id, product_id, data):
+        review = Review(user_id=user_id, product_id=product_id, **data)
+        db.session.add(review)
+        db.session.flush()
+        audit_log.record(user_id, 'Review created', f'review {review.id} on product {product_id}')
+        db.session.commit()
+        return review
+
+    @staticmethod
+    def update_review(review, data):
+        for key, value in data.items():
+            setattr(review, key, value)
+        audit_log.record(review.user_id, 'Review updated', f'review {review.id}')
+        db.session.commit()
+        return review
+
+    @staticmethod
+    def delete_review(review, user_id):
+        audit_log.record(user_id, 'Review deleted', f'review {review.id} on product {review.product_id}')
+        db.session.delete(review)
+        db.session.commit()
+
+    @staticmethod
+    def reconcile_ratings():
+        """Recompute every product's rating aggregates from ``reviews`` in one transaction.
+
+        Returns the number of products whose stored aggregates had drifted.
+        """
+        table = ProductRating.__table__
+        aggregates = (
+            db.select(
+                Review.product_id.label('product_id'),
+                db.func.count().label('rating_count'),
+                db.func.sum(Review.rating).label('rating_sum'),
+                *[db.func.sum(case((Review.rating == level, 1), else_=0)).label(f'count_{level}')
+                  for level in RATING_LEVELS],
+            )
+            .where(Review.product_id.isnot(None), Review.rating.in_(RATING_LEVELS))
+            .group_by(Review.product_id)
+        ).subquery()
+
+        differs = db.or_(table.c.product_id.is_(None),
+                         *[getattr(table.c, c) != getattr(aggregates.c, c) for c in COUNTERS])
+        drifted = db.session.scalar(
+            db.select(db.func.count()).select_from(
+                aggregates.outerjoin(table, table.c.product_id == aggregates.c.product_id)
+            ).where(differs)
+        )
+        # Sản phẩm còn tổng hợp nhưng không còn review nào
+        drifted += db.session.scalar(
+            db.select(db.func.count()).select_from(table).where(
+                table.c.rating_count != 0,
+                ~db.exists().where(Review.product_id == table.c.product_id, Review.rating.in_(RATING_LEVELS)),
+            )
+        )
+
+        db.session.execute(db.delete(ProductRating))
+        db.session.execute(
+            db.insert(ProductRating).from_select(['product_id', *COUNTERS], db.select(aggregates))
+        )
+        db.session.commit()
+        return drifted
@@ -0,0 +1,42 @@
+from sqlalchemy.orm import selectinload
+
+from app import db, search_index
+from app.models.product import Category, Product
+from app.schemas import product_schema
+
+
+class SearchService:
+    @staticmethod
+    def search_products(query, category_id=None, limit=20, offset=0):
+        """Full-text search over product name/description, best match first.
+
+        Returns the page of products (each with its ``score``), the total
+        number of matches and per-category facet counts.
+        """
+        hits, facets, total = search_index.search(query, category_id=category_id, limit=limit, offset=offset)
+
+        ids = [product_id for product_id, _ in hits]
+        products = {}
+        if ids:
+            products = {p.id: p for p in db.session.scalars(
+                db.select(Product).where(Product.id.in_(ids))
+                .options(selectinload(Product.category), selectinload(Product.inventory),
+                         selectinload(Product.rating))
+            )}
+        items = []
+        for product_id, score in hits:
+            product = products.get(product_id)
+            if product is not None:
+                items.append(dict(product_schema.dump(product), score=round(score, 4)))
+
+        names = {}
+        category_ids = [c for c in facets if c is not None]
+        if category_ids:
+            names = dict(db.session.execute(
+                db.select(Category.id, Category.name).where(Category.id.in_(category_ids))
+            ).all())
+        facet_list = sorted(
+            ({'category_id': c, 'name': names.get(c), 'count': count} for c, count in facets.items()),
+            key=lambda facet: (-facet['count'], facet['category_id'] or 0),
+        )
+        return {'items': items, 'total': total, 'facets': facet_list}
@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from app import audit_log, db, password_hasher
+from app.models.user import User
+from app.schemas.user_schema import UserSchema
+
+FORMATS = ('csv', 'ndjson')
+EXPORT_FIELDS = ('id', 'username', 'email', 'role', 'address', 'created_at')
+
+
+class UserImportService:
+    @staticmethod
+    def iter_records(stream, fmt):
+        """Yield ``(line_no, record, error)`` from a text stream, one row at a time."""
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                record = {k: v for k, v in record.items() if k is not None and v not in (None, '')}
+                yield reader.line_num, record, None
+        elif fmt == 'ndjson':
+            for line_no, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, {'_schema': [f'Invalid JSON: {e}']}
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, None, {'_schema': ['Expected a JSON object']}
+                    continue
+                yield line_no, record, None
+        else:
+            raise ValueError(f'Unsupported format: {fmt}')
+
+    @staticmethod
+    def import_users(stream, fmt, chunk_size=500):
+        """Create users from a CSV/NDJSON stream, chunk by chunk.
+
+        Each chunk is validated with one ``UserSchema(many=True)`` load, its
+        passwords are hashed in the process pool and its rows are written
+        with one executemany INSERT. Bad rows are reported and skipped.
+        """
+        created = 0
+        failed = []
+        records = UserImportService.iter_records(stream, fmt)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            rows = []
+            for line_no, record, error in chunk:
+                if error:
+                    failed.append({'row': line_no, 'errors': error})
+                else:
+                    rows.append((line_no, record))
+            if rows:
+                chunk_created, chunk_failed = UserImportService._import_chunk(rows)
+                created += chunk_created
+                failed.extend(chunk_failed)
+        failed.sort(key=lambda failure: failure['row'])
+        return {'created': created, 'failed': failed}
+
+    @staticmethod
+    def _import_chunk(rows):
+        schema = UserSchema(many=True, context={'exclude_id': None})
+        try:
+            loaded = schema.load([record for _, record in rows])
+            errors = {}
+        except ValidationError as err:
+            loaded = err.valid_data
+            errors = err.messages if isinstance(err.messages, dict) else {}
+
+        failed = [{'row': rows[i][0], 'errors': errors[i]} for i in sorted(errors) if isinstance(i, int)]
+        valid = [(rows[i][0], loaded[i]) for i in range(len(rows)) if i not in errors]
+        if not valid:
+            return 0, failed
+
+        hashes = password_hasher.hash_many([data['password'] for _, data in valid])
+        values = [{
+            'username': data['username'],
+            'email': data['email'],
+            'password': pwhash,
+            'role': data.get('role', 'user'),
+            'address': data['address'],
+        } for (_, data), pwhash in zip(valid, hashes)]
+
+        try:
+            UserImportService._insert(values)
+            db.session.commit()
+            return len(values), failed
+        except IntegrityError:
+            # Someone registered one of these in the meantime; isolate the offending rows
+            db.session.rollback()
+
+        created = 0
+        for (line_no, _), value in zip(valid, values):
+            try:
+                with db.session.begin_nested():
+                    UserImportService._insert([value])
+                created += 1
+            except IntegrityError:
+                failed.append({'row': line_no, 'errors': {'_schema': ['User already exists.']}})
+        db.session.commit()
+        return created, failed
+
+    @staticmethod
+    def _insert(values):
+        ids = db.session.execute(db.insert(User).returning(User.id), values).scalars().all()
+        audit_log.record_many([{'user_id': user_id, 'action': 'User imported'} for user_id in ids])
+
+    @staticmethod
+    def export_users(fmt):
+        """Yield the users table as CSV or NDJSON text chunks without loading it all."""
+        if fmt not in FORMATS:
+            raise ValueError(f'Unsupported format: {fmt}')
+        columns = [getattr(User, f) for f in EXPORT_FIELDS]
+        result = db.session.execute(
+            db.select(*columns).order_by(User.id).execution_options(yield_per=1000)
+        )
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS)
+            for partition in result.partitions():
+                for row in partition:
+                    writer.writerow(['' if v is None else v.isoformat() if f == 'created_at' else v
+                                     for f, v in zip(EXPORT_FIELDS, row)])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield ''.join(
+                    json.dumps({f: (v.isoformat() if f == 'created_at' and v else v)
+                                for f, v in zip(EXPORT_FIELDS, row)}) + '\n'
+                    for row in partition
+                )
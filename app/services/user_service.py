@@ -1,10 +1,13 @@
 from flask import current_app, jsonify, url_for
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 from app.models.user import User, Log, TokenBlocklist
-from app import db, mail
+from app import audit_log, db, mail_queue, revocation_cache
 from flask_jwt_extended import create_access_token, decode_token, get_jwt_identity
-from datetime import timedelta
+from datetime import datetime, timedelta
 from flask_mail import Message
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
+from app.schemas.user_schema import unique_field_errors
 import secrets
 
 class UserService:
@@ -13,10 +16,33 @@ class UserService:
     def get_all_users():
         return User.query.all()
 
+    @staticmethod
+    def list_users(cursor=None, limit=50, fields=('id',)):
+        # Keyset trên id, chỉ SELECT các cột được yêu cầu
+        columns = [User.id] + [getattr(User, f) for f in fields if f != 'id']
+        stmt = db.select(*columns).order_by(User.id).limit(limit + 1)
+        if cursor:
+            try:
+                (after_id,) = cursor
+                stmt = stmt.where(User.id > int(after_id))
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+        return db.session.execute(stmt.execution_options(yield_per=100))
+
     @staticmethod
     def get_user_by_id(user_id):
         return User.query.get(user_id)
 
+    @staticmethod
+    def get_user_version(user_id):
+        """``(version_id, updated_at)`` of the user (None if there is no such user), for ETags.
+
+        ``updated_at`` tells apart a new user that SQLite gave the id of a
+        deleted one: both start at ``version_id`` 1.
+        """
+        row = db.session.execute(db.select(User.version_id, User.updated_at).where(User.id == user_id)).first()
+        return tuple(row) if row is not None else None
+
     @staticmethod
     def get_user_by_email(email):
         return User.query.filter_by(email=email).first()
@@ -31,10 +57,14 @@ class UserService:
         user = User(username=data['username'], email=data['email'], address=data['address'])
         user.set_password(data['password'])
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Lost a race with a concurrent registration: report it like the schema would
+            db.session.rollback()
+            raise UserService._unique_violation(data)
 
-        log = Log(user_id=user.id, action='User created')
-        db.session.add(log)
+        audit_log.record(user.id, 'User created')
         db.session.commit()
 
         return user
@@ -46,23 +76,26 @@ class UserService:
                 user.set_password(value)
             else:
                 setattr(user, key, value)
-        
-        db.session.commit()
 
-        log = Log(user_id=user.id, action='User updated')
-        db.session.add(log)
-        db.session.commit()
+        audit_log.record(user.id, 'User updated')
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise UserService._unique_violation(data, exclude_id=user.id)
 
         return user
 
+    @staticmethod
+    def _unique_violation(data, exclude_id=None):
+        errors = unique_field_errors([data], exclude_id=exclude_id)
+        return ValidationError(errors.get(0) or {'_schema': ['User already exists.']})
+
     @staticmethod
     def delete_user(user):
         user_id = user.id
         db.session.delete(user)
-        db.session.commit()
-
-        log = Log(user_id=user_id, action='User deleted')
-        db.session.add(log)
+        audit_log.record(user_id, 'User deleted', durable=True)
         db.session.commit()
 
     # Phương thức xử lý nhật ký
@@ -70,25 +103,82 @@ class UserService:
     def get_user_logs(user_id):
         return Log.query.filter_by(user_id=user_id).all()
 
+    @staticmethod
+    def list_user_logs(user_id, cursor=None, limit=50, fields=('id',)):
+        # Keyset trên (timestamp, id) để phân trang ổn định
+        columns = [Log.id, Log.timestamp] + [getattr(Log, f) for f in fields if f not in ('id', 'timestamp')]
+        stmt = (db.select(*columns)
+                .where(Log.user_id == user_id)
+                .order_by(Log.timestamp, Log.id)
+                .limit(limit + 1))
+        if cursor:
+            try:
+                after_timestamp, after_id = cursor
+                after_timestamp = datetime.fromisoformat(after_timestamp)
+                after_id = int(after_id)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+            stmt = stmt.where(db.or_(
+                Log.timestamp > after_timestamp,
+                db.and_(Log.timestamp == after_timestamp, Log.id > after_id),
+            ))
+        return db.session.execute(stmt.execution_options(yield_per=100))
+
     # Các phương thức xác thực và quản lý phiên đăng nhập
     @staticmethod
     def authenticate_user(email, password):
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
+            # Hash cũ (tham số khác cấu hình hiện tại) thì băm lại khi đăng nhập thành công
+            if user.password_needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             return user
         return None
     
     @staticmethod
-    def add_token_to_blocklist(jti):
-        token = TokenBlocklist(jti=jti)
+    def add_token_to_blocklist(jti, exp=None):
+        expires_at = datetime.utcfromtimestamp(exp) if exp is not None else None
+        token = TokenBlocklist(jti=jti, expires_at=expires_at)
         db.session.add(token)
         db.session.commit()
+        revocation_cache.add(jti)
 
     @staticmethod
     def is_token_revoked(jwt_payload):
-        jti = jwt_payload['jti']
+        return revocation_cache.is_revoked(jwt_payload['jti'], UserService.lookup_revoked_token)
+
+    @staticmethod
+    def lookup_revoked_token(jti):
         token = TokenBlocklist.query.filter_by(jti=jti).first()
         return token is not None
+
+    @staticmethod
+    def purge_expired_tokens(batch_size=1000):
+        # Token hết hạn thì JWT tự bị từ chối, không cần giữ trong blocklist nữa
+        now = datetime.utcnow()
+        expired = TokenBlocklist.expires_at < now
+
+        # Rows from before expires_at existed: drop once even a refresh token would have expired
+        refresh_expires = current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+        if refresh_expires is not False:
+            if isinstance(refresh_expires, int):
+                refresh_expires = timedelta(seconds=refresh_expires)
+            legacy_cutoff = now - refresh_expires
+            expired = db.or_(
+                expired,
+                db.and_(TokenBlocklist.expires_at.is_(None), TokenBlocklist.created_at < legacy_cutoff),
+            )
+
+        total = 0
+        while True:
+            batch = db.select(TokenBlocklist.id).where(expired).limit(batch_size).scalar_subquery()
+            deleted = TokenBlocklist.query.filter(TokenBlocklist.id.in_(batch)).delete(synchronize_session=False)
+            db.session.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+        return total
     
 
     # Các phương thức quản lý mật khẩu
@@ -115,9 +205,7 @@ class UserService:
         if not user.check_password(current_password):
             return False, 'Current password is incorrect'
         user.set_password(new_password)
-        db.session.commit()
-        log = Log(user_id=user.id, action='Password changed')
-        db.session.add(log)
+        audit_log.record(user.id, 'Password changed', durable=True)
         db.session.commit()
         return True, 'Password changed successfully'
     
@@ -140,13 +228,13 @@ class UserService:
 
 This link will expire in 1 hour.
 If you did not request a password reset, please ignore this email.'''
-            mail.send(msg)
+            # Chỉ đưa vào hàng đợi, worker sẽ gửi qua SMTP sau
+            mail_queue.enqueue(msg)
         except Exception as e:
             current_app.logger.error(f'Not send email reset password: {str(e)}')
             return None, 'Not send email reset password'
         
-        log = Log(user_id=user.id, action='Send email reset password')
-        db.session.add(log)
+        audit_log.record(user.id, 'Send email reset password', durable=True)
         db.session.commit()
         
         return user, 'Send email reset password'
@@ -154,10 +242,7 @@ If you did not request a password reset, please ignore this email.'''
     @staticmethod
     def reset_password(user, new_password):
         user.set_password(new_password)
-        db.session.commit()
-
-        log = Log(user_id=user.id, action='Password reset')
-        db.session.add(log)
+        audit_log.record(user.id, 'Password reset', durable=True)
         db.session.commit()
 
         return "Password reset successfully"
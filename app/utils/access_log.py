@@ -0,0 +1,128 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, request
+from flask_jwt_extended import get_jwt
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread, keep the request thread cheap
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _ForwardHandler(logging.Handler):
+    """Serializes access records to JSON and hands them to the app logger's handlers."""
+
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+
+    def emit(self, record):
+        if isinstance(record.msg, dict):
+            record.msg = json.dumps(record.msg, separators=(',', ':'), default=str)
+            record.args = None
+        self.target.handle(record)
+
+
+class AccessLog:
+    def __init__(self, app=None):
+        self.logger = logging.getLogger('app.access')
+        self._handler = None
+        self._listener = None
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ACCESS_LOG_ENABLED', True)
+        app.config.setdefault('ACCESS_LOG_SAMPLE_RATE_2XX', 1.0)
+        app.config.setdefault('ACCESS_LOG_QUEUE_SIZE', 10000)
+
+        self.sample_rate = float(app.config['ACCESS_LOG_SAMPLE_RATE_2XX'])
+        self._start_listener(app.config['ACCESS_LOG_QUEUE_SIZE'])
+
+        app.extensions['access_log'] = self
+        if app.config['ACCESS_LOG_ENABLED']:
+            app.before_request(self._start_timer)
+            app.after_request(self._log_response)
+
+    def _start_listener(self, queue_size):
+        self.stop()
+        log_queue = queue.Queue(maxsize=queue_size)
+        self._handler = _DroppingQueueHandler(log_queue)
+        self.logger.handlers = [self._handler]
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        self._listener = QueueListener(log_queue, _ForwardHandler(logging.getLogger('app')))
+        self._listener.start()
+        # Một lần cho cả tiến trình, dù create_app chạy bao nhiêu lần
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def stop(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    @property
+    def dropped(self):
+        return self._handler.dropped if self._handler else 0
+
+    def _start_timer(self):
+        # Shared with the metrics registry, whichever hook runs first sets it
+        g.setdefault('request_started_at', time.perf_counter())
+
+    def _log_response(self, response):
+        status = response.status_code
+        if 200 <= status < 300 and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return response
+
+        started_at = g.get('request_started_at')
+        latency_ms = (time.perf_counter() - started_at) * 1000 if started_at is not None else None
+
+        # Only reuse claims the view already decoded, never decode the token again here
+        try:
+            claims = get_jwt()
+        except RuntimeError:
+            claims = {}
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.url_rule.rule if request.url_rule else None,
+            'status': status,
+            'latency_ms': round(latency_ms, 3) if latency_ms is not None else None,
+            'remote_addr': request.remote_addr,
+            'user_id': claims.get('sub'),
+            'username': claims.get('username'),
+            'bytes': response.content_length,
+        }
+
+        if status >= 500:
+            level = logging.ERROR
+        elif status >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        self.logger.log(level, record)
+        return response
@@ -0,0 +1,182 @@
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from sqlalchemy import event, insert
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'audit_log_pending'
+
+
+class AuditLogWriter:
+    """Writes ``Log`` rows without a commit of their own.
+
+    In ``transaction`` mode entries join the caller's transaction, so the
+    business change and its audit row cost one commit. In ``buffered`` mode
+    entries are held until the caller's transaction commits, then queued and
+    written by a background thread with one executemany INSERT per batch,
+    every ``AUDIT_LOG_FLUSH_INTERVAL`` seconds or as soon as a batch is full;
+    ``durable=True`` forces an entry into the caller's transaction anyway.
+    Processes that exit without running atexit hooks must call ``close``.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = threading.Event()
+        self._buffer = []
+        self._thread = None
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUDIT_LOG_MODE', 'transaction')
+        app.config.setdefault('AUDIT_LOG_BATCH_SIZE', 100)
+        app.config.setdefault('AUDIT_LOG_FLUSH_INTERVAL', 1.0)
+        app.config.setdefault('AUDIT_LOG_MAX_BUFFER', 10000)
+
+        mode = app.config['AUDIT_LOG_MODE']
+        if mode not in ('transaction', 'buffered'):
+            raise ValueError(f'Unknown AUDIT_LOG_MODE: {mode}')
+
+        self.app = app
+        self.mode = mode
+        self.batch_size = app.config['AUDIT_LOG_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_LOG_FLUSH_INTERVAL']
+        self.max_buffer = app.config['AUDIT_LOG_MAX_BUFFER']
+        with self._lock:
+            self._counters = {'recorded': 0, 'flushed': 0, 'batches': 0, 'errors': 0, 'dropped': 0}
+        app.extensions['audit_log'] = self
+
+        if not self._listening:
+            from app import db
+            event.listen(db.session, 'after_commit', self._after_commit)
+            event.listen(db.session, 'after_rollback', self._after_rollback)
+            atexit.register(self.close)
+            self._listening = True
+
+    def record(self, user_id, action, details=None, durable=False):
+        from app import db
+        from app.models.user import Log
+
+        entry = {
+            'user_id': user_id,
+            'action': action,
+            'details': details,
+            'timestamp': datetime.utcnow(),
+        }
+        self._count('recorded')
+        if durable or self.mode == 'transaction':
+            db.session.add(Log(**entry))
+        else:
+            db.session.info.setdefault(PENDING_KEY, []).append(entry)
+
+    def record_many(self, entries, durable=False):
+        """Record several ``{'user_id', 'action', 'details'}`` entries with one INSERT."""
+        from app import db
+        from app.models.user import Log
+
+        now = datetime.utcnow()
+        entries = [dict({'details': None, 'timestamp': now}, **entry) for entry in entries]
+        if not entries:
+            return
+        self._count('recorded', len(entries))
+        if durable or self.mode == 'transaction':
+            db.session.execute(insert(Log), entries)
+        else:
+            db.session.info.setdefault(PENDING_KEY, []).extend(entries)
+
+    def _after_commit(self, session):
+        entries = session.info.pop(PENDING_KEY, None)
+        if not entries:
+            return
+        with self._lock:
+            self._buffer.extend(entries)
+            size = len(self._buffer)
+        if size >= self.max_buffer:
+            # Flusher can't keep up: apply backpressure on the writer instead of growing forever
+            self.flush()
+        elif size >= self.batch_size:
+            self._wakeup.set()
+        self._ensure_flusher()
+
+    def _after_rollback(self, session):
+        session.info.pop(PENDING_KEY, None)
+
+    def _ensure_flusher(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closing.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self, timeout=5):
+        """Stop the background flusher and write whatever is still buffered.
+
+        Entries committed afterwards start a new flusher, so closing is safe
+        to repeat.
+        """
+        self._closing.set()
+        self._wakeup.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        try:
+            self.flush()
+        finally:
+            self._closing.clear()
+
+    def flush(self):
+        """Write everything buffered so far, one executemany per batch."""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+
+        from app import db
+        from app.models.user import Log
+
+        written = 0
+        with self.app.app_context():
+            for start in range(0, len(entries), self.batch_size):
+                batch = entries[start:start + self.batch_size]
+                try:
+                    # Own connection, so it never touches a request's session
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(Log), batch)
+                except Exception:
+                    logger.exception(f'Failed to write {len(batch)} audit log entries')
+                    remaining = entries[start:]
+                    with self._lock:
+                        self._counters['errors'] += 1
+                        # Giữ lại để lần sau ghi tiếp, nhưng không quá max_buffer
+                        kept = max(min(self.max_buffer - len(self._buffer), len(remaining)), 0)
+                        self._buffer[:0] = remaining[:kept]
+                        self._counters['dropped'] += len(remaining) - kept
+                    if kept < len(remaining):
+                        # Không còn chỗ trong buffer: ít nhất để lại dấu vết trong log
+                        logger.error('Dropped %d audit log entries, buffer full: %r',
+                                     len(remaining) - kept, remaining[kept:])
+                    break
+                written += len(batch)
+                self._count('batches')
+        self._count('flushed', written)
+        return written
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, mode=self.mode, buffered=len(self._buffer))
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+MISS = object()
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries also expire after a TTL.
+
+    Invalidation is per process: ``invalidate_on`` clears it after a commit
+    in this process wrote one of the watched models, and the TTL bounds how
+    stale other worker processes can be.
+    """
+
+    def __init__(self, name, app=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.maxsize = 1024
+        self.ttl = 30
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._models = ()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        prefix = self.name.upper()
+        app.config.setdefault(f'{prefix}_CACHE_MAXSIZE', 1024)
+        app.config.setdefault(f'{prefix}_CACHE_TTL', 30)
+        self.maxsize = app.config[f'{prefix}_CACHE_MAXSIZE']
+        self.ttl = app.config[f'{prefix}_CACHE_TTL']
+        self.clear()
+        app.extensions[f'{self.name}_cache'] = self
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._counters['misses'] += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self):
+        self._counters['invalidations'] += 1
+        self.clear()
+
+    def invalidate_on(self, session, *models):
+        """Clear the cache after any commit that inserted, updated or deleted one of ``models``."""
+        first = not self._models
+        self._models = tuple(set(self._models) | set(models))
+        if not first:
+            return
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'do_orm_execute', self._do_orm_execute)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+
+    @property
+    def _flag(self):
+        return f'{self.name}_cache_dirty'
+
+    def _after_flush(self, session, flush_context):
+        if any(isinstance(obj, self._models)
+               for objects in (session.new, session.dirty, session.deleted) for obj in objects):
+            session.info[self._flag] = True
+
+    def _do_orm_execute(self, orm_execute_state):
+        # Bulk insert()/update()/delete() statements never go through the flush
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        if any(mapper.class_ in self._models for mapper in orm_execute_state.all_mappers):
+            orm_execute_state.session.info[self._flag] = True
+
+    def _after_commit(self, session):
+        if session.info.pop(self._flag, False):
+            self.invalidate()
+
+    def _after_rollback(self, session):
+        session.info.pop(self._flag, None)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return dict(self._counters, size=size, maxsize=self.maxsize, ttl=self.ttl)
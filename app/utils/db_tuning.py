@@ -0,0 +1,148 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def observe(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            pool_metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe(time.perf_counter() - started)
+        return conn
+
+
+def _is_sqlite(url):
+    return url.drivername in ('sqlite', 'sqlite+pysqlite')
+
+
+def _is_memory(url):
+    return _is_sqlite(url) and url.database in (None, '', ':memory:')
+
+
+def resolve_profile(config):
+    profile = config.get('DB_PROFILE')
+    if profile:
+        return profile
+    return 'sqlite' if _is_sqlite(make_url(config['SQLALCHEMY_DATABASE_URI'])) else 'server'
+
+
+def configure_engine(app):
+    """Fill ``SQLALCHEMY_ENGINE_OPTIONS`` from the selected profile.
+
+    Must run before ``db.init_app``. Options set explicitly in the config win
+    over the profile's.
+    """
+    config = app.config
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    profile = resolve_profile(config)
+    if profile not in ('sqlite', 'server'):
+        raise ValueError(f'Unknown DB_PROFILE: {profile}')
+
+    options = {}
+    if not _is_memory(url):
+        # In-memory SQLite is pinned to a StaticPool by Flask-SQLAlchemy
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    if profile == 'server':
+        options.update(pool_pre_ping=True, pool_recycle=config['DB_POOL_RECYCLE'])
+
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    config['DB_PROFILE'] = profile
+
+
+def _begin_before_savepoint(conn, name):
+    # pysqlite chỉ tự BEGIN trước câu ghi dữ liệu: nếu SAVEPOINT mở transaction thì
+    # RELEASE sẽ commit luôn và rollback của session bên ngoài không còn tác dụng
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql('BEGIN')
+
+
+def install_engine_events(app, db):
+    """Make savepoints nest inside the session's transaction on SQLite, and
+    apply per-connection SQLite pragmas for the ``sqlite`` profile."""
+    with app.app_context():
+        engine = db.engine
+    if not _is_sqlite(engine.url):
+        return
+    event.listen(engine, 'savepoint', _begin_before_savepoint)
+    if app.config['DB_PROFILE'] != 'sqlite':
+        return
+
+    pragmas = {
+        'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+        'synchronous': 'NORMAL',
+        'cache_size': -app.config['SQLITE_CACHE_SIZE_KB'],
+        'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+        'temp_store': 'MEMORY',
+    }
+    use_wal = not _is_memory(engine.url)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: readers no longer block on the writer, and commits fsync less
+        if use_wal:
+            cursor.execute('PRAGMA journal_mode=WAL')
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def pool_stats(db):
+    pool = db.engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow(),
+                     checked_in=pool.checkedin())
+    stats.update(pool_metrics.snapshot())
+    return stats
@@ -0,0 +1,16 @@
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+
+def admin_required(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        from app.services.user_service import UserService
+        user = UserService.get_user_by_id(get_jwt_identity())
+        if not user or user.role != 'admin':
+            return jsonify({'message': 'Admin privileges required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,108 @@
+from collections import defaultdict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+
+def upsert(bind, model, index_elements, update):
+    """Build ``INSERT ... ON CONFLICT DO UPDATE`` (or MySQL's ``ON DUPLICATE KEY``).
+
+    ``update(new)`` returns the SET clause; ``new`` refers to the row that
+    was being inserted (``excluded`` / ``inserted``), so counters can be
+    bumped atomically, e.g. ``{'n': model.n + new.n}``.
+    """
+    dialect = bind.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(model)
+        return stmt.on_conflict_do_update(index_elements=index_elements, set_=update(stmt.excluded))
+    if dialect in ('mysql', 'mariadb'):
+        stmt = mysql.insert(model)
+        return stmt.on_duplicate_key_update(**update(stmt.inserted))
+    raise NotImplementedError(f'Upsert is not supported on {dialect}')
+
+
+def _ignore(*args):
+    pass
+
+
+def _old_value(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), key)
+
+
+class CounterAggregate:
+    """Keep a table of per-key counters in step with every flushed row of ``model``.
+
+    ``contribution(values)`` gets ``{column: value}`` for ``columns`` of one
+    row and returns ``(key, {counter: amount})``, or None when the row counts
+    for nothing. Before each flush the contributions of new and deleted rows
+    are summed per key (a row whose ``columns`` changed takes back its old
+    contribution and adds its new one); after the flush they are added to
+    ``aggregate`` with one atomic upsert, in the same transaction.
+
+    Only rows that go through the flush are counted: bulk ``insert()``,
+    ``update()`` and ``delete()`` statements and ``ON DELETE`` cascades in
+    the database bypass it, so recompute the table after using them.
+    """
+
+    def __init__(self, model, aggregate, key, counters, columns, contribution):
+        self.model = model
+        self.table = aggregate.__table__
+        self.key = key
+        self.counters = tuple(counters)
+        self.columns = tuple(columns)
+        self.contribution = contribution
+        self.info_key = f'{self.table.name}_deltas'
+        for column in self.columns:
+            # Nạp giá trị cũ trước khi gán, kể cả khi thuộc tính đã bị expire sau commit
+            event.listen(getattr(model, column), 'set', _ignore, active_history=True)
+
+    def install(self, session):
+        if event.contains(session, 'before_flush', self._collect):
+            return
+        event.listen(session, 'before_flush', self._collect)
+        event.listen(session, 'after_flush', self._apply)
+        event.listen(session, 'after_rollback', self._discard)
+
+    def _add(self, deltas, values, sign):
+        contribution = self.contribution(values)
+        if contribution is None:
+            return
+        key, amounts = contribution
+        delta = deltas[key]
+        for counter, amount in amounts.items():
+            delta[counter] += sign * amount
+
+    def _collect(self, session, flush_context, instances):
+        deltas = session.info.setdefault(self.info_key, defaultdict(lambda: dict.fromkeys(self.counters, 0)))
+        for obj in session.new:
+            if isinstance(obj, self.model):
+                self._add(deltas, {c: getattr(obj, c) for c in self.columns}, 1)
+        for obj in session.deleted:
+            if isinstance(obj, self.model):
+                state = inspect(obj)
+                self._add(deltas, {c: _old_value(state, c) for c in self.columns}, -1)
+        for obj in session.dirty:
+            if not isinstance(obj, self.model):
+                continue
+            state = inspect(obj)
+            if any(state.attrs[c].history.has_changes() for c in self.columns):
+                self._add(deltas, {c: _old_value(state, c) for c in self.columns}, -1)
+                self._add(deltas, {c: getattr(obj, c) for c in self.columns}, 1)
+
+    def _apply(self, session, flush_context):
+        deltas = session.info.pop(self.info_key, None)
+        rows = [dict(delta, **{self.key: key}) for key, delta in (deltas or {}).items() if any(delta.values())]
+        if not rows:
+            return
+        conn = session.connection()
+        stmt = upsert(conn, self.table, [self.key],
+                      lambda new: {c: self.table.c[c] + getattr(new, c) for c in self.counters})
+        # Cộng dồn nguyên tử trong DB: hai transaction đồng thời không ghi đè nhau
+        conn.execute(stmt, rows)
+
+    def _discard(self, session):
+        session.info.pop(self.info_key, None)
@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint, inspect, text
+
+Finding = namedtuple('Finding', ['table', 'columns', 'referred_table'])
+PlanFinding = namedtuple('PlanFinding', ['name', 'problem', 'plan'])
+
+
+def _covered(columns, leading):
+    # Một index dùng được cho FK khi các cột FK là phần đầu của nó
+    return any(tuple(candidate[:len(columns)]) == columns for candidate in leading)
+
+
+def model_findings(metadata):
+    """Foreign keys declared on the models that no index, unique or primary key starts with."""
+    findings = []
+    for table in metadata.sorted_tables:
+        leading = [tuple(c.name for c in index.columns) for index in table.indexes]
+        leading += [tuple(c.name for c in constraint.columns) for constraint in table.constraints
+                    if isinstance(constraint, (UniqueConstraint, PrimaryKeyConstraint))]
+        for fk in table.foreign_key_constraints:
+            columns = tuple(c.name for c in fk.columns)
+            if not _covered(columns, leading):
+                findings.append(Finding(table.name, columns, fk.referred_table.name))
+    return findings
+
+
+def database_findings(engine):
+    """The same check against the live schema, which may lag behind the models."""
+    inspector = inspect(engine)
+    findings = []
+    for table in sorted(inspector.get_table_names()):
+        foreign_keys = inspector.get_foreign_keys(table)
+        if not foreign_keys:
+            continue
+        leading = [tuple(index['column_names']) for index in inspector.get_indexes(table)]
+        leading += [tuple(unique['column_names']) for unique in inspector.get_unique_constraints(table)]
+        leading.append(tuple(inspector.get_pk_constraint(table)['constrained_columns']))
+        for fk in foreign_keys:
+            columns = tuple(fk['constrained_columns'])
+            if not _covered(columns, leading):
+                findings.append(Finding(table, columns, fk['referred_table']))
+    return findings
+
+
+def service_queries():
+    """``(name, select)`` pairs with the WHERE/ORDER BY shapes the services issue."""
+    from app import db
+    from app.models import (Cart, CartItem, Inventory, Log, Order, OrderItem, Product, Review,
+                            StockReservation, TokenBlocklist, User, Wishlist)
+
+    return [
+        ('user by email', db.select(User.id).where(User.email == 'x')),
+        ('user by username', db.select(User.id).where(User.username == 'x')),
+        ('user logs page', db.select(Log.id).where(Log.user_id == 1).order_by(Log.timestamp, Log.id).limit(51)),
+        ('token revocation check', db.select(TokenBlocklist.id).where(TokenBlocklist.jti == 'x')),
+        ('catalog page by category and price',
+         db.select(Product.id).where(Product.category_id == 1).order_by(Product.price, Product.id).limit(51)),
+        ('catalog page newest', db.select(Product.id).order_by(Product.created_at.desc(), Product.id.desc()).limit(51)),
+        ('product of inventory row', db.select(Product.id).where(Product.inventory_id == 1)),
+        ('product reviews page',
+         db.select(Review.id).where(Review.product_id == 1).order_by(Review.id.desc()).limit(51)),
+        ('reviews by user', db.select(Review.id).where(Review.user_id == 1)),
+        ('cart read', db.select(CartItem.id).join(Cart, Cart.id == CartItem.cart_id)
+         .join(Product, Product.id == CartItem.product_id)
+         .outerjoin(Inventory, Inventory.id == Product.inventory_id).where(Cart.user_id == 1)),
+        ('carts holding a product', db.select(CartItem.id).where(CartItem.product_id == 1)),
+        ('reservation by key', db.select(StockReservation.id).where(StockReservation.reservation_key == 'x')),
+        ('expired reservations', db.select(StockReservation.id).where(StockReservation.expires_at <= '2000-01-01')),
+        ('order history page', db.select(Order.id).where(Order.user_id == 1)
+         .order_by(Order.created_at.desc(), Order.id.desc()).limit(51)),
+        ('order items of order', db.select(OrderItem.id).where(OrderItem.order_id == 1)),
+        ('orders containing a product', db.select(OrderItem.id).where(OrderItem.product_id == 1)),
+        ('wishlist of user', db.select(Wishlist.id).where(Wishlist.user_id == 1)),
+    ]
+
+
+def plan_findings(engine, queries):
+    """``EXPLAIN QUERY PLAN`` each query (SQLite only) and report full scans and temp sorts."""
+    if engine.dialect.name != 'sqlite':
+        return None
+    findings = []
+    with engine.connect() as conn:
+        for name, stmt in queries:
+            sql = str(stmt.compile(engine, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+            for detail in plan:
+                # "SCAN t" = quét toàn bảng; "SCAN t USING INDEX" là duyệt theo index, chấp nhận được
+                if detail.startswith('SCAN ') and 'USING' not in detail:
+                    findings.append(PlanFinding(name, f'full scan of {detail.split()[1]}', plan))
+                elif 'TEMP B-TREE' in detail:
+                    findings.append(PlanFinding(name, detail.lower(), plan))
+    return findings
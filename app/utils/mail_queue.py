@@ -0,0 +1,344 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask_mail import Message
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_FIELDS = ('subject', 'sender', 'recipients', 'body', 'html', 'cc', 'bcc', 'reply_to')
+# Đánh thức worker đang chờ trong queue.get khi dừng
+_STOP = object()
+
+
+class MailSpool:
+    """Small sqlite file that keeps queued mail across restarts.
+
+    Several processes (pre-fork workers) may share one spool. A row is sent
+    only by the process whose ``claim`` returned it; the claim is a lease,
+    so mail held by a worker that died mid-send becomes due again once the
+    lease runs out.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS mail_spool ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' payload TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' next_attempt REAL NOT NULL,'
+            ' status TEXT NOT NULL DEFAULT \'pending\','
+            ' last_error TEXT,'
+            ' created_at REAL NOT NULL,'
+            ' lease_until REAL)'
+        )
+        # Spool tạo bởi phiên bản cũ chưa có cột lease_until
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(mail_spool)')}
+        if 'lease_until' not in columns:
+            self._conn.execute('ALTER TABLE mail_spool ADD COLUMN lease_until REAL')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS ix_mail_spool_due ON mail_spool (status, next_attempt)'
+        )
+
+    def add(self, payload):
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO mail_spool (payload, next_attempt, created_at) VALUES (?, ?, ?)',
+                (json.dumps(payload), now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, ids, lease):
+        """Atomically mark ``ids`` as being sent by this process for ``lease`` seconds.
+
+        Returns ``(id, payload, attempts)`` for the rows actually claimed;
+        rows another process holds (or already sent) are left out.
+        """
+        if not ids:
+            return []
+        now = time.time()
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f'UPDATE mail_spool SET status = \'sending\', lease_until = ? WHERE id IN ({placeholders})'
+                ' AND (status = \'pending\' OR (status = \'sending\' AND lease_until <= ?))'
+                ' RETURNING id, payload, attempts',
+                [now + lease, *ids, now],
+            ).fetchall()
+        return [(row[0], json.loads(row[1]), row[2]) for row in rows]
+
+    def release(self, ids):
+        """Hand claimed rows back as pending right away instead of waiting for their lease."""
+        if not ids:
+            return
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            self._conn.execute(
+                f'UPDATE mail_spool SET status = \'pending\', lease_until = NULL'
+                f' WHERE id IN ({placeholders}) AND status = \'sending\'',
+                ids,
+            )
+
+    def due(self, limit):
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id FROM mail_spool WHERE (status = \'pending\' AND next_attempt <= ?)'
+                ' OR (status = \'sending\' AND lease_until <= ?) ORDER BY next_attempt LIMIT ?',
+                (now, now, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete_many(self, ids):
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany('DELETE FROM mail_spool WHERE id = ?', [(i,) for i in ids])
+
+    def defer(self, spool_id, attempts, next_attempt, error, dead=False):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE mail_spool SET attempts = ?, next_attempt = ?, last_error = ?, status = ?, lease_until = NULL'
+                ' WHERE id = ?',
+                (attempts, next_attempt, error, 'failed' if dead else 'pending', spool_id),
+            )
+
+    def count(self, status='pending'):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM mail_spool WHERE status = ?', (status,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class MailQueue:
+    """Sends mail from a bounded in-process queue backed by a sqlite spool.
+
+    Messages are written to the spool before ``enqueue`` returns, so the
+    request only pays for one local insert. Worker threads keep one SMTP
+    connection open each, send in batches and retry with exponential
+    backoff; anything still in the spool at startup is picked up again.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._threads = []
+        self._spool = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MAIL_QUEUE_ENABLED', True)
+        app.config.setdefault('MAIL_QUEUE_SIZE', 1000)
+        app.config.setdefault('MAIL_QUEUE_WORKERS', 2)
+        app.config.setdefault('MAIL_BATCH_SIZE', 20)
+        app.config.setdefault('MAIL_MAX_RETRIES', 5)
+        app.config.setdefault('MAIL_RETRY_BACKOFF', 2.0)
+        app.config.setdefault('MAIL_IDLE_TIMEOUT', 30)
+        app.config.setdefault('MAIL_SEND_LEASE', 300)
+        app.config.setdefault('MAIL_SPOOL_PATH', os.path.join(app.instance_path, 'mail_spool.db'))
+
+        self.stop()
+        self.app = app
+        self.enabled = app.config['MAIL_QUEUE_ENABLED']
+        self.workers = app.config['MAIL_QUEUE_WORKERS']
+        self.batch_size = app.config['MAIL_BATCH_SIZE']
+        self.max_retries = app.config['MAIL_MAX_RETRIES']
+        self.backoff = app.config['MAIL_RETRY_BACKOFF']
+        self.idle_timeout = app.config['MAIL_IDLE_TIMEOUT']
+        self.lease = app.config['MAIL_SEND_LEASE']
+        self._queue = queue.Queue(maxsize=app.config['MAIL_QUEUE_SIZE'])
+        self._pending = set()
+        self._stop = threading.Event()
+        self._threads = []
+        self._counters = {'enqueued': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        app.extensions['mail_queue'] = self
+
+        if self.enabled:
+            spool_path = app.config['MAIL_SPOOL_PATH']
+            os.makedirs(os.path.dirname(spool_path) or '.', exist_ok=True)
+            self._spool = MailSpool(spool_path)
+            # Mail left over from a previous run gets sent without waiting for new traffic
+            if self._spool.count() or self._spool.count('sending'):
+                self._start()
+
+    def enqueue(self, message):
+        """Spool a ``flask_mail.Message`` and return without talking to SMTP."""
+        if not self.enabled:
+            from app import mail
+            mail.send(message)
+            return None
+
+        payload = {field: getattr(message, field, None) for field in PAYLOAD_FIELDS}
+        spool_id = self._spool.add(payload)
+        self._count('enqueued')
+        self._start()
+        self._offer(spool_id)
+        return spool_id
+
+    def _offer(self, spool_id):
+        with self._lock:
+            if spool_id in self._pending:
+                return
+            try:
+                self._queue.put_nowait(spool_id)
+            except queue.Full:
+                # Still in the spool; the sweeper will offer it again once there's room
+                return
+            self._pending.add(spool_id)
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'mail-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            sweeper = threading.Thread(target=self._sweep, name='mail-sweeper', daemon=True)
+            sweeper.start()
+            self._threads.append(sweeper)
+
+    def stop(self, timeout=5):
+        """Stop the threads and close the spool.
+
+        A worker finishes the message it is sending and hands the rest of its
+        batch back to the spool, so nothing is cut off mid-send or held
+        until its lease runs out.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        if threads:
+            self._stop.set()
+            for _ in threads:
+                try:
+                    self._queue.put_nowait(_STOP)
+                except queue.Full:
+                    # Worker nào cũng đang có việc và sẽ thấy cờ dừng ngay sau lô hiện tại
+                    break
+            deadline = time.monotonic() + timeout
+            for thread in threads:
+                thread.join(max(deadline - time.monotonic(), 0))
+            if any(thread.is_alive() for thread in threads):
+                logger.warning('Mail queue threads still running after %ss; spool left open', timeout)
+                return
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def _sweep(self):
+        while not self._stop.wait(1.0):
+            try:
+                for spool_id in self._spool.due(self._queue.maxsize):
+                    self._offer(spool_id)
+            except sqlite3.Error:
+                logger.exception('Mail spool sweep failed')
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=self.idle_timeout)
+        except queue.Empty:
+            return None
+        if first is _STOP:
+            return None
+        ids = [first]
+        while len(ids) < self.batch_size:
+            try:
+                spool_id = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if spool_id is _STOP:
+                # Của worker khác: trả lại để nó cũng được đánh thức
+                try:
+                    self._queue.put_nowait(_STOP)
+                except queue.Full:
+                    pass
+                break
+            ids.append(spool_id)
+        return ids
+
+    def _work(self):
+        with self.app.app_context():
+            connection = None
+            while not self._stop.is_set():
+                ids = self._next_batch()
+                if ids is None:
+                    # Idle: don't hold the SMTP connection open forever
+                    connection = self._close(connection)
+                    continue
+                try:
+                    connection = self._send_batch(connection, ids)
+                except Exception:
+                    logger.exception('Mail worker failed on batch %s', ids)
+                    connection = self._close(connection)
+                finally:
+                    with self._lock:
+                        self._pending.difference_update(ids)
+            self._close(connection)
+
+    def _send_batch(self, connection, ids):
+        from app import mail
+
+        sent = []
+        claimed = self._spool.claim(ids, self.lease)
+        for index, (spool_id, payload, attempts) in enumerate(claimed):
+            if self._stop.is_set():
+                self._spool.release([row[0] for row in claimed[index:]])
+                break
+            try:
+                if connection is None:
+                    connection = mail.connect().__enter__()
+                connection.send(Message(**payload))
+                sent.append(spool_id)
+            except Exception as e:
+                self._retry(spool_id, attempts, e)
+                # Reopen the connection for the rest of the batch
+                connection = self._close(connection)
+        self._spool.delete_many(sent)
+        self._count('sent', len(sent))
+        return connection
+
+    def _retry(self, spool_id, attempts, error):
+        attempts += 1
+        dead = attempts >= self.max_retries
+        next_attempt = time.time() + self.backoff * (2 ** (attempts - 1))
+        self._spool.defer(spool_id, attempts, next_attempt, str(error), dead=dead)
+        if dead:
+            self._count('failed')
+            logger.error(f'Giving up on mail {spool_id} after {attempts} attempts: {error}')
+        else:
+            self._count('retried')
+            logger.warning(f'Mail {spool_id} failed (attempt {attempts}), retrying: {error}')
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _close(connection):
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass
+        return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queued'] = self._queue.qsize()
+        if self._spool is not None:
+            stats['spooled'] = self._spool.count()
+            stats['sending'] = self._spool.count('sending')
+            stats['dead'] = self._spool.count('failed')
+        return stats
@@ -0,0 +1,233 @@
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Each power-of-two range is split into this many linear sub-buckets, so a
+# recorded value is off by at most 1/16 (~6%) of itself, HDR-histogram style.
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+MAX_SHIFT = 40  # ~12 days in microseconds, plenty for a request
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations in microseconds.
+
+    Memory is fixed (a few hundred ints) no matter how many values are
+    recorded, and percentiles come from walking the bucket counts.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (SUB_BUCKET_COUNT + MAX_SHIFT * SUB_BUCKET_HALF)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        if value < SUB_BUCKET_COUNT:
+            return value
+        shift = min(value.bit_length() - SUB_BUCKET_BITS, MAX_SHIFT)
+        sub = min(value >> shift, SUB_BUCKET_COUNT - 1)
+        return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + sub - SUB_BUCKET_HALF
+
+    @staticmethod
+    def _upper_bound(index):
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift, sub = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+        shift += 1
+        return ((sub + SUB_BUCKET_HALF + 1) << shift) - 1
+
+    def record(self, value):
+        value = max(int(value), 0)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        if not self.count:
+            return 0
+        target = max(int(q * self.count + 0.5), 1)
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= target:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+
+class EndpointMetrics:
+    __slots__ = ('requests', 'errors', 'client_errors', 'latency', 'db_queries', 'db_time', 'db_queries_max')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.client_errors = 0
+        self.latency = LatencyHistogram()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.db_queries_max = 0
+
+    def snapshot(self):
+        latency = self.latency
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'client_errors': self.client_errors,
+            'latency_ms': dict(
+                {f'p{int(q * 100)}': latency.percentile(q) / 1000 for q in QUANTILES},
+                mean=round(latency.total / requests / 1000, 3),
+                max=latency.max / 1000,
+            ),
+            'db': {
+                'queries': self.db_queries,
+                'time_ms': round(self.db_time * 1000, 3),
+                'queries_per_request': round(self.db_queries / requests, 2),
+                'time_ms_per_request': round(self.db_time * 1000 / requests, 3),
+                'queries_max': self.db_queries_max,
+            },
+        }
+
+
+class MetricsRegistry:
+    """Per-endpoint request counts, errors, latency histograms and DB usage.
+
+    Requests are keyed by method and ``url_rule``, so ``/api/users/1`` and
+    ``/api/users/2`` share one series. DB queries are counted with engine
+    cursor events and charged to the request that ran them.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._engines = set()
+        self.started_at = time.time()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+
+        from app import db
+        with app.app_context():
+            self.instrument_engine(db.engine)
+
+    def instrument_engine(self, engine):
+        if engine in self._engines:
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines.add(engine)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+        self.started_at = time.time()
+
+    def _start_request(self):
+        g.setdefault('request_started_at', time.perf_counter())
+        g.db_queries = 0
+        g.db_time = 0.0
+
+    def _end_request(self, response):
+        started_at = g.get('request_started_at')
+        if started_at is None:
+            return response
+        elapsed_us = (time.perf_counter() - started_at) * 1_000_000
+        rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+        status = response.status_code
+        queries = g.get('db_queries', 0)
+
+        with self._lock:
+            metrics = self._endpoints.get((request.method, rule))
+            if metrics is None:
+                metrics = self._endpoints[(request.method, rule)] = EndpointMetrics()
+            metrics.requests += 1
+            if status >= 500:
+                metrics.errors += 1
+            elif status >= 400:
+                metrics.client_errors += 1
+            metrics.latency.record(elapsed_us)
+            metrics.db_queries += queries
+            metrics.db_time += g.get('db_time', 0.0)
+            if queries > metrics.db_queries_max:
+                metrics.db_queries_max = queries
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context so a failed statement leaves nothing behind
+        context._metrics_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started_at', None)
+        # Background threads (mail, audit flusher) have no request to charge
+        if started is not None and has_request_context() and 'db_queries' in g:
+            g.db_queries += 1
+            g.db_time += time.perf_counter() - started
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = [dict(metrics.snapshot(), method=method, rule=rule)
+                         for (method, rule), metrics in self._endpoints.items()]
+        endpoints.sort(key=lambda e: (e['rule'], e['method']))
+        return {'uptime_s': round(time.time() - self.started_at, 1), 'endpoints': endpoints}
+
+    def render_text(self):
+        """Render the snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        def labels(endpoint, **extra):
+            pairs = dict(method=endpoint['method'], rule=endpoint['rule'], **extra)
+            return ','.join(f'{k}="{_escape(v)}"' for k, v in pairs.items())
+
+        endpoints = snapshot['endpoints']
+        family('http_requests_total', 'counter', 'Requests handled.',
+               [f'http_requests_total{{{labels(e)}}} {e["requests"]}' for e in endpoints])
+        family('http_request_errors_total', 'counter', 'Requests that ended with a 5xx status.',
+               [f'http_request_errors_total{{{labels(e)}}} {e["errors"]}' for e in endpoints])
+        family('http_request_client_errors_total', 'counter', 'Requests that ended with a 4xx status.',
+               [f'http_request_client_errors_total{{{labels(e)}}} {e["client_errors"]}' for e in endpoints])
+
+        samples = []
+        for e in endpoints:
+            for q in QUANTILES:
+                value = e['latency_ms'][f'p{int(q * 100)}']
+                samples.append(f'http_request_duration_ms{{{labels(e, quantile=str(q))}}} {value}')
+            samples.append(f'http_request_duration_ms_count{{{labels(e)}}} {e["requests"]}')
+            samples.append(f'http_request_duration_ms_sum{{{labels(e)}}} '
+                           f'{round(e["latency_ms"]["mean"] * e["requests"], 3)}')
+        family('http_request_duration_ms', 'summary', 'Request latency in milliseconds.', samples)
+
+        family('db_queries_total', 'counter', 'SQL statements executed while handling requests.',
+               [f'db_queries_total{{{labels(e)}}} {e["db"]["queries"]}' for e in endpoints])
+        family('db_query_time_ms_total', 'counter', 'Time spent in SQL statements, in milliseconds.',
+               [f'db_query_time_ms_total{{{labels(e)}}} {e["db"]["time_ms"]}' for e in endpoints])
+        family('process_uptime_seconds', 'gauge', 'Seconds since the metrics were reset.',
+               [f'process_uptime_seconds {snapshot["uptime_s"]}'])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
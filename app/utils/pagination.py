@@ -0,0 +1,82 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import Response, current_app, stream_with_context
+
+PageArgs = namedtuple('PageArgs', ['cursor', 'limit', 'fields'])
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def parse_page_args(args, allowed_fields):
+    """Read ``cursor``, ``limit`` and ``fields`` from the query string.
+
+    Raises ``ValueError`` with a client-facing message on bad input.
+    """
+    default_limit = current_app.config['API_PAGE_SIZE']
+    max_limit = current_app.config['API_MAX_PAGE_SIZE']
+    try:
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, max_limit)
+
+    cursor = args.get('cursor')
+    cursor = decode_cursor(cursor) if cursor else None
+
+    fields = args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    else:
+        fields = list(allowed_fields)
+
+    return PageArgs(cursor, limit, fields)
+
+
+def keyset_response(rows, limit, key, dump=None, encode=None):
+    """Stream ``{"items": [...], "next_cursor": ...}`` from an iterable of rows.
+
+    ``rows`` should yield up to ``limit + 1`` rows; the extra one only tells
+    us there is a next page. ``key(row)`` gives the values the cursor is built
+    from and ``dump(row)`` the JSON-ready item, or ``encode(row)`` its JSON
+    text directly (see ``app.utils.serializers``).
+    """
+    dumps = current_app.json.dumps
+    if encode is None:
+        encode = lambda row: dumps(dump(row), separators=(',', ':'))
+
+    def generate():
+        yield '{"items":['
+        last = None
+        has_more = False
+        for count, row in enumerate(rows):
+            if count == limit:
+                has_more = True
+                break
+            yield (',' if count else '') + encode(row)
+            last = row
+        next_cursor = encode_cursor(key(last)) if has_more else None
+        yield '],"next_cursor":' + dumps(next_cursor) + '}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
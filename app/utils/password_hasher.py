@@ -0,0 +1,144 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_MANY_CHUNK = 16
+
+
+class TooManyAttempts(Exception):
+    """Raised when one account already has its share of hash workers busy."""
+
+
+class HasherBusy(Exception):
+    """Raised when the hash pool has no answer within ``PASSWORD_HASH_TIMEOUT``.
+
+    Unlike ``TooManyAttempts`` this is server overload, not anything the
+    account did.
+    """
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords off the request thread.
+
+    The work runs in a process pool so a burst of logins can use every core
+    instead of queueing behind the GIL. ``PASSWORD_HASH_METHOD`` takes any
+    Werkzeug method string (``scrypt:32768:8:1``, ``pbkdf2:sha256:600000``);
+    hashes made with different parameters are reported by ``needs_rehash``.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._in_flight = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt')
+        app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('PASSWORD_HASH_PER_KEY_LIMIT', 2)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+
+        self.shutdown()
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.per_key_limit = app.config['PASSWORD_HASH_PER_KEY_LIMIT']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self._method_prefix = None
+        app.extensions['password_hasher'] = self
+
+    @property
+    def method_prefix(self):
+        # Werkzeug expands defaults ("scrypt" -> "scrypt:32768:8:1"), so ask it once
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: workers must not inherit the app's threads and sockets
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BrokenProcessPool:
+            self.shutdown()
+            return fn(*args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Pool đã bão hoà: bỏ yêu cầu còn đang chờ và báo quá tải thay vì lỗi 500
+            future.cancel()
+            raise HasherBusy()
+        except BrokenProcessPool:
+            self.shutdown()
+            return fn(*args)
+
+    @contextmanager
+    def _slot(self, key):
+        if key is None:
+            yield
+            return
+        key = key.lower()
+        with self._lock:
+            if self._in_flight.get(key, 0) >= self.per_key_limit:
+                raise TooManyAttempts(key)
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = self._in_flight[key] - 1
+                if remaining:
+                    self._in_flight[key] = remaining
+                else:
+                    del self._in_flight[key]
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        if not self.workers:
+            return [generate_password_hash(p, self.method) for p in passwords]
+        # Mỗi lượt 16 mật khẩu trên mỗi worker được cùng thời hạn như một lần hash()
+        rounds = math.ceil(len(passwords) / (HASH_MANY_CHUNK * self.workers)) or 1
+        try:
+            return list(self._get_pool().map(
+                generate_password_hash, passwords, [self.method] * len(passwords),
+                chunksize=HASH_MANY_CHUNK, timeout=self.timeout * rounds,
+            ))
+        except FutureTimeout:
+            # map() đã huỷ các phần chưa chạy
+            raise HasherBusy()
+        except BrokenProcessPool:
+            self.shutdown()
+            return [generate_password_hash(p, self.method) for p in passwords]
+
+    def verify(self, pwhash, password, key=None):
+        """Check ``password``; ``key`` (usually the email) caps concurrent checks per account."""
+        with self._slot(key):
+            return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.method_prefix
@@ -0,0 +1,204 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger('app.queries')
+
+_current = ContextVar('query_profile', default=None)
+
+RELATIONSHIP_OPTION = 'query_profiler_relationship'
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|%s))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def statement_shape(statement):
+    """Normalize a SQL statement so executions differing only by values group together."""
+    shape = _LITERALS.sub('?', statement)
+    shape = _IN_LISTS.sub('(?)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+class QueryProfile:
+    """Statements executed during one request (or one ``capture()`` block)."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = {}  # shape -> [count, time, relationship, lazy]
+
+    def record(self, statement, duration, relationship=None, lazy=False):
+        self.count += 1
+        self.total_time += duration
+        entry = self.shapes.get(statement)
+        if entry is None:
+            self.shapes[statement] = [1, duration, relationship, lazy]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+
+    def n_plus_one(self, threshold):
+        """Lazy relationship loads repeated ``threshold`` times or more, worst first."""
+        suspects = [
+            {'relationship': relationship, 'queries': count, 'time_ms': round(duration * 1000, 3)}
+            for count, duration, relationship, lazy in self.shapes.values()
+            if lazy and count >= threshold
+        ]
+        return sorted(suspects, key=lambda s: s['queries'], reverse=True)
+
+    def repeated(self, threshold):
+        """Statements that are not relationship loads but still ran ``threshold`` times or more."""
+        repeated = [
+            {'statement': shape, 'queries': count, 'time_ms': round(duration * 1000, 3)}
+            for shape, (count, duration, relationship, lazy) in self.shapes.items()
+            if not lazy and count >= threshold
+        ]
+        return sorted(repeated, key=lambda s: s['queries'], reverse=True)
+
+    def report(self, threshold):
+        return {
+            'name': self.name,
+            'queries': self.count,
+            'time_ms': round(self.total_time * 1000, 3),
+            'distinct_statements': len(self.shapes),
+            'n_plus_one': self.n_plus_one(threshold),
+            'repeated': self.repeated(threshold),
+        }
+
+
+class QueryProfiler:
+    """Debug mode that counts, times and groups SQL statements per request.
+
+    Lazy relationship loads are tagged with their relationship name (e.g.
+    ``User.orders``) so a statement shape repeated past the threshold is
+    reported as an N+1 on that relationship. With ``QUERY_PROFILER_STRICT``
+    a request over its budget in ``QUERY_BUDGETS`` (keyed by endpoint name,
+    e.g. ``user.get_users``) raises ``QueryBudgetExceeded``, which fails the
+    request under the test client. The report is built in ``after_request``,
+    so statements run later by a streamed body are not part of it.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=50)
+        self._installed = False
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_PROFILER_ENABLED', False)
+        app.config.setdefault('QUERY_PROFILER_STRICT', False)
+        app.config.setdefault('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+        app.config.setdefault('QUERY_PROFILER_DEFAULT_BUDGET', None)
+        app.config.setdefault('QUERY_BUDGETS', {})
+
+        app.extensions['query_profiler'] = self
+        self.enabled = app.config['QUERY_PROFILER_ENABLED'] or app.config['QUERY_PROFILER_STRICT']
+        if not self.enabled:
+            return
+
+        self.strict = app.config['QUERY_PROFILER_STRICT']
+        self.threshold = app.config['QUERY_PROFILER_N_PLUS_ONE_THRESHOLD']
+        self.default_budget = app.config['QUERY_PROFILER_DEFAULT_BUDGET']
+        self.budgets = dict(app.config['QUERY_BUDGETS'])
+
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+        app.teardown_request(self._teardown_request)
+
+        from app import db
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        if not self._installed:
+            event.listen(db.session, 'do_orm_execute', self._tag_relationship_load)
+            self._installed = True
+
+    @contextmanager
+    def capture(self, name=None):
+        """Profile the statements run inside the block, e.g. a serializer in a test."""
+        profile = QueryProfile(name)
+        token = _current.set(profile)
+        try:
+            yield profile
+        finally:
+            _current.reset(token)
+
+    def budget_for(self, endpoint):
+        return self.budgets.get(endpoint, self.default_budget)
+
+    def _tag_relationship_load(self, orm_execute_state):
+        if _current.get() is None or not orm_execute_state.is_relationship_load:
+            return
+        path = orm_execute_state.loader_strategy_path
+        prop = getattr(path, 'prop', None) if path is not None else None
+        orm_execute_state.update_execution_options(**{
+            RELATIONSHIP_OPTION: (str(prop) if prop is not None else None,
+                                  orm_execute_state.lazy_loaded_from is not None),
+        })
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            context._profiler_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        started = getattr(context, '_profiler_started_at', None)
+        if profile is None or started is None:
+            return
+        relationship, lazy = context.execution_options.get(RELATIONSHIP_OPTION, (None, False))
+        profile.record(statement_shape(statement), time.perf_counter() - started, relationship, lazy)
+
+    def _start_request(self):
+        g.query_profile_token = _current.set(QueryProfile(request.endpoint))
+
+    def _end_request(self, response):
+        profile = _current.get()
+        if profile is None:
+            return response
+        report = profile.report(self.threshold)
+        with self._lock:
+            self._recent.append(report)
+
+        response.headers['X-Query-Count'] = str(report['queries'])
+        response.headers['X-Query-Time-ms'] = str(report['time_ms'])
+        for suspect in report['n_plus_one']:
+            logger.warning(f"N+1 on {suspect['relationship']} in {profile.name}: "
+                           f"{suspect['queries']} queries, {suspect['time_ms']} ms")
+        for statement in report['repeated']:
+            logger.info(f"Statement repeated {statement['queries']} times in {profile.name}: "
+                        f"{statement['statement']}")
+
+        budget = self.budget_for(profile.name)
+        if budget is not None and report['queries'] > budget:
+            message = f"{profile.name} ran {report['queries']} queries, budget is {budget}"
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def _teardown_request(self, exc):
+        token = g.pop('query_profile_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    def stats(self):
+        with self._lock:
+            recent = list(self._recent)
+        return {'enabled': self.enabled, 'recent': recent}
@@ -0,0 +1,121 @@
+import hashlib
+import threading
+
+from flask import current_app, request
+from sqlalchemy import event, inspect
+
+from app.utils.cache import MISS, TTLCache
+
+STALE_KEY = 'response_cache_stale'
+ALL = object()
+
+
+class ResponseCache:
+    """Conditional GET and cached JSON bodies for single-resource reads.
+
+    A route passes the resource's current *version* (``version_id`` and
+    ``updated_at``, plus any counters the body shows) and a ``render``
+    callable. The version becomes a strong ETag: a matching
+    ``If-None-Match`` gets a 304 before anything is loaded or serialized,
+    otherwise the body comes from a per-process
+    TTL+LRU cache keyed by ``(resource, id)`` and is rendered only when the
+    cached ETag is out of date. Bodies of watched models are also dropped
+    after the commit that changed them, so memory is not spent on dead
+    versions. The ETag depends only on the version, so every worker process
+    agrees on it.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._bodies = TTLCache('response')
+        self._models = {}  # model class -> resource name
+        self._counters = {'requests': 0, 'not_modified': 0, 'rendered': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_TTL', 300)
+        app.config.setdefault('RESPONSE_CACHE_MAXSIZE', 4096)
+        self._bodies.init_app(app)
+        with self._lock:
+            self._counters = dict.fromkeys(self._counters, 0)
+        app.extensions['response_cache'] = self
+
+    def watch(self, session, resource, model):
+        """Drop cached ``resource`` bodies after commits that write ``model`` rows (same primary key)."""
+        first = not self._models
+        self._models[model] = resource
+        if not first:
+            return
+        event.listen(session, 'after_flush', self._after_flush)
+        event.listen(session, 'do_orm_execute', self._do_orm_execute)
+        event.listen(session, 'after_commit', self._after_commit)
+        event.listen(session, 'after_rollback', self._after_rollback)
+
+    def respond(self, resource, key, version, render):
+        """Return a 200 (cached or freshly rendered) or 304 response for one resource."""
+        etag = hashlib.sha1(repr((resource, key, version)).encode('utf-8')).hexdigest()
+        if request.if_none_match.contains(etag):
+            self._count('requests', 'not_modified')
+            response = current_app.response_class(status=304)
+        else:
+            entry = self._bodies.get((resource, key))
+            if entry is MISS or entry[0] != etag:
+                self._count('requests', 'rendered')
+                entry = (etag, current_app.json.response(render()).get_data())
+                self._bodies.set((resource, key), entry)
+            else:
+                self._count('requests')
+            response = current_app.response_class(entry[1], mimetype='application/json')
+        response.set_etag(etag)
+        # Dữ liệu theo người dùng: trình duyệt được giữ nhưng phải hỏi lại mỗi lần
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def _count(self, *names):
+        with self._lock:
+            for name in names:
+                self._counters[name] += 1
+
+    def _mark(self, session, value):
+        session.info.setdefault(STALE_KEY, set()).add(value)
+
+    def _after_flush(self, session, flush_context):
+        for objects in (session.new, session.dirty, session.deleted):
+            for obj in objects:
+                resource = self._models.get(type(obj))
+                if resource is not None:
+                    identity = inspect(obj).identity
+                    if identity is not None:
+                        self._mark(session, (resource, identity[0] if len(identity) == 1 else identity))
+
+    def _do_orm_execute(self, orm_execute_state):
+        # insert()/update()/delete() hàng loạt không đi qua flush: không biết id nào, xoá hết
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        if any(mapper.class_ in self._models for mapper in orm_execute_state.all_mappers):
+            self._mark(orm_execute_state.session, ALL)
+
+    def _after_commit(self, session):
+        stale = session.info.pop(STALE_KEY, None)
+        if not stale:
+            return
+        if ALL in stale:
+            self._bodies.invalidate()
+            return
+        for key in stale:
+            self._bodies.delete(key)
+
+    def _after_rollback(self, session):
+        session.info.pop(STALE_KEY, None)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        bodies = self._bodies.stats()
+        requests = counters['requests']
+        # 304 và body lấy từ cache đều là "không serialize"
+        served = requests - counters['rendered']
+        return dict(counters, cached_bodies=bodies['size'], maxsize=bodies['maxsize'], ttl=bodies['ttl'],
+                    invalidations=bodies['invalidations'],
+                    hit_rate=round(served / requests, 3) if requests else None)
@@ -0,0 +1,224 @@
+import hashlib
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationCache:
+    """Per-process cache in front of the token_blocklist table.
+
+    A bloom filter answers "definitely not revoked" without touching the DB,
+    a bounded LRU holds confirmed revocations, and the filter is kept current
+    by periodically pulling rows created since the last sync. Until the first
+    sync has finished the filter knows nothing, so checks go to the DB.
+
+    ``created_at`` is set when the row is flushed, which can be well before
+    it commits (the INSERT may wait on a lock), so each pull re-reads an
+    overlap window and a full reload every ``REVOCATION_FULL_SYNC_INTERVAL``
+    seconds catches rows that committed later than that.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REVOCATION_CACHE_ENABLED', True)
+        app.config.setdefault('REVOCATION_BLOOM_CAPACITY', 100000)
+        app.config.setdefault('REVOCATION_BLOOM_ERROR_RATE', 0.001)
+        app.config.setdefault('REVOCATION_LRU_SIZE', 10000)
+        app.config.setdefault('REVOCATION_SYNC_INTERVAL', 5)
+        # Ít nhất bằng thời gian một INSERT có thể chờ khoá ghi, cộng thêm biên
+        app.config.setdefault('REVOCATION_SYNC_OVERLAP',
+                              app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000 + 5)
+        app.config.setdefault('REVOCATION_FULL_SYNC_INTERVAL', 300)
+
+        self.enabled = app.config['REVOCATION_CACHE_ENABLED']
+        self.capacity = app.config['REVOCATION_BLOOM_CAPACITY']
+        self.error_rate = app.config['REVOCATION_BLOOM_ERROR_RATE']
+        self.lru_size = app.config['REVOCATION_LRU_SIZE']
+        self.sync_interval = app.config['REVOCATION_SYNC_INTERVAL']
+        self.sync_overlap = timedelta(seconds=app.config['REVOCATION_SYNC_OVERLAP'])
+        self.full_sync_interval = app.config['REVOCATION_FULL_SYNC_INTERVAL']
+        self.reset()
+        app.extensions['revocation_cache'] = self
+
+    def reset(self):
+        self._reset_filter()
+        with self._lock:
+            self._counters = {
+                'bloom_negatives': 0,
+                'lru_hits': 0,
+                'db_lookups': 0,
+                'false_positives': 0,
+                'syncs': 0,
+            }
+
+    def _reset_filter(self):
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._entries = 0
+            self._lru = OrderedDict()
+            self._watermark = None
+            self._last_sync = 0.0
+            # Lần pull đầu tiên đã là nạp toàn bộ
+            self._last_full_sync = time.monotonic()
+            self._ready = False
+            # Danh sách JTI thêm vào trong lúc dựng lại filter (None khi không dựng lại)
+            self._added_during_rebuild = None
+
+    def _remember(self, jti):
+        # Caller holds self._lock
+        if jti not in self._bloom:
+            self._bloom.add(jti)
+            self._entries += 1
+        self._lru[jti] = True
+        self._lru.move_to_end(jti)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def add(self, jti):
+        """Record a revocation made by this process without waiting for a sync."""
+        with self._lock:
+            self._remember(jti)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(jti)
+
+    def sync(self, force=False):
+        """Pull revocations created since the last sync into the filter."""
+        if not force and self._ready and time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        # Only one thread pays for the sync; the others keep using the current filter
+        # (or the DB, while there is no complete filter yet)
+        if not self._sync_lock.acquire(blocking=force):
+            return
+        try:
+            self._pull()
+            if self._entries > self.capacity:
+                self._rebuild(max(self.capacity, self._entries) * 2)
+            elif time.monotonic() - self._last_full_sync >= self.full_sync_interval:
+                # Lưới an toàn cho hàng commit trễ hơn cửa sổ overlap
+                self._rebuild(self.capacity)
+        finally:
+            self._sync_lock.release()
+
+    def _rebuild(self, capacity):
+        """Load every revocation into a larger filter, then swap it in.
+
+        The live filter keeps answering while the new one is built, so no
+        request ever sees a filter that is missing revocations. Also used as
+        the periodic full resync.
+        """
+        from app.models.user import TokenBlocklist
+
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            rows = (TokenBlocklist.query.with_entities(TokenBlocklist.jti, TokenBlocklist.created_at)
+                    .order_by(TokenBlocklist.created_at).all())
+            bloom = BloomFilter(capacity, self.error_rate)
+            entries = 0
+            for jti, _ in rows:
+                if jti not in bloom:
+                    bloom.add(jti)
+                    entries += 1
+            with self._lock:
+                for jti in itertools.chain(self._added_during_rebuild, self._lru):
+                    if jti not in bloom:
+                        bloom.add(jti)
+                        entries += 1
+                self._bloom = bloom
+                self._entries = entries
+                self.capacity = capacity
+                self._last_full_sync = time.monotonic()
+                if rows and (self._watermark is None or rows[-1].created_at > self._watermark):
+                    self._watermark = rows[-1].created_at
+        finally:
+            with self._lock:
+                self._added_during_rebuild = None
+
+    def _pull(self):
+        from app.models.user import TokenBlocklist
+
+        query = TokenBlocklist.query.with_entities(TokenBlocklist.jti, TokenBlocklist.created_at)
+        if self._watermark is not None:
+            query = query.filter(TokenBlocklist.created_at >= self._watermark - self.sync_overlap)
+        rows = query.order_by(TokenBlocklist.created_at).all()
+
+        with self._lock:
+            for jti, created_at in rows:
+                self._remember(jti)
+                if self._watermark is None or created_at > self._watermark:
+                    self._watermark = created_at
+            self._last_sync = time.monotonic()
+            self._ready = True
+            self._counters['syncs'] += 1
+
+    def is_revoked(self, jti, lookup):
+        """Check a JTI, calling ``lookup(jti)`` only when the cache can't decide."""
+        if not self.enabled:
+            return lookup(jti)
+
+        self.sync()
+        if not self._ready:
+            # Chưa sync xong lần đầu: filter rỗng không được phép trả lời "chưa bị thu hồi"
+            with self._lock:
+                self._counters['db_lookups'] += 1
+            return lookup(jti)
+        with self._lock:
+            if jti not in self._bloom:
+                self._counters['bloom_negatives'] += 1
+                return False
+            if jti in self._lru:
+                self._lru.move_to_end(jti)
+                self._counters['lru_hits'] += 1
+                return True
+            self._counters['db_lookups'] += 1
+
+        revoked = lookup(jti)
+        with self._lock:
+            if revoked:
+                self._remember(jti)
+            else:
+                self._counters['false_positives'] += 1
+        return revoked
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update(
+                hits=stats['bloom_negatives'] + stats['lru_hits'],
+                misses=stats['db_lookups'],
+                entries=self._entries,
+                capacity=self.capacity,
+                lru_size=len(self._lru),
+                bloom_bits=self._bloom.size,
+                bloom_hashes=self._bloom.hashes,
+            )
+        return stats
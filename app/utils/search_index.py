@@ -0,0 +1,352 @@
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from sqlalchemy import event, inspect, text
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'product_search'
+PENDING_KEY = 'search_index_pending'
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_WORDS = re.compile(r'\w+')
+_FTS_INSERT = text(f'INSERT INTO {TABLE} (rowid, name, description, category_id) '
+                   'VALUES (:id, :name, :description, :category_id)')
+
+
+def tokenize(value):
+    """Lowercase, strip diacritics and split into words, like FTS5's unicode61 tokenizer."""
+    if not value:
+        return []
+    value = unicodedata.normalize('NFKD', value.lower())
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return _WORDS.findall(value)
+
+
+def include_name(name, type_, parent_names):
+    """Keep the FTS5 table and its shadow tables out of Alembic autogenerate."""
+    return not (type_ == 'table' and name and name.startswith(TABLE))
+
+
+class Fts5Backend:
+    """Search backed by an SQLite FTS5 table whose rowid is the product id.
+
+    Rows are written on the same connection as the flush that changed the
+    product, so the index commits and rolls back with the data.
+    """
+
+    name = 'fts5'
+    transactional = True
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def available(engine):
+        if engine.dialect.name != 'sqlite':
+            return False
+        with engine.connect() as conn:
+            options = {row[0] for row in conn.exec_driver_sql('PRAGMA compile_options')}
+        return 'ENABLE_FTS5' in options
+
+    @staticmethod
+    def exists(engine):
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)
+            ).first() is not None
+
+    def create(self, conn):
+        """Create the FTS table if missing; returns True when it was created."""
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)
+        ).first()
+        if exists:
+            return False
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+            "name, description, category_id UNINDEXED, "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        # Tên sản phẩm quan trọng hơn mô tả khi xếp hạng (ORDER BY rank)
+        conn.exec_driver_sql(
+            f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('rank', 'bm25({NAME_WEIGHT}, {DESCRIPTION_WEIGHT})')"
+        )
+        return True
+
+    def write(self, conn, upserts, deletes):
+        ids = [{'id': product_id} for product_id in list(upserts) + list(deletes)]
+        if ids:
+            conn.execute(text(f'DELETE FROM {TABLE} WHERE rowid = :id'), ids)
+        if upserts:
+            conn.execute(_FTS_INSERT, [dict(values, id=product_id) for product_id, values in upserts.items()])
+
+    def rebuild(self, conn):
+        # Drop + create is much faster than deleting every row of a big index
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS {TABLE}')
+        self.create(conn)
+        conn.exec_driver_sql(
+            f'INSERT INTO {TABLE} (rowid, name, description, category_id) '
+            'SELECT id, name, description, category_id FROM products'
+        )
+        conn.exec_driver_sql(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        return conn.exec_driver_sql(f'SELECT count(*) FROM {TABLE}').scalar()
+
+    @staticmethod
+    def match_expression(terms):
+        # Mỗi từ là một tiền tố: "ao" khớp "áo", "aokhoac"...
+        return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+    def search(self, conn, terms, category_id, limit, offset):
+        params = {'match': self.match_expression(terms), 'limit': limit, 'offset': offset}
+        where = f'{TABLE} MATCH :match'
+        facet_rows = conn.execute(
+            text(f'SELECT category_id, count(*) FROM {TABLE} WHERE {where} GROUP BY category_id'),
+            params,
+        ).all()
+        if category_id is not None:
+            where += ' AND category_id = :category_id'
+            params['category_id'] = category_id
+        hits = conn.execute(
+            text(f'SELECT rowid, -rank FROM {TABLE} WHERE {where} ORDER BY rank LIMIT :limit OFFSET :offset'),
+            params,
+        ).all()
+        facets = {category: count for category, count in facet_rows}
+        total = facets.get(category_id, 0) if category_id is not None else sum(facets.values())
+        return [(row[0], row[1]) for row in hits], facets, total
+
+
+class InvertedIndexBackend:
+    """In-process inverted index, used when FTS5 is not available.
+
+    Changes are applied after the commit that made them, so each process
+    only sees its own writes until the next rebuild.
+    """
+
+    name = 'memory'
+    transactional = False
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._postings = {}  # token -> {product_id: weighted term frequency}
+        self._docs = {}  # product_id -> (tokens, category_id)
+        self._sorted_tokens = None
+        self.built = False
+
+    def write(self, conn, upserts, deletes):
+        with self._lock:
+            for product_id in list(upserts) + list(deletes):
+                self._remove(product_id)
+            for product_id, values in upserts.items():
+                self._add(product_id, values['name'], values['description'], values['category_id'])
+
+    def _add(self, product_id, name, description, category_id):
+        weights = Counter()
+        for token in tokenize(name):
+            weights[token] += NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._sorted_tokens = None
+            postings[product_id] = weight
+        self._docs[product_id] = (tuple(weights), category_id)
+
+    def _remove(self, product_id):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for token in doc[0]:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+                    self._sorted_tokens = None
+
+    def rebuild(self, conn):
+        from app.models.product import Product
+
+        stmt = self.db.select(Product.id, Product.name, Product.description, Product.category_id)
+        rows = conn.execute(stmt.execution_options(yield_per=5000))
+        with self._lock:
+            self._postings = {}
+            self._docs = {}
+            self._sorted_tokens = None
+            for product_id, name, description, category_id in rows:
+                self._add(product_id, name, description, category_id)
+            self.built = True
+            return len(self._docs)
+
+    def _expand(self, term):
+        """Tokens starting with ``term``."""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        tokens = self._sorted_tokens
+        start = bisect_left(tokens, term)
+        end = start
+        while end < len(tokens) and tokens[end].startswith(term):
+            end += 1
+        return tokens[start:end]
+
+    def search(self, conn, terms, category_id, limit, offset):
+        with self._lock:
+            total_docs = len(self._docs) or 1
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for token in self._expand(term):
+                    postings = self._postings[token]
+                    idf = math.log(1 + total_docs / len(postings))
+                    for product_id, weight in postings.items():
+                        term_scores[product_id] = term_scores.get(product_id, 0.0) + weight * idf
+                if scores is None:
+                    scores = term_scores
+                else:
+                    # Mọi từ đều phải khớp (AND)
+                    scores = {pid: score + term_scores[pid] for pid, score in scores.items() if pid in term_scores}
+                if not scores:
+                    break
+            scores = scores or {}
+            facets = Counter(self._docs[pid][1] for pid in scores)
+            if category_id is not None:
+                scores = {pid: score for pid, score in scores.items() if self._docs[pid][1] == category_id}
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit], dict(facets), len(ranked)
+
+
+class SearchIndex:
+    """Product full-text search kept in sync with ``Product`` by ORM events.
+
+    ``SEARCH_BACKEND`` picks ``fts5``, ``memory`` or ``auto`` (FTS5 when the
+    SQLite build has it). The FTS5 table is created by a migration (or by
+    ``rebuild``), never at app start; until it exists the in-process index
+    is used. Bulk ``insert()``/``update()`` statements bypass the events;
+    run ``flask search rebuild`` after loading data that way.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._wants_fts5 = False
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_BACKEND', 'auto')
+        choice = app.config['SEARCH_BACKEND']
+        if choice not in ('auto', 'fts5', 'memory'):
+            raise ValueError(f'Unknown SEARCH_BACKEND: {choice}')
+
+        from app import db
+        self.app = app
+        with app.app_context():
+            engine = db.engine
+            # Chỉ đọc schema: bảng FTS5 do migration hoặc "flask search rebuild" tạo
+            self._wants_fts5 = choice == 'fts5' or (choice == 'auto' and Fts5Backend.available(engine))
+            if self._wants_fts5 and Fts5Backend.exists(engine):
+                self.backend = Fts5Backend(db)
+            else:
+                if self._wants_fts5:
+                    logger.warning(f'Search table {TABLE} does not exist, using the in-process index; '
+                                   'run "flask db upgrade" or "flask search rebuild" to create it')
+                self.backend = InvertedIndexBackend(db)
+        app.extensions['search_index'] = self
+
+        if not self._listening:
+            event.listen(db.session, 'after_flush', self._after_flush)
+            event.listen(db.session, 'after_commit', self._after_commit)
+            event.listen(db.session, 'after_rollback', self._after_rollback)
+            self._listening = True
+
+    def _after_flush(self, session, flush_context):
+        from app.models.product import Product
+
+        upserts = {}
+        deletes = set()
+        for obj in session.new:
+            if isinstance(obj, Product):
+                upserts[obj.id] = self._values(obj)
+        for obj in session.dirty:
+            if isinstance(obj, Product) and self._indexed_fields_changed(obj):
+                upserts[obj.id] = self._values(obj)
+        for obj in session.deleted:
+            if isinstance(obj, Product):
+                deletes.add(obj.id)
+        if not upserts and not deletes:
+            return
+
+        if self.backend.transactional:
+            self.backend.write(session.connection(), upserts, deletes)
+        else:
+            pending_upserts, pending_deletes = session.info.setdefault(PENDING_KEY, ({}, set()))
+            # Thay đổi sau cùng trong transaction thắng
+            for product_id in deletes:
+                pending_upserts.pop(product_id, None)
+            pending_deletes.difference_update(upserts)
+            pending_upserts.update(upserts)
+            pending_deletes.update(deletes)
+
+    @staticmethod
+    def _indexed_fields_changed(product):
+        attrs = inspect(product).attrs
+        return any(attrs[key].history.has_changes() for key in ('name', 'description', 'category_id'))
+
+    @staticmethod
+    def _values(product):
+        return {'name': product.name, 'description': product.description, 'category_id': product.category_id}
+
+    def _after_commit(self, session):
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending and self.backend.built:
+            self.backend.write(None, *pending)
+
+    def _after_rollback(self, session):
+        session.info.pop(PENDING_KEY, None)
+
+    def rebuild(self):
+        """Re-index every product; returns the number of products indexed.
+
+        With FTS5 configured this (re)creates the FTS5 table and switches
+        this process over to it.
+        """
+        from app import db
+
+        if self._wants_fts5 and not isinstance(self.backend, Fts5Backend):
+            self.backend = Fts5Backend(db)
+        with db.engine.begin() as conn:
+            count = self.backend.rebuild(conn)
+        logger.info(f'Search index ({self.backend.name}) rebuilt with {count} product(s)')
+        return count
+
+    def search(self, query, category_id=None, limit=20, offset=0):
+        """Rank products matching every word of ``query`` (as a prefix).
+
+        Returns ``(hits, facets, total)``: ``[(product_id, score)]`` for the
+        requested page, product counts per category for the whole match
+        (before the category filter) and the number of matches.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return [], {}, 0
+        if not self.backend.transactional and not self.backend.built:
+            self.rebuild()
+
+        from app import db
+        return self.backend.search(db.session.connection(), terms, category_id, limit, offset)
+
+    def stats(self):
+        stats = {'backend': self.backend.name if self.backend else None}
+        if isinstance(self.backend, InvertedIndexBackend):
+            stats.update(built=self.backend.built, documents=len(self.backend._docs),
+                         tokens=len(self.backend._postings))
+        return stats
@@ -0,0 +1,93 @@
+import functools
+import json
+import math
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from marshmallow import fields
+
+# Các kiểu field biên dịch được (đúng kiểu, không tính lớp con); field khác dùng lại marshmallow
+_COMPILABLE = (fields.Integer, fields.Float, fields.String, fields.Email, fields.DateTime, fields.Boolean)
+
+
+def _encode_float(value):
+    # json.dumps dùng float.__repr__, trừ NaN/Infinity
+    return repr(value) if math.isfinite(value) else json.dumps(value)
+
+
+def _compilable(name, field):
+    if type(field) not in _COMPILABLE or '.' in (field.attribute or name):
+        return False
+    if isinstance(field, fields.Number) and field.as_string:
+        return False
+    if isinstance(field, fields.DateTime) and field.format not in (None, 'iso'):
+        return False
+    return True
+
+
+def _value_expression(field, source, encode_str):
+    """Python expression producing the JSON text of ``field`` read from ``source``."""
+    if isinstance(field, fields.Boolean):
+        value = f"('true' if {source} else 'false')"
+    elif isinstance(field, fields.Integer):
+        value = f'str(int({source}))'
+    elif isinstance(field, fields.Float):
+        value = f'_encode_float(float({source}))'
+    elif isinstance(field, fields.DateTime):
+        value = f'{encode_str}({source}.isoformat())'
+    else:
+        value = f'{encode_str}(str({source}))'
+    return f"('null' if {source} is None else {value})"
+
+
+@functools.lru_cache(maxsize=128)
+def compile_serializer(schema_class, only, sort_keys=True, ensure_ascii=True):
+    """Build ``row -> JSON text`` for ``schema_class(only=only)``.
+
+    The generated function reads attributes straight off ``Row`` tuples or
+    ORM objects and returns exactly what ``json.dumps(schema.dump(row),
+    separators=(',', ':'), sort_keys=..., ensure_ascii=...)`` would, without
+    marshmallow's per-field dispatch or the intermediate dict. Schemas with
+    other field types, and rows missing one of the columns, take that
+    slower path instead.
+    """
+    schema = schema_class(only=only)
+
+    def slow(row):
+        return json.dumps(schema.dump(row), separators=(',', ':'), sort_keys=sort_keys, ensure_ascii=ensure_ascii)
+
+    dump_fields = schema.dump_fields
+    if not dump_fields or not all(_compilable(name, field) for name, field in dump_fields.items()):
+        return slow
+
+    items = [(field.data_key or name, field.attribute or name, field) for name, field in dump_fields.items()]
+    if sort_keys:
+        items.sort(key=lambda item: item[0])
+    encode_str = 'encode_basestring_ascii' if ensure_ascii else 'encode_basestring'
+    reads = '; '.join(f'v{i} = row.{attribute}' for i, (_, attribute, _) in enumerate(items))
+    pieces = []
+    for i, (key, _, field) in enumerate(items):
+        prefix = ('{' if i == 0 else ',') + json.dumps(key, ensure_ascii=ensure_ascii) + ':'
+        pieces.append(f'{prefix!r} + {_value_expression(field, f"v{i}", encode_str)}')
+    source = '\n'.join([
+        'def serialize(row):',
+        '    try:',
+        f'        {reads}',
+        '    except AttributeError:',
+        '        return slow(row)',
+        f"    return {' + '.join(pieces)} + '}}'",
+    ])
+    namespace = {
+        'slow': slow, '_encode_float': _encode_float,
+        'encode_basestring': encode_basestring, 'encode_basestring_ascii': encode_basestring_ascii,
+    }
+    exec(compile(source, f'<serializer {schema_class.__name__}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+def serializer_for(schema_class, only):
+    """``compile_serializer`` with the current app's JSON provider settings."""
+    from flask import current_app
+
+    provider = current_app.json
+    return compile_serializer(schema_class, tuple(only), getattr(provider, 'sort_keys', True),
+                              getattr(provider, 'ensure_ascii', True))
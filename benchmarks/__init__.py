@@ -0,0 +1 @@
+"""Standalone performance benchmarks; run them with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,106 @@
+"""Measure checkout latency and SQL statement count against cart size.
+
+    python -m benchmarks.checkout_bench --sizes 1,10,50,100,200
+
+Builds a throwaway SQLite database with enough products and stock, then for
+each cart size fills the cart (untimed) and times ``OrderService.checkout``.
+The statement count should stay flat as the cart grows; latency grows only
+with the bulk insert and the row count of the single stock UPDATE.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from config import Config
+
+
+def seed(db, products):
+    from app.models.product import Inventory, Product
+    from app.models.user import User
+
+    with db.engine.begin() as conn:
+        conn.execute(db.insert(User), [{'id': 1, 'username': 'bench', 'email': 'bench@example.com',
+                                        'password': '!', 'address': '1 Bench Street'}])
+        conn.execute(db.insert(Inventory), [{'id': i, 'quantity': 10 ** 9} for i in range(1, products + 1)])
+        conn.execute(db.insert(Product), [
+            {'id': i, 'name': f'product {i}', 'price': round(1 + i * 0.37, 2), 'inventory_id': i}
+            for i in range(1, products + 1)
+        ])
+
+
+def run(args, path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        METRICS_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+        QUERY_PROFILER_ENABLED = True
+        LOG_LEVEL = 'WARNING'
+
+    from app import create_app, db, query_profiler
+    from app.services.cart_service import CartService
+    from app.services.order_service import OrderService
+
+    app = create_app(BenchConfig)
+    rng = random.Random(args.seed)
+    checkout = {'shipping_method': 'standard', 'payment_method': 'cod'}
+    results = []
+    with app.app_context():
+        db.create_all()
+        seed(db, max(args.sizes))
+        for size in args.sizes:
+            samples = []
+            statements = None
+            for iteration in range(args.warmup + args.iterations):
+                product_ids = rng.sample(range(1, max(args.sizes) + 1), size)
+                CartService.set_items(1, [{'product_id': pid, 'quantity': rng.randint(1, 3)} for pid in product_ids])
+                with query_profiler.capture() as profile:
+                    started = time.perf_counter()
+                    OrderService.checkout(1, checkout)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if iteration >= args.warmup:
+                    samples.append(elapsed)
+                    statements = profile.count
+            samples.sort()
+            results.append({
+                'cart_size': size,
+                'statements': statements,
+                'p50_ms': round(statistics.median(samples), 3),
+                'p95_ms': round(samples[max(int(len(samples) * 0.95) - 1, 0)], 3),
+                'mean_ms': round(statistics.fmean(samples), 3),
+                'ms_per_item': round(statistics.median(samples) / size, 3),
+            })
+    return {'iterations': args.iterations, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=lambda value: [int(v) for v in value.split(',')],
+                        default=[1, 10, 50, 100, 200], help='Comma-separated cart sizes')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='checkout-bench-')
+    try:
+        result = run(args, os.path.join(workdir, 'bench.db'))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'items':>6}{'stmts':>7}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'ms/item':>10}")
+        for row in result['results']:
+            print(f"{row['cart_size']:>6}{row['statements']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+                  f"{row['mean_ms']:>10}{row['ms_per_item']:>10}")
+
+
+if __name__ == '__main__':
+    main()
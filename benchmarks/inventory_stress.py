@@ -0,0 +1,249 @@
+"""Hammer the reservation engine with concurrent checkouts and check for oversell.
+
+    python -m benchmarks.inventory_stress --threads 200 --processes 2
+
+Seeds a throwaway SQLite (WAL) database with a few hot products, then every
+worker thread repeatedly reserves 1-N random SKUs and confirms (or releases,
+or abandons) the reservation. Afterwards each SKU must balance:
+
+    initial stock == stock left + units sold + units still reserved
+
+and stock must never be negative. ``--naive`` runs the same load through a
+read-modify-write decrement instead, to show what the check catches.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+
+
+def make_config(path, args):
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        DB_PROFILE = 'sqlite'
+        DB_POOL_SIZE = args.threads
+        DB_MAX_OVERFLOW = 0
+        DB_POOL_TIMEOUT = 60
+        SQLITE_BUSY_TIMEOUT_MS = 60000
+        METRICS_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+        INVENTORY_RESERVATION_TTL = args.ttl
+        LOG_LEVEL = 'WARNING'
+    return StressConfig
+
+
+def seed(db, products, stock):
+    from app.models.product import Inventory, Product
+
+    with db.engine.begin() as conn:
+        conn.execute(db.insert(Inventory), [{'id': i, 'quantity': stock} for i in range(1, products + 1)])
+        conn.execute(db.insert(Product), [
+            {'id': i, 'name': f'hot item {i}', 'price': 9.99, 'inventory_id': i} for i in range(1, products + 1)
+        ])
+
+
+def naive_checkout(db, items):
+    """The read-modify-write this engine replaces: read stock, check it, write it back."""
+    from app.models.product import Inventory, Product
+    from app.services.inventory_service import InsufficientStock
+
+    for product_id, quantity in items.items():
+        inventory_id = db.session.scalar(db.select(Product.inventory_id).where(Product.id == product_id))
+        available = db.session.scalar(db.select(Inventory.quantity).where(Inventory.id == inventory_id))
+        if available < quantity:
+            db.session.rollback()
+            raise InsufficientStock({product_id: available})
+        db.session.execute(db.update(Inventory).where(Inventory.id == inventory_id)
+                           .values(quantity=available - quantity))
+    db.session.commit()
+
+
+def worker(app, args, seed_value, totals, lock):
+    from app import db
+    from app.services.inventory_service import InsufficientStock, InventoryService, ReservationExpired
+
+    rng = random.Random(seed_value)
+    stats = Counter()
+    sold = Counter()
+    with app.app_context():
+        for _ in range(args.checkouts):
+            items = {rng.randint(1, args.products): rng.randint(1, args.max_quantity)
+                     for _ in range(rng.randint(1, args.max_items))}
+            try:
+                if args.naive:
+                    naive_checkout(db, items)
+                    sold.update(items)
+                    stats['confirmed'] += 1
+                    continue
+                reservation = InventoryService.reserve(items)
+                roll = rng.random()
+                if roll < args.confirm_rate:
+                    # confirm() reports what it actually took: part of a slow
+                    # reservation may already have expired back to stock
+                    sold.update(InventoryService.confirm(reservation['key']))
+                    stats['confirmed'] += 1
+                elif roll < args.confirm_rate + args.abandon_rate:
+                    stats['abandoned'] += 1  # left to expire
+                else:
+                    InventoryService.release(reservation['key'])
+                    stats['released'] += 1
+            except InsufficientStock:
+                stats['sold_out'] += 1
+            except ReservationExpired:
+                stats['expired_before_confirm'] += 1
+            except OperationalError:
+                db.session.rollback()
+                stats['db_busy'] += 1
+            except Exception as e:
+                db.session.rollback()
+                stats[f'error: {type(e).__name__}'] += 1
+    with lock:
+        totals['stats'].update(stats)
+        totals['sold'].update(sold)
+
+
+def run_process(path, args, process_index, results):
+    from app import create_app
+
+    app = create_app(make_config(path, args))
+    totals = {'stats': Counter(), 'sold': Counter()}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(app, args, args.seed * 100000 + process_index * 1000 + i, totals, lock))
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if results is None:
+        return totals
+    results.put(totals)
+
+
+def verify(db, args, sold):
+    from app.models.product import Inventory, StockReservation
+
+    left = dict(db.session.execute(db.select(Inventory.id, Inventory.quantity)).all())
+    held = dict(db.session.execute(
+        db.select(StockReservation.inventory_id, db.func.sum(StockReservation.quantity))
+        .group_by(StockReservation.inventory_id)
+    ).all())
+    problems = []
+    for inventory_id in range(1, args.products + 1):
+        quantity = left[inventory_id]
+        accounted = quantity + sold.get(inventory_id, 0) + held.get(inventory_id, 0)
+        if quantity < 0:
+            problems.append(f'SKU {inventory_id}: stock went negative ({quantity})')
+        if accounted != args.stock:
+            problems.append(f'SKU {inventory_id}: {args.stock} in stock but {accounted} accounted for '
+                            f'(left {quantity}, sold {sold.get(inventory_id, 0)}, held {held.get(inventory_id, 0)})')
+    return problems
+
+
+def run(args, path):
+    from app import create_app, db
+    from app.services.inventory_service import InventoryService
+
+    app = create_app(make_config(path, args))
+    with app.app_context():
+        db.create_all()
+        seed(db, args.products, args.stock)
+        db.engine.dispose()
+
+    started = time.perf_counter()
+    if args.processes == 1:
+        totals = run_process(path, args, 0, None)
+    else:
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=run_process, args=(path, args, i, results))
+                     for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        totals = {'stats': Counter(), 'sold': Counter()}
+        for _ in processes:
+            part = results.get()
+            totals['stats'].update(part['stats'])
+            totals['sold'].update(part['sold'])
+        for process in processes:
+            process.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.engine.dispose()
+        # Product ids map 1:1 to inventory ids in the seed data
+        problems = verify(db, args, totals['sold'])
+        # Hết TTL thì mọi hàng bị giữ phải quay về kho
+        time.sleep(args.ttl)
+        released = InventoryService.release_expired()
+        problems += verify(db, args, totals['sold'])
+
+    checkouts = args.threads * args.processes * args.checkouts
+    return {
+        'mode': 'naive' if args.naive else 'reservation',
+        'workers': args.threads * args.processes,
+        'checkouts': checkouts,
+        'seconds': round(elapsed, 2),
+        'checkouts_per_second': round(checkouts / elapsed, 1),
+        'outcomes': dict(sorted(totals['stats'].items())),
+        'units_sold': sum(totals['sold'].values()),
+        'expired_units_released': released,
+        'problems': problems,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=200, help='Worker threads per process')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--checkouts', type=int, default=10, help='Checkouts per thread')
+    parser.add_argument('--products', type=int, default=10)
+    parser.add_argument('--stock', type=int, default=500, help='Initial units per product')
+    parser.add_argument('--max-items', type=int, default=3, help='Max distinct SKUs per checkout')
+    parser.add_argument('--max-quantity', type=int, default=3)
+    parser.add_argument('--confirm-rate', type=float, default=0.7)
+    parser.add_argument('--abandon-rate', type=float, default=0.1)
+    parser.add_argument('--ttl', type=int, default=2, help='Reservation TTL in seconds')
+    parser.add_argument('--naive', action='store_true', help='Use read-modify-write instead of reservations')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='inventory-stress-')
+    try:
+        result = run(args, os.path.join(workdir, 'stress.db'))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['checkouts']} checkouts by {result['workers']} workers in {result['seconds']}s "
+              f"({result['checkouts_per_second']}/s), mode: {result['mode']}")
+        for name, count in result['outcomes'].items():
+            print(f'  {name:24}{count}')
+        print(f"  {'units sold':24}{result['units_sold']}")
+        print(f"  {'expired units released':24}{result['expired_units_released']}")
+        if result['problems']:
+            print(f"OVERSELL / ACCOUNTING ERRORS ({len(result['problems'])}):")
+            for problem in result['problems'][:20]:
+                print(f'  {problem}')
+        else:
+            print('OK: no oversell, every unit accounted for')
+    return 1 if result['problems'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""Load-test the API hot paths and compare the result against a baseline.
+
+    python -m benchmarks.load_bench --users 2000 --concurrency 16 --requests 2000
+    python -m benchmarks.load_bench --save-baseline baseline.json
+    python -m benchmarks.load_bench --baseline baseline.json --tolerance 0.2
+
+Seeds a throwaway SQLite database with synthetic users, logs, products,
+reviews and orders (bulk inserts, nothing touches the configured app
+database), then drives each endpoint with ``--concurrency`` threads, either
+through the Flask test client or over HTTP against a local threaded server
+(``--driver http``), and reports throughput and latency percentiles per
+endpoint. Every authenticated request also goes through the JWT revocation
+check, with ``--revoked`` tokens already in the blocklist.
+
+With ``--baseline`` each endpoint is compared against a stored report: an
+endpoint regresses when its throughput drops, or its p95 grows, by more than
+``--tolerance``; the exit status is then 1. Baselines are only comparable
+on the same machine with the same arguments, so save one per CI runner.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config import Config
+
+PASSWORD = 'bench-password'
+CHUNK = 5000
+
+
+def chunks(rows, size=CHUNK):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def seed(db, args, rng, password_hash):
+    from app.models.order import Order, OrderItem
+    from app.models.product import Category, Inventory, Product, Review
+    from app.models.user import Log, TokenBlocklist, User
+
+    start = datetime(2024, 1, 1)
+    categories = max(1, args.products // 100)
+    tables = [
+        (User, ({'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password': password_hash,
+                 'role': 'admin' if i == 1 else 'user', 'address': f'{i} Bench Street',
+                 'created_at': start + timedelta(seconds=i)} for i in range(1, args.users + 1))),
+        (Log, ({'user_id': rng.randint(1, args.users), 'action': 'User updated', 'details': None,
+                'timestamp': start + timedelta(seconds=i)} for i in range(args.users * args.logs_per_user))),
+        (TokenBlocklist, ({'jti': str(uuid.UUID(int=rng.getrandbits(128))),
+                           'expires_at': datetime.utcnow() + timedelta(hours=1)} for _ in range(args.revoked))),
+        (Category, ({'id': i, 'name': f'Category {i}'} for i in range(1, categories + 1))),
+        (Inventory, ({'id': i, 'quantity': 1000} for i in range(1, args.products + 1))),
+        (Product, ({'id': i, 'name': f'Product {i}', 'description': f'Synthetic product {i}',
+                    'price': round(rng.uniform(1, 500), 2), 'category_id': rng.randint(1, categories),
+                    'inventory_id': i, 'created_at': start + timedelta(seconds=i)}
+                   for i in range(1, args.products + 1))),
+        (Review, ({'user_id': rng.randint(1, args.users), 'product_id': rng.randint(1, args.products),
+                   'rating': rng.randint(1, 5), 'comment': 'ok', 'created_at': start + timedelta(seconds=i)}
+                  for i in range(args.reviews))),
+        (Order, ({'id': i, 'user_id': rng.randint(1, args.users), 'total_price': round(rng.uniform(5, 900), 2),
+                  'status': 'paid', 'created_at': start + timedelta(seconds=i)} for i in range(1, args.orders + 1))),
+        (OrderItem, ({'order_id': order_id, 'product_id': rng.randint(1, args.products),
+                      'quantity': rng.randint(1, 3), 'price': round(rng.uniform(1, 300), 2)}
+                     for order_id in range(1, args.orders + 1) for _ in range(rng.randint(1, 3)))),
+    ]
+    with db.engine.begin() as conn:
+        for model, rows in tables:
+            for batch in chunks(rows):
+                conn.execute(db.insert(model), batch)
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput_rps': round(len(ordered) / elapsed, 1),
+        'mean_ms': ms(statistics.fmean(ordered)),
+        'p50_ms': ms(percentile(ordered, 0.50)),
+        'p90_ms': ms(percentile(ordered, 0.90)),
+        'p95_ms': ms(percentile(ordered, 0.95)),
+        'p99_ms': ms(percentile(ordered, 0.99)),
+        'max_ms': ms(ordered[-1]),
+    }
+
+
+class ClientDriver:
+    """One Flask test client per worker thread; no sockets involved."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = client.open(path, method=method, headers=headers, json=body)
+        response.close()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class HTTPDriver:
+    """A threaded Werkzeug server on a free local port, one keep-alive connection per worker."""
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                # Server đóng kết nối keep-alive: mở lại và thử một lần nữa
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        self.server.shutdown()
+
+
+def scenarios(args, tokens):
+    """``name -> (request count, builder)``; a builder returns ``(method, path, token, body)``."""
+    logins = itertools.count()
+    admin_token = tokens[1]
+    user_ids = list(tokens)
+
+    def login(rng):
+        # Mỗi lần một user khác: PASSWORD_HASH_PER_KEY_LIMIT giới hạn số lần băm song song mỗi tài khoản
+        user_id = next(logins) % args.users + 1
+        return 'POST', '/api/login', None, {'email': f'user{user_id}@example.com', 'password': PASSWORD}
+
+    def own(path):
+        def build(rng):
+            user_id = rng.choice(user_ids)
+            return 'GET', path.format(user_id=user_id), tokens[user_id], None
+        return build
+
+    return {
+        'login': (args.login_requests, login),
+        'me': (args.requests, own('/api/me')),
+        'user': (args.requests, lambda rng: ('GET', f'/api/users/{rng.randint(1, args.users)}', admin_token, None)),
+        'users': (args.requests, lambda rng: ('GET', '/api/users?limit=50', admin_token, None)),
+        'user_logs': (args.requests, own('/api/users/{user_id}/logs?limit=50')),
+        'products': (args.requests, lambda rng: (
+            'GET', f'/api/products?category_id={rng.randint(1, max(1, args.products // 100))}', None, None)),
+        'product': (args.requests, lambda rng: ('GET', f'/api/products/{rng.randint(1, args.products)}', None, None)),
+        'reviews': (args.requests, lambda rng: (
+            'GET', f'/api/products/{rng.randint(1, args.products)}/reviews?limit=20', None, None)),
+        'orders': (args.requests, own('/api/orders?limit=20')),
+        'order_stats': (args.requests, own('/api/orders/stats')),
+    }
+
+
+def drive(driver, count, build, concurrency, warmup, seed_value):
+    rng = random.Random(seed_value)
+    calls = [build(rng) for _ in range(count + warmup)]
+    for method, path, token, body in calls[:warmup]:
+        driver.request(method, path, token, body)
+
+    def one(call):
+        method, path, token, body = call
+        started = time.perf_counter()
+        try:
+            status = driver.request(method, path, token, body)
+        except Exception:
+            status = None
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, calls[warmup:]))
+    elapsed = time.perf_counter() - started
+    errors = sum(1 for _, status in outcomes if status != 200)
+    return summarize([latency for latency, _ in outcomes], errors, elapsed)
+
+
+def run(args, path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        METRICS_ENABLED = False
+        LOG_LEVEL = 'WARNING'
+
+    from flask_jwt_extended import create_access_token
+    from werkzeug.security import generate_password_hash
+
+    from app import create_app, db, password_hasher
+    from app.services.order_service import OrderService
+    from app.services.review_service import ReviewService
+
+    app = create_app(BenchConfig)
+    # Access log vẫn được ghi (đó là một phần chi phí của request), chỉ không in ra terminal
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        # Một hash dùng chung cho mọi user: băm từng cái sẽ chiếm hết thời gian seed
+        seed(db, args, rng, generate_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD']))
+        OrderService.reconcile_stats()
+        ReviewService.reconcile_ratings()
+        seed_seconds = time.perf_counter() - started
+        tokens = {user_id: create_access_token(identity=user_id, additional_claims={'username': f'user{user_id}'})
+                  for user_id in range(1, min(args.users, 100) + 1)}
+
+    selected = scenarios(args, tokens)
+    names = args.endpoints or list(selected)
+    unknown = set(names) - set(selected)
+    if unknown:
+        raise SystemExit(f"unknown endpoint(s): {', '.join(sorted(unknown))}; choose from {', '.join(selected)}")
+
+    driver = HTTPDriver(app) if args.driver == 'http' else ClientDriver(app)
+    endpoints = {}
+    try:
+        for offset, name in enumerate(names):
+            count, build = selected[name]
+            endpoints[name] = drive(driver, count, build, args.concurrency, args.warmup, args.seed + offset)
+    finally:
+        driver.close()
+        password_hasher.shutdown()
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parameters': {
+            'driver': args.driver, 'concurrency': args.concurrency, 'requests': args.requests,
+            'login_requests': args.login_requests, 'warmup': args.warmup, 'seed': args.seed,
+            'users': args.users, 'logs_per_user': args.logs_per_user, 'products': args.products,
+            'reviews': args.reviews, 'orders': args.orders, 'revoked': args.revoked,
+        },
+        'seed_seconds': round(seed_seconds, 2),
+        'endpoints': endpoints,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Per-endpoint change against ``baseline``; ``regressed`` marks the ones outside ``tolerance``."""
+    if baseline.get('parameters') != result['parameters']:
+        print('warning: baseline was recorded with different parameters', file=sys.stderr)
+    comparison = {}
+    for name, current in result['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        throughput = current['throughput_rps'] / previous['throughput_rps'] - 1
+        p95 = current['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0.0
+        comparison[name] = {
+            'throughput_change': round(throughput, 3),
+            'p95_change': round(p95, 3),
+            'regressed': throughput < -tolerance or p95 > tolerance or current['errors'] > previous['errors'],
+        }
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--driver', choices=['client', 'http'], default='client',
+                        help='Flask test client, or real HTTP against a local threaded server')
+    parser.add_argument('--concurrency', type=int, default=8, help='Worker threads issuing requests')
+    parser.add_argument('--requests', type=int, default=1000, help='Timed requests per endpoint')
+    parser.add_argument('--login-requests', type=int, default=100,
+                        help='Timed requests for /login (each one hashes a password)')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per endpoint first')
+    parser.add_argument('--endpoints', type=lambda value: value.split(','), default=None,
+                        help='Comma-separated subset of endpoints to run')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--logs-per-user', type=int, default=5)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--revoked', type=int, default=1000, help='Revoked tokens already in the blocklist')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', type=argparse.FileType('r'), help='Compare against this saved report')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative throughput drop / p95 increase before an endpoint regresses')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write the report to PATH')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='load-bench-')
+    try:
+        result = run(args, os.path.join(workdir, 'bench.db'))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    comparison = None
+    if args.baseline:
+        comparison = compare(result, json.load(args.baseline), args.tolerance)
+        result['comparison'] = comparison
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as target:
+            json.dump(result, target, indent=2)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"seeded in {result['seed_seconds']}s, driver={args.driver}, concurrency={args.concurrency}")
+        print(f"{'endpoint':12}{'req':>7}{'err':>5}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              + (f"{'d req/s':>9}{'d p95':>8}" if comparison is not None else ''))
+        for name, row in result['endpoints'].items():
+            line = (f"{name:12}{row['requests']:>7}{row['errors']:>5}{row['throughput_rps']:>10}"
+                    f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+            change = (comparison or {}).get(name)
+            if change:
+                line += f"{change['throughput_change']:>+9.0%}{change['p95_change']:>+8.0%}"
+                line += '  REGRESSED' if change['regressed'] else ''
+            print(line)
+
+    if comparison and any(change['regressed'] for change in comparison.values()):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Compare product search latency: full-text index vs ``LIKE``.
+
+    python -m benchmarks.search_bench --rows 1000000
+
+Builds a throwaway SQLite database of synthetic products (nothing touches
+the configured app database), indexes it, then runs the same keyword
+queries through ``search_index.search`` and through a ``LIKE`` scan that
+returns the same things a search page needs: the first page and the total.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from config import Config
+
+SYLLABLES = ['ba', 'co', 'da', 'gi', 'ha', 'khi', 'la', 'mo', 'nu', 'pha', 'qua', 'ro', 'sa', 'tu', 'vi', 'xe',
+             'an', 'em', 'ong', 'tr', 'ngu', 'ki', 'lo', 'me']
+CATEGORIES = 50
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 3))))
+    return sorted(words)
+
+
+def synthetic_rows(count, words, rng):
+    # Zipf-like word frequencies: a few very common words, a long tail of rare ones
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    for product_id in range(1, count + 1):
+        name = ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 5)))
+        description = ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(8, 25)))
+        yield {
+            'id': product_id, 'name': name, 'description': description,
+            'price': round(rng.uniform(1, 500), 2), 'category_id': rng.randint(1, CATEGORIES),
+        }
+
+
+def seed(db, rows, batch_size=10000):
+    from app.models.product import Category, Product
+
+    with db.engine.begin() as conn:
+        conn.execute(db.insert(Category), [{'id': i, 'name': f'category {i}'} for i in range(1, CATEGORIES + 1)])
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(db.insert(Product), batch)
+                batch = []
+        if batch:
+            conn.execute(db.insert(Product), batch)
+
+
+def like_search(db, terms, limit):
+    from app.models.product import Product
+
+    condition = db.and_(*[
+        db.or_(Product.name.like(f'%{term}%'), Product.description.like(f'%{term}%')) for term in terms
+    ])
+    ids = db.session.scalars(db.select(Product.id).where(condition).order_by(Product.id).limit(limit)).all()
+    total = db.session.scalar(db.select(db.func.count()).select_from(Product).where(condition))
+    return ids, total
+
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+    }
+
+
+def run(args, path, fresh):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SEARCH_BACKEND = args.backend
+        METRICS_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+
+    from app import create_app, db, search_index
+
+    app = create_app(BenchConfig)
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+    with app.app_context():
+        if fresh:
+            db.create_all()
+            started = time.perf_counter()
+            seed(db, synthetic_rows(args.rows, words, rng))
+            print(f'Seeded {args.rows} products in {time.perf_counter() - started:.1f}s')
+        started = time.perf_counter()
+        indexed = search_index.rebuild()
+        print(f'Indexed {indexed} products ({search_index.backend.name}) in {time.perf_counter() - started:.1f}s')
+
+        queries = []
+        for _ in range(args.queries):
+            # Skip the most frequent words, nobody searches for "the"
+            terms = rng.sample(words[10:len(words) // 2], rng.randint(1, 2))
+            # Half of the queries end with a prefix, like a search-as-you-type box
+            if rng.random() < 0.5:
+                terms[-1] = terms[-1][:max(2, len(terms[-1]) - 1)]
+            queries.append(terms)
+
+        index_stats = timed(lambda terms: search_index.search(' '.join(terms), limit=args.limit), queries)
+        like_stats = timed(lambda terms: like_search(db, terms, args.limit), queries)
+
+    return {
+        'rows': indexed,
+        'queries': len(queries),
+        'backend': search_index.backend.name,
+        'index': index_stats,
+        'like': like_stats,
+        'speedup_p50': round(like_stats['p50_ms'] / index_stats['p50_ms'], 1) if index_stats['p50_ms'] else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct synthetic words')
+    parser.add_argument('--backend', choices=['auto', 'fts5', 'memory'], default='auto')
+    parser.add_argument('--db', help='SQLite file to use (default: a temporary file)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args(argv)
+
+    workdir = None if args.db else tempfile.mkdtemp(prefix='search-bench-')
+    path = args.db or os.path.join(workdir, 'bench.db')
+    fresh = not os.path.exists(path)
+    try:
+        result = run(args, path, fresh)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'':8}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        for label in ('index', 'like'):
+            stats = result[label]
+            print(f"{label:8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['mean_ms']:>10}")
+        print(f"LIKE / index at p50: {result['speedup_p50']}x")
+
+
+if __name__ == '__main__':
+    main()
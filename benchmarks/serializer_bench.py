@@ -0,0 +1,127 @@
+"""Compare list serialization throughput: marshmallow vs compiled serializers.
+
+    python -m benchmarks.serializer_bench --rows 1000,10000,100000
+
+Loads synthetic users and logs into a throwaway SQLite database, fetches
+them as ``Row`` tuples (not timed) and then times turning every row into its
+JSON text the way the list endpoints do: ``json.dumps(schema.dump(row))``
+versus ``serializer_for(schema, fields)(row)``. The two outputs are compared
+byte for byte before anything is reported.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import string
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+
+ACTIONS = ['User created', 'User updated', 'Password changed', 'Review created', 'Order placed']
+
+
+def seed(db, count, rng):
+    from app.models.user import Log, User
+
+    start = datetime(2024, 1, 1)
+    with db.engine.begin() as conn:
+        conn.execute(db.insert(User), [
+            {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password': '!',
+             'role': 'admin' if i % 50 == 0 else 'user',
+             'address': f"{rng.randint(1, 999)} {''.join(rng.choices(string.ascii_letters, k=8))} Phố Huế",
+             'created_at': start + timedelta(seconds=i * 37)}
+            for i in range(1, count + 1)
+        ])
+        conn.execute(db.insert(Log), [
+            {'id': i, 'user_id': rng.randint(1, count), 'action': rng.choice(ACTIONS),
+             'details': None if i % 3 else f'detail {i}', 'timestamp': start + timedelta(seconds=i * 11)}
+            for i in range(1, count + 1)
+        ])
+
+
+def measure(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for row in rows:
+            fn(row)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(args, path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        METRICS_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+        LOG_LEVEL = 'WARNING'
+
+    from app import create_app, db
+    from app.models.user import Log, User
+    from app.schemas import LogSchema, UserSchema
+    from app.utils.serializers import serializer_for
+
+    app = create_app(BenchConfig)
+    rng = random.Random(args.seed)
+    results = []
+    with app.app_context():
+        db.create_all()
+        seed(db, max(args.rows), rng)
+        for schema_class, model in ((UserSchema, User), (LogSchema, Log)):
+            only = tuple(schema_class().dump_fields)
+            schema = schema_class(only=only)
+            compiled = serializer_for(schema_class, only)
+            dumps = app.json.dumps
+
+            def marshmallow_dump(row):
+                return dumps(schema.dump(row), separators=(',', ':'))
+
+            for count in args.rows:
+                rows = db.session.execute(
+                    db.select(*[getattr(model, f) for f in only]).order_by(model.id).limit(count)
+                ).all()
+                mismatches = sum(compiled(row) != marshmallow_dump(row) for row in rows)
+                if mismatches:
+                    raise SystemExit(f'{schema_class.__name__}: {mismatches} row(s) differ from marshmallow output')
+                slow = measure(marshmallow_dump, rows, args.repeat)
+                fast = measure(compiled, rows, args.repeat)
+                results.append({
+                    'schema': schema_class.__name__,
+                    'rows': len(rows),
+                    'marshmallow_rows_per_s': round(len(rows) / slow),
+                    'compiled_rows_per_s': round(len(rows) / fast),
+                    'speedup': round(slow / fast, 1),
+                })
+    return {'repeat': args.repeat, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=lambda value: [int(v) for v in value.split(',')],
+                        default=[1000, 10000, 100000], help='Comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Best of N timings')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='serializer-bench-')
+    try:
+        result = run(args, os.path.join(workdir, 'bench.db'))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'schema':12}{'rows':>8}{'marshmallow/s':>16}{'compiled/s':>14}{'speedup':>9}")
+        for row in result['results']:
+            print(f"{row['schema']:12}{row['rows']:>8}{row['marshmallow_rows_per_s']:>16}"
+                  f"{row['compiled_rows_per_s']:>14}{row['speedup']:>8}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -8,8 +9,46 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///ecommerce.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine profile: 'sqlite' (WAL + pragmas) or 'server' (pre-ping, recycle); auto-detected from the URL
+    DB_PROFILE = os.environ.get('DB_PROFILE')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', '65536'))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt_bi_mat'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # Token hết hạn sau 1 giờ
+    # Password hashing: Werkzeug method string, 0 workers = hash on the request thread.
+    # Default pool size shares the cores between serve.py's SERVER_WORKERS processes
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.environ.get(
+        'PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // int(os.environ.get('SERVER_WORKERS', '1')))))
+    PASSWORD_HASH_PER_KEY_LIMIT = int(os.environ.get('PASSWORD_HASH_PER_KEY_LIMIT', '2'))
+    # Pagination for list endpoints
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', '50'))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '500'))
+    # Catalog listing cache (per process; TTL bounds staleness across workers)
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', '30'))
+    CATALOG_CACHE_MAXSIZE = int(os.environ.get('CATALOG_CACHE_MAXSIZE', '1024'))
+    # Serialized GET bodies behind ETags (per process, dropped on commit)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+    RESPONSE_CACHE_MAXSIZE = int(os.environ.get('RESPONSE_CACHE_MAXSIZE', '4096'))
+    # Seconds a checkout may hold stock before it goes back on sale
+    INVENTORY_RESERVATION_TTL = int(os.environ.get('INVENTORY_RESERVATION_TTL', '600'))
+    # Product search: 'fts5', 'memory' (in-process inverted index) or 'auto'
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    # Logging config
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    ACCESS_LOG_SAMPLE_RATE_2XX = float(os.environ.get('ACCESS_LOG_SAMPLE_RATE_2XX', '1.0'))
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    # Query profiler (debug): per-request statement counts, N+1 detection, query budgets
+    QUERY_PROFILER_ENABLED = os.environ.get('QUERY_PROFILER_ENABLED', 'false').lower() in ['true', 'on', '1']
+    QUERY_PROFILER_STRICT = os.environ.get('QUERY_PROFILER_STRICT', 'false').lower() in ['true', 'on', '1']
+    QUERY_BUDGETS = json.loads(os.environ.get('QUERY_BUDGETS', '{}'))
+    # 'transaction': audit rows commit with the change; 'buffered': batched write-behind
+    AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'transaction')
     # Mail config
      # Mail config
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
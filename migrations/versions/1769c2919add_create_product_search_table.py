@@ -0,0 +1,50 @@
+"""Create product search table
+
+Revision ID: 1769c2919add
+Revises: 0c4de6eca65b
+Create Date: 2026-10-18 13:35:00.749758
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1769c2919add'
+down_revision = '0c4de6eca65b'
+branch_labels = None
+depends_on = None
+
+
+def _fts5_available(bind):
+    if bind.dialect.name != 'sqlite':
+        return False
+    options = {row[0] for row in bind.exec_driver_sql('PRAGMA compile_options')}
+    return 'ENABLE_FTS5' in options
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Không có FTS5 thì app dùng chỉ mục trong bộ nhớ, không cần bảng
+    if not _fts5_available(bind):
+        return
+    # Các bản trước tạo bảng này lúc khởi động app
+    if bind.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_search'").first():
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE product_search USING fts5("
+        "name, description, category_id UNINDEXED, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute("INSERT INTO product_search(product_search, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    # Backfill from existing products
+    op.execute(
+        'INSERT INTO product_search (rowid, name, description, category_id) '
+        'SELECT id, name, description, category_id FROM products'
+    )
+    op.execute("INSERT INTO product_search(product_search) VALUES ('optimize')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS product_search')
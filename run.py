@@ -1,57 +1,93 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
+import argparse
+import bisect
+import itertools
+import json
+import os
 import threading
 import logging
+import urllib.request
 import psutil
 from app import create_app
 from werkzeug.serving import make_server
 import ipaddress  # Thêm thư viện để kiểm tra địa chỉ IP
+import time
+from collections import deque
+
+LOG_DRAIN_INTERVAL_MS = 200
+PERFORMANCE_REFRESH_MS = 2000
+LOG_ROW_HEIGHT = 20
+LOG_LEVELS = {'ALL': 0, 'DEBUG': logging.DEBUG, 'INFO': logging.INFO,
+              'WARNING': logging.WARNING, 'ERROR': logging.ERROR}
+
+class LogRingBuffer:
+    """Fixed-capacity buffer of log records shared by request threads and the GUI.
+
+    ``deque.append`` with a ``maxlen`` and ``next()`` on an ``itertools.count``
+    are single C calls, so writers never take a lock and never wait on Tk; the
+    oldest records simply fall off the front.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._records = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+
+    def append(self, created, levelno, levelname, message):
+        self._records.append((next(self._seq), created, levelno, levelname, message))
+
+    def snapshot(self):
+        # Copying a deque is one C call too, but fall back just in case it races an append
+        while True:
+            try:
+                return tuple(self._records)
+            except RuntimeError:
+                continue
+
+    def clear(self):
+        self._records.clear()
+
 
 class TextHandler(logging.Handler):
-    def __init__(self, treeview):
+    """Puts records into a ``LogRingBuffer``; the GUI thread renders them."""
+
+    def __init__(self, ring):
         logging.Handler.__init__(self)
-        self.treeview = treeview
+        self.ring = ring
 
     def emit(self, record):
-        msg = self.format(record)
-        time = self.formatTime(record)  # Lấy thời gian từ bản ghi
-        level = record.levelname
-        # Lấy thông tin từ thông điệp log
-        message = record.msg
-
-        # Xác định màu sắc dựa trên mức độ log
-        if level == "INFO":
-            color = "black"
-        elif level == "ERROR":
-            color = "red"
-        else:
-            color = "black"
-
-        # Thêm log vào treeview với màu sắc
-        self.treeview.insert("", "end", values=(time, level, message), tags=(level))
-        self.treeview.tag_configure(level, foreground=color)
-
-    def formatTime(self, record, datefmt=None):
-        """Trả về thời gian của bản ghi log."""
-        if datefmt:
-            return record.asctime
-        else:
-            return self.formatTime(record, datefmt="%Y-%m-%d %H:%M:%S")
+        try:
+            self.ring.append(record.created, record.levelno, record.levelname, record.getMessage())
+        except Exception:
+            self.handleError(record)
 
 class ServerGUI:
-    def __init__(self, master):
+    def __init__(self, master, attach_url=None, token=None, log_capacity=10000):
         self.master = master
-        master.title("Flask Server")
-
-        self.app = create_app()  # Khởi tạo app ở đây
+        self.log_capacity = log_capacity
+        # attach_url: chỉ giám sát một server headless (serve.py), không tự chạy server
+        self.attach_url = attach_url.rstrip('/') if attach_url else None
+        self.token = token
+
+        if self.attach_url:
+            master.title(f"Flask Monitor - {self.attach_url}")
+            self.app = None
+            self.logger = logging.getLogger('monitor')
+        else:
+            master.title("Flask Server")
+            self.app = create_app()  # Khởi tạo app ở đây
+            self.logger = self.app.logger
+        self.logger.setLevel(logging.INFO)
 
         self.notebook = ttk.Notebook(master)
         self.notebook.pack(expand=True, fill="both")
 
         self.create_log_tab()
         self.create_performance_tab()
-        self.create_routes_tab()
-        self.create_config_tab()
+        if not self.attach_url:
+            self.create_routes_tab()
+            self.create_config_tab()
 
         # Arrange buttons and status label in one row
         button_frame = tk.Frame(master)
@@ -70,9 +106,12 @@ class ServerGUI:
         self.status_label = tk.Label(button_frame, text="Status: Not Started")
         self.status_label.pack(side=tk.LEFT, padx=5)
 
+        if self.attach_url:
+            self.start_button.config(state=tk.DISABLED)
+            self.status_label.config(text=f"Status: Monitoring {self.attach_url}")
+
         self.flask_thread = None
         self.server = None
-        self.app.logger.setLevel(logging.INFO)
 
         master.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -80,8 +119,28 @@ class ServerGUI:
         log_tab = ttk.Frame(self.notebook)
         self.notebook.add(log_tab, text="Logs")
 
-        # Create treeview for logs
-        self.log_tree = ttk.Treeview(log_tab, columns=("Time", "Level", "Message"), show="headings")
+        # Bộ lọc theo mức độ và nội dung
+        filter_frame = tk.Frame(log_tab)
+        filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        tk.Label(filter_frame, text="Level:").pack(side=tk.LEFT)
+        self.level_filter = ttk.Combobox(filter_frame, values=list(LOG_LEVELS), state="readonly", width=10)
+        self.level_filter.set('ALL')
+        self.level_filter.pack(side=tk.LEFT, padx=5)
+        self.level_filter.bind("<<ComboboxSelected>>", lambda e: self.reset_log_view())
+        tk.Label(filter_frame, text="Search:").pack(side=tk.LEFT)
+        self.text_filter = tk.StringVar()
+        self.text_filter.trace_add("write", lambda *args: self.reset_log_view())
+        tk.Entry(filter_frame, textvariable=self.text_filter, width=40).pack(side=tk.LEFT, padx=5)
+        self.log_count_label = tk.Label(filter_frame, text="")
+        self.log_count_label.pack(side=tk.RIGHT)
+
+        tree_frame = tk.Frame(log_tab)
+        tree_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+
+        # Create treeview for logs; it only ever holds the rows currently on screen
+        ttk.Style().configure("Log.Treeview", rowheight=LOG_ROW_HEIGHT)
+        self.log_tree = ttk.Treeview(tree_frame, columns=("Time", "Level", "Message"), show="headings",
+                                     style="Log.Treeview", selectmode="none")
         self.log_tree.heading("Time", text="Time")
         self.log_tree.heading("Level", text="Level")
         self.log_tree.heading("Message", text="Message")
@@ -91,22 +150,111 @@ class ServerGUI:
         self.log_tree.column("Level", width=80)
         self.log_tree.column("Message", width=500)
 
-        self.log_tree.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-
-        # Create a scrollbar for the treeview
-        scrollbar = ttk.Scrollbar(log_tab, orient="vertical", command=self.log_tree.yview)
-        self.log_tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        for level in ("ERROR", "CRITICAL"):
+            self.log_tree.tag_configure(level, foreground="red")
+        self.log_tree.tag_configure("WARNING", foreground="darkorange")
+
+        # Scrollbar drives an offset into the filtered records, not the treeview itself
+        self.log_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.scroll_logs)
+        self.log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.log_tree.bind("<Configure>", lambda e: self.render_logs())
+        self.log_tree.bind("<MouseWheel>", lambda e: self.scroll_logs("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.log_tree.bind("<Button-4>", lambda e: self.scroll_logs("scroll", -1, "units"))
+        self.log_tree.bind("<Button-5>", lambda e: self.scroll_logs("scroll", 1, "units"))
+
+        self.log_rows = []  # item ids đang hiển thị, được tái sử dụng
+        self.filtered_logs = []  # bản ghi khớp bộ lọc, theo thứ tự seq
+        self.last_log_seq = 0
+        self.log_offset = 0
+        self.follow_logs = True
 
         # Set up logging handler
-        self.text_handler = TextHandler(self.log_tree)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        self.text_handler.setFormatter(formatter)
-        self.app.logger.addHandler(self.text_handler)
+        self.log_ring = LogRingBuffer(self.log_capacity)
+        self.text_handler = TextHandler(self.log_ring)
+        self.logger.addHandler(self.text_handler)
+        self.master.after(LOG_DRAIN_INTERVAL_MS, self.drain_logs)
+
+    def log_matches(self, record):
+        if record[2] < LOG_LEVELS[self.level_filter.get()]:
+            return False
+        text = self.text_filter.get().lower()
+        return not text or text in record[4].lower()
+
+    def drain_logs(self):
+        """Pick up whatever was logged since the last tick and redraw if needed."""
+        try:
+            records = self.log_ring.snapshot()
+            changed = False
+            if records and records[-1][0] > self.last_log_seq:
+                start = bisect.bisect_right(records, self.last_log_seq, key=lambda r: r[0])
+                self.filtered_logs.extend(r for r in records[start:] if self.log_matches(r))
+                self.last_log_seq = records[-1][0]
+                changed = True
+            # Drop what the ring buffer has already evicted
+            oldest = records[0][0] if records else self.last_log_seq + 1
+            evicted = bisect.bisect_left(self.filtered_logs, oldest, key=lambda r: r[0])
+            if evicted:
+                del self.filtered_logs[:evicted]
+                self.log_offset = max(self.log_offset - evicted, 0)
+                changed = True
+            if changed:
+                self.render_logs()
+        finally:
+            self.master.after(LOG_DRAIN_INTERVAL_MS, self.drain_logs)
+
+    def reset_log_view(self):
+        self.filtered_logs = [r for r in self.log_ring.snapshot() if self.log_matches(r)]
+        self.last_log_seq = self.filtered_logs[-1][0] if self.filtered_logs else self.last_log_seq
+        self.follow_logs = True
+        self.render_logs()
+
+    def visible_log_rows(self):
+        height = self.log_tree.winfo_height()
+        # Trừ đi một dòng cho phần tiêu đề
+        return max(height // LOG_ROW_HEIGHT - 1, 1) if height > 1 else 25
+
+    def render_logs(self):
+        total = len(self.filtered_logs)
+        visible = self.visible_log_rows()
+        if self.follow_logs:
+            self.log_offset = max(total - visible, 0)
+        self.log_offset = min(self.log_offset, max(total - visible, 0))
+        window = self.filtered_logs[self.log_offset:self.log_offset + visible]
+
+        while len(self.log_rows) < len(window):
+            self.log_rows.append(self.log_tree.insert("", "end"))
+        while len(self.log_rows) > len(window):
+            self.log_tree.delete(self.log_rows.pop())
+        for iid, (seq, created, levelno, levelname, message) in zip(self.log_rows, window):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+            self.log_tree.item(iid, values=(stamp, levelname, message), tags=(levelname,))
+
+        if total:
+            self.log_scrollbar.set(self.log_offset / total, (self.log_offset + len(window)) / total)
+        else:
+            self.log_scrollbar.set(0, 1)
+        self.log_count_label.config(text=f"{total} / {self.log_ring.capacity}")
+
+    def scroll_logs(self, action, amount, unit=None):
+        total = len(self.filtered_logs)
+        visible = self.visible_log_rows()
+        if action == "moveto":
+            offset = int(float(amount) * total)
+        else:
+            step = visible if unit == "pages" else 1
+            offset = self.log_offset + int(amount) * step
+        self.log_offset = max(min(offset, total - visible), 0)
+        # Kéo xuống cuối thì tiếp tục theo dõi log mới
+        self.follow_logs = self.log_offset >= total - visible
+        self.render_logs()
 
     def clear_logs(self):
-        for item in self.log_tree.get_children():
-            self.log_tree.delete(item)
+        self.log_ring.clear()
+        self.filtered_logs = []
+        self.log_offset = 0
+        self.follow_logs = True
+        self.render_logs()
 
     def create_performance_tab(self):
         performance_tab = ttk.Frame(self.notebook)
@@ -118,14 +266,78 @@ class ServerGUI:
         self.memory_label = tk.Label(performance_tab, text="Memory Usage: ")
         self.memory_label.pack(pady=5)
 
+        # Số liệu theo từng route, lấy từ metrics registry của app
+        columns = ("Method", "Route", "Requests", "5xx", "4xx", "p50 ms", "p95 ms", "p99 ms", "DB q/req", "DB ms/req")
+        self.metrics_tree = ttk.Treeview(performance_tab, columns=columns, show="headings", height=12)
+        for column in columns:
+            self.metrics_tree.heading(column, text=column)
+            self.metrics_tree.column(column, width=220 if column == "Route" else 75, anchor=tk.W if column == "Route" else tk.E)
+        self.metrics_tree.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+
+        if self.attach_url:
+            self.remote_stats = tk.Text(performance_tab, height=12, width=80)
+            self.remote_stats.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+            self.remote_result = None
+            self.remote_fetching = False
+
         self.refresh_button = tk.Button(performance_tab, text="Refresh Performance", command=self.refresh_performance, bg="yellow", fg="black")
         self.refresh_button.pack(pady=5)
 
+        self.master.after(PERFORMANCE_REFRESH_MS, self.auto_refresh_performance)
+
+    def auto_refresh_performance(self):
+        try:
+            self.refresh_performance()
+        finally:
+            self.master.after(PERFORMANCE_REFRESH_MS, self.auto_refresh_performance)
+
     def refresh_performance(self):
         cpu_usage = psutil.cpu_percent()
         memory_usage = psutil.virtual_memory().percent
         self.cpu_label.config(text=f"CPU Usage: {cpu_usage}%")
         self.memory_label.config(text=f"Memory Usage: {memory_usage}%")
+        if self.attach_url:
+            self.refresh_remote_stats()
+        else:
+            self.render_metrics(self.app.extensions['metrics'].snapshot())
+
+    def render_metrics(self, snapshot):
+        self.metrics_tree.delete(*self.metrics_tree.get_children())
+        for endpoint in snapshot['endpoints']:
+            latency = endpoint['latency_ms']
+            db_stats = endpoint['db']
+            self.metrics_tree.insert("", "end", values=(
+                endpoint['method'], endpoint['rule'], endpoint['requests'], endpoint['errors'],
+                endpoint['client_errors'], latency['p50'], latency['p95'], latency['p99'],
+                db_stats['queries_per_request'], db_stats['time_ms_per_request'],
+            ))
+
+    def fetch_remote(self, path):
+        request = urllib.request.Request(self.attach_url + path)
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def fetch_remote_stats(self):
+        # Chạy trên thread riêng để không chặn giao diện khi server chậm
+        try:
+            self.remote_result = (self.fetch_remote('/metrics?format=json'), self.fetch_remote('/api/stats'))
+        except Exception as e:
+            self.logger.error(f"Could not fetch stats from {self.attach_url}: {e}")
+        finally:
+            self.remote_fetching = False
+
+    def refresh_remote_stats(self):
+        if self.remote_result is not None:
+            metrics, stats = self.remote_result
+            self.remote_result = None
+            self.render_metrics(metrics)
+            self.remote_stats.delete('1.0', tk.END)
+            self.remote_stats.insert(tk.END, json.dumps(stats, indent=2, sort_keys=True))
+        if not self.remote_fetching:
+            self.remote_fetching = True
+            threading.Thread(target=self.fetch_remote_stats, daemon=True).start()
 
     def create_routes_tab(self):
         routes_tab = ttk.Frame(self.notebook)
@@ -197,11 +409,11 @@ class ServerGUI:
             self.stop_button.config(state=tk.NORMAL)
 
             # Update log with the new IP address and port
-            self.app.logger.info(f"Server started: {host}:{port}")
+            self.logger.info(f"Server started: {host}:{port}")
             self.status_label.config(text="Status: Running")  # Update status
 
         except Exception as e:
-            self.app.logger.error(f"Error starting server: {e}")
+            self.logger.error(f"Error starting server: {e}")
             messagebox.showerror("Error", f"Could not start server: {e}")
 
     def stop_server(self):
@@ -211,17 +423,26 @@ class ServerGUI:
             self.server = None
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
-            self.app.logger.info("Server has been stopped")
+            self.logger.info("Server has been stopped")
             self.status_label.config(text="Status: Stopped")  # Update status
 
     def on_closing(self):
         if messagebox.askokcancel("Exit", "Are you sure you want to exit?"):
             if self.server:
                 self.stop_server()
-            self.app.logger.info("Application has been closed")
+            self.logger.info("Application has been closed")
             self.master.destroy()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Flask server console.')
+    parser.add_argument('--attach', metavar='URL',
+                        help='Monitor a server started with serve.py instead of hosting one')
+    parser.add_argument('--token', default=os.environ.get('MONITOR_TOKEN'),
+                        help='Admin access token used to read /api/stats and /metrics')
+    parser.add_argument('--log-capacity', type=int, default=10000,
+                        help='Number of log records kept by the Logs tab')
+    args = parser.parse_args()
+
     root = tk.Tk()
-    gui = ServerGUI(root)
+    gui = ServerGUI(root, attach_url=args.attach, token=args.token, log_capacity=args.log_capacity)
     root.mainloop()
\ No newline at end of file
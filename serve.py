@@ -0,0 +1,259 @@
+"""Headless pre-fork server.
+
+The master process binds the listening socket and forks worker processes
+that share it. Each worker imports the app and calls ``create_app()`` once,
+after the fork, then serves requests from a fixed-size thread pool. The
+master never imports the app, so a reload picks up new code.
+
+    python serve.py --host 0.0.0.0 --port 5000 --workers 4 --threads 8
+
+Signals sent to the master:
+    SIGHUP           start a new generation of workers, then retire the old one
+    SIGTERM, SIGINT  graceful shutdown
+    SIGTTIN, SIGTTOU add / remove one worker
+"""
+import argparse
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('serve')
+
+# Exit status of a worker that could not even build the app; respawning it would just loop
+WORKER_BOOT_ERROR = 3
+
+
+def make_worker_server(host, port, app, threads, fd):
+    from werkzeug.serving import BaseWSGIServer
+
+    class ThreadPoolWSGIServer(BaseWSGIServer):
+        """Werkzeug server that handles requests on a bounded thread pool."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+        def process_request(self, request, client_address):
+            self._executor.submit(self._process, request, client_address)
+
+        def _process(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+        def server_close(self):
+            # Werkzeug calls this from __init__ too, before the pool exists
+            executor = getattr(self, '_executor', None)
+            if executor is not None:
+                executor.shutdown(wait=True)
+            super().server_close()
+
+    return ThreadPoolWSGIServer(host, port, app, fd=fd)
+
+
+class PreforkServer:
+    def __init__(self, app_factory, host, port, workers, threads, backlog=2048, graceful_timeout=30):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.threads = threads
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}  # pid -> generation
+        self.generation = 0
+        self.sock = None
+        self._stopping = False
+        self._reload = False
+
+    # -- master -----------------------------------------------------------
+
+    def bind(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        # Non-blocking so a worker that loses the accept() race just goes back to select()
+        sock.setblocking(False)
+        sock.set_inheritable(True)
+        self.sock = sock
+
+    def run(self):
+        self.bind()
+        logger.info(f'Master {os.getpid()} listening on {self.host}:{self.port} '
+                    f'({self.num_workers} workers x {self.threads} threads)')
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        signal.signal(signal.SIGTTIN, self._handle_ttin)
+        signal.signal(signal.SIGTTOU, self._handle_ttou)
+
+        self.manage_workers()
+        while not self._stopping:
+            self.reap_workers()
+            if self._reload:
+                self._reload = False
+                self.reload()
+            if not self._stopping:
+                self.manage_workers()
+            time.sleep(0.5)
+        self.shutdown()
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload = True
+
+    def _handle_ttin(self, signum, frame):
+        self.num_workers += 1
+
+    def _handle_ttou(self, signum, frame):
+        self.num_workers = max(self.num_workers - 1, 1)
+
+    def current_workers(self):
+        return [pid for pid, gen in self.workers.items() if gen == self.generation]
+
+    def manage_workers(self):
+        current = self.current_workers()
+        while len(current) < self.num_workers:
+            current.append(self.spawn_worker())
+        for pid in current[self.num_workers:]:
+            self.kill_worker(pid, signal.SIGTERM)
+
+    def reload(self):
+        logger.info('Reloading: starting a new generation of workers')
+        old = list(self.workers)
+        self.generation += 1
+        self.manage_workers()
+        for pid in old:
+            self.kill_worker(pid, signal.SIGTERM)
+
+    def reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self.workers.pop(pid, None)
+            if generation != self.generation or self._stopping:
+                continue
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == WORKER_BOOT_ERROR:
+                logger.error(f'Worker {pid} failed to boot, shutting down')
+                self._stopping = True
+            else:
+                logger.warning(f'Worker {pid} exited with status {status}, replacing it')
+
+    def kill_worker(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def shutdown(self):
+        logger.info('Shutting down workers')
+        for pid in list(self.workers):
+            self.kill_worker(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self.kill_worker(pid, signal.SIGKILL)
+        self.reap_workers()
+        self.sock.close()
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return pid
+        try:
+            self.run_worker()
+        except Exception:
+            logger.exception('Worker crashed')
+            os._exit(1)
+        os._exit(0)
+
+    # -- worker -----------------------------------------------------------
+
+    def boot_worker(self):
+        try:
+            app = self.app_factory()
+            return app, make_worker_server(self.host, self.port, app, self.threads, self.sock.fileno())
+        except Exception:
+            logger.exception('Worker failed to boot')
+            os._exit(WORKER_BOOT_ERROR)
+
+    def run_worker(self):
+        for sig in (signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        # Everything stateful (engine, pools, queues, threads) is created here, after the fork
+        app, server = self.boot_worker()
+
+        def stop(signum, frame):
+            # shutdown() blocks until serve_forever returns, so it can't run on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        app.logger.info(f'Worker {os.getpid()} started')
+        try:
+            server.serve_forever()
+            server.server_close()
+        finally:
+            # The worker leaves through os._exit(), which skips atexit: let the app
+            # flush buffered writes and stop its background threads first
+            shutdown = app.extensions.get('shutdown')
+            if shutdown is not None:
+                shutdown()
+
+
+def load_factory(path):
+    module_name, _, attr = path.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attr or 'create_app')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the API with pre-forked worker processes.')
+    parser.add_argument('--host', default=os.environ.get('SERVER_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('SERVER_PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVER_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SERVER_THREADS', '8')))
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--graceful-timeout', type=float, default=30)
+    parser.add_argument('--app', default='app:create_app', help='module:factory to load in each worker')
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        parser.error('serve.py needs os.fork(); use run.py on this platform')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(process)d] %(levelname)s %(message)s')
+    # Workers read this after the fork to size per-process pools (PASSWORD_HASH_WORKERS)
+    os.environ['SERVER_WORKERS'] = str(args.workers)
+    # Resolve lazily so the master process never imports the app itself
+    server = PreforkServer(
+        lambda: load_factory(args.app)(),
+        args.host, args.port, args.workers, args.threads,
+        backlog=args.backlog, graceful_timeout=args.graceful_timeout,
+    )
+    server.run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import pytest
+
+from app import create_app, db
+from config import Config
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a throwaway SQLite database; keyword arguments override config."""
+    def make(**overrides):
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+            MAIL_SPOOL_PATH = str(tmp_path / 'mail_spool.db')
+            PASSWORD_HASH_WORKERS = 0
+            LOG_LEVEL = 'WARNING'
+
+        for key, value in overrides.items():
+            setattr(TestConfig, key, value)
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+        return app
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
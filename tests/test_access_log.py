@@ -0,0 +1,17 @@
+import atexit
+
+from flask import Flask
+
+from app.utils.access_log import AccessLog
+
+
+def test_repeated_init_app_registers_one_atexit_hook():
+    access_log = AccessLog()
+    before = atexit._ncallbacks()
+    try:
+        for _ in range(3):
+            access_log.init_app(Flask(__name__))
+        assert atexit._ncallbacks() == before + 1
+    finally:
+        access_log.stop()
+        atexit.unregister(access_log.stop)
@@ -0,0 +1,40 @@
+from app import audit_log, db
+from app.models.user import Log
+
+
+def test_close_writes_buffered_entries(make_app):
+    app = make_app(AUDIT_LOG_MODE='buffered', AUDIT_LOG_FLUSH_INTERVAL=60)
+    with app.app_context():
+        for i in range(3):
+            audit_log.record(None, 'User updated', f'entry {i}')
+        db.session.commit()
+        assert db.session.query(Log).count() == 0
+        assert audit_log.stats()['buffered'] == 3
+
+        audit_log.close()
+        assert db.session.query(Log).count() == 3
+        assert audit_log.stats()['buffered'] == 0
+
+
+def test_entries_that_no_longer_fit_are_counted_and_logged(make_app, monkeypatch, caplog):
+    app = make_app(AUDIT_LOG_MODE='buffered', AUDIT_LOG_FLUSH_INTERVAL=60, AUDIT_LOG_MAX_BUFFER=10,
+                   AUDIT_LOG_BATCH_SIZE=10)
+    with app.app_context():
+        for i in range(5):
+            audit_log.record(None, 'User updated', f'entry {i}')
+        db.session.commit()
+
+        def failing(*args):
+            raise RuntimeError('database is down')
+
+        monkeypatch.setattr('app.utils.audit_log.insert', failing)
+        audit_log.max_buffer = 2
+        assert audit_log.flush() == 0
+        stats = audit_log.stats()
+        assert (stats['errors'], stats['buffered'], stats['dropped']) == (1, 2, 3)
+        assert 'Dropped 3 audit log entries' in caplog.text
+        assert "'entry 4'" in caplog.text
+
+        monkeypatch.undo()
+        assert audit_log.flush() == 2
+        assert db.session.query(Log.details).order_by(Log.id).all() == [('entry 0',), ('entry 1',)]
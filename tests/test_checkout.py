@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models.cart import Cart, CartItem
+from app.models.order import Coupon, Order, OrderItem
+from app.models.product import Inventory, Product
+from app.models.user import Log, User
+from app.services.inventory_service import InsufficientStock
+from app.services.order_service import OrderService
+
+
+def _shopper(*lines):
+    """A user whose cart holds ``(stock, quantity)`` lines, plus a 10% coupon."""
+    user = User(username='shopper', email='shopper@example.com', password='!', address='1 Le Loi')
+    products = [Product(name=f'item {i}', price=10.0, inventory=Inventory(quantity=stock))
+                for i, (stock, _) in enumerate(lines)]
+    user.cart = Cart(items=[CartItem(product=product, quantity=quantity)
+                            for product, (_, quantity) in zip(products, lines)])
+    db.session.add_all([user, Coupon(code='TEN', discount=10, expiry_date=date.today() + timedelta(days=1))])
+    db.session.commit()
+    return user.id, [product.id for product in products]
+
+
+def _count(model):
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+def _stock(product_ids):
+    db.session.expire_all()
+    return [db.session.get(Product, pid).inventory.quantity for pid in product_ids]
+
+
+def test_checkout_places_order_and_empties_cart(app):
+    with app.app_context():
+        user_id, products = _shopper((5, 2), (3, 1))
+        order = OrderService.checkout(user_id, {'coupon_code': 'TEN', 'shipping_method': 'standard',
+                                                'payment_method': 'cod'})
+        assert order.total_price == 27.0
+        assert order.coupon.code == 'TEN'
+        assert _count(OrderItem) == 2
+        assert _count(CartItem) == 0
+        assert _stock(products) == [3, 2]
+        assert db.session.scalar(db.select(Log.action).where(Log.user_id == user_id)) == 'Order placed'
+
+
+def test_checkout_shortage_writes_nothing(app):
+    with app.app_context():
+        user_id, products = _shopper((5, 2), (1, 3))
+        with pytest.raises(InsufficientStock) as err:
+            OrderService.checkout(user_id, {'coupon_code': 'TEN', 'shipping_method': 'standard',
+                                            'payment_method': 'cod'})
+        assert err.value.shortages == {products[1]: 1}
+        assert (_count(Order), _count(OrderItem), _count(Log)) == (0, 0, 0)
+        assert _count(CartItem) == 2
+        assert _stock(products) == [5, 1]
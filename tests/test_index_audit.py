@@ -0,0 +1,13 @@
+from app import db
+from app.utils.index_audit import database_findings, model_findings, plan_findings, service_queries
+
+
+def test_every_model_foreign_key_has_an_index(app):
+    with app.app_context():
+        assert model_findings(db.metadata) == []
+        assert database_findings(db.engine) == []
+
+
+def test_service_queries_use_indexes(app):
+    with app.app_context():
+        assert plan_findings(db.engine, service_queries()) == []
@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.product import Category, Inventory, Product, StockReservation
+from app.services.inventory_service import InsufficientStock, InventoryService, ReservationExpired
+
+
+def _products(*quantities):
+    products = [Product(name=f'item {i}', price=10.0, inventory=Inventory(quantity=quantity))
+                for i, quantity in enumerate(quantities)]
+    db.session.add_all(products)
+    db.session.commit()
+    return [product.id for product in products]
+
+
+def _stock(*product_ids):
+    db.session.expire_all()
+    return [db.session.get(Product, pid).inventory.quantity for pid in product_ids]
+
+
+def test_reserve_is_all_or_nothing(app):
+    with app.app_context():
+        plenty, scarce = _products(10, 1)
+        with pytest.raises(InsufficientStock) as err:
+            InventoryService.reserve({plenty: 2, scarce: 2})
+        assert err.value.shortages == {scarce: 1}
+        assert _stock(plenty, scarce) == [10, 1]
+        assert db.session.scalar(db.select(db.func.count()).select_from(StockReservation)) == 0
+
+
+def test_sell_without_commit_keeps_callers_work_on_shortage(app):
+    with app.app_context():
+        plenty, scarce = _products(10, 1)
+        db.session.add(Category(name='written first'))
+        db.session.flush()
+        with pytest.raises(InsufficientStock):
+            InventoryService.sell({plenty: 2, scarce: 2}, commit=False)
+        # Chỉ savepoint bị huỷ: việc caller đã ghi vẫn còn, và chưa có gì được commit
+        assert db.session.scalar(db.select(db.func.count()).select_from(Category)) == 1
+        db.session.rollback()
+        assert db.session.scalar(db.select(db.func.count()).select_from(Category)) == 0
+        assert _stock(plenty, scarce) == [10, 1]
+
+
+def test_sell_without_commit_is_undone_with_the_callers_transaction(app):
+    with app.app_context():
+        plenty, = _products(10)
+        InventoryService.sell({plenty: 3}, commit=False)
+        db.session.rollback()
+        assert _stock(plenty) == [10]
+
+
+def test_concurrent_reservations_never_oversell(app):
+    with app.app_context():
+        hot, = _products(5)
+    outcomes = []
+
+    def checkout():
+        with app.app_context():
+            try:
+                InventoryService.reserve({hot: 1})
+                outcomes.append('reserved')
+            except InsufficientStock:
+                outcomes.append('sold out')
+
+    threads = [threading.Thread(target=checkout) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outcomes.count('reserved') == 5
+    assert outcomes.count('sold out') == 15
+    with app.app_context():
+        assert _stock(hot) == [0]
+        assert db.session.scalar(db.select(db.func.sum(StockReservation.quantity))) == 5
+
+
+def test_release_and_expiry_return_stock(app):
+    with app.app_context():
+        first, second = _products(4, 4)
+        kept = InventoryService.reserve({first: 1})
+        released = InventoryService.reserve({first: 2, second: 1})
+        expired = InventoryService.reserve({second: 3})
+        assert _stock(first, second) == [1, 0]
+
+        assert InventoryService.release(released['key'])
+        assert not InventoryService.release(released['key'])
+        db.session.execute(db.update(StockReservation)
+                           .where(StockReservation.reservation_key == expired['key'])
+                           .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        assert InventoryService.release_expired() == 3
+        assert _stock(first, second) == [3, 4]
+
+        assert InventoryService.confirm(kept['key']) == {db.session.get(Product, first).inventory_id: 1}
+        with pytest.raises(ReservationExpired):
+            InventoryService.confirm(expired['key'])
+        assert _stock(first, second) == [3, 4]
+
+
+def test_shortage_reclaims_expired_reservations(app):
+    with app.app_context():
+        scarce, = _products(2)
+        stale = InventoryService.reserve({scarce: 2}, ttl=60)
+        db.session.execute(db.update(StockReservation)
+                           .where(StockReservation.reservation_key == stale['key'])
+                           .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+        assert InventoryService.sell({scarce: 1}) == {scarce: 1}
+        assert _stock(scarce) == [1]
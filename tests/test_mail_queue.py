@@ -0,0 +1,155 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+from app.utils.mail_queue import MailQueue, MailSpool
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server for smtplib; keeps the subject of every message received."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.subjects = []
+        self.lock = threading.Lock()
+        self.delay = 0
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 localhost ready')
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith('DATA'):
+                self.reply('354 end with <CRLF>.<CRLF>')
+                data = []
+                while (line := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(line.decode())
+                subject = next(l[len('Subject: '):].strip() for l in data if l.startswith('Subject: '))
+                time.sleep(self.server.delay)
+                with self.server.lock:
+                    self.server.subjects.append(subject)
+                self.reply('250 queued')
+            elif command.startswith('QUIT'):
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp():
+    server = SMTPStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mail_app(make_app, smtp):
+    return make_app(MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp.server_address[1], MAIL_USE_TLS=False,
+                    MAIL_USE_SSL=False, MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False,
+                    MAIL_DEFAULT_SENDER='shop@example.com', MAIL_IDLE_TIMEOUT=0.2)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.05)
+
+
+def payload(subject):
+    return {'subject': subject, 'sender': 'shop@example.com', 'recipients': ['user@example.com'],
+            'body': 'hello', 'html': None, 'cc': None, 'bcc': None, 'reply_to': None}
+
+
+def test_enqueued_mail_is_delivered_and_removed_from_spool(mail_app, smtp):
+    from flask_mail import Message
+
+    queue = MailQueue(mail_app)
+    try:
+        with mail_app.app_context():
+            queue.enqueue(Message('Reset your password', recipients=['user@example.com'], body='hi'))
+        wait_for(lambda: queue.stats()['sent'] == 1)
+        assert smtp.subjects == ['Reset your password']
+        assert queue.stats()['spooled'] == 0
+    finally:
+        queue.stop()
+
+
+def test_workers_sharing_a_spool_send_each_mail_once(mail_app, smtp):
+    # Hai MailQueue trên cùng file spool, như các worker pre-fork của serve.py
+    first, second = MailQueue(mail_app), MailQueue(mail_app)
+    try:
+        subjects = [f'mail {i}' for i in range(40)]
+        for subject in subjects:
+            first._spool.add(payload(subject))
+        first._start()
+        second._start()
+        wait_for(lambda: len(smtp.subjects) >= len(subjects) and first._spool.count() == 0)
+        # Để các sweeper quét thêm một vòng: không được gửi lại thư nào
+        time.sleep(1.5)
+        assert sorted(smtp.subjects) == sorted(subjects)
+        assert first.stats()['sent'] + second.stats()['sent'] == len(subjects)
+    finally:
+        first.stop()
+        second.stop()
+
+
+def _mail_threads():
+    return [t for t in threading.enumerate() if t.name.startswith(('mail-worker', 'mail-sweeper'))]
+
+
+def test_stop_wakes_idle_workers_and_closes_the_spool(make_app, smtp):
+    app = make_app(MAIL_IDLE_TIMEOUT=30)
+    queue = MailQueue(app)
+    queue._start()
+    assert len(_mail_threads()) == queue.workers + 1
+    started = time.monotonic()
+    queue.stop()
+    assert time.monotonic() - started < 3
+    assert _mail_threads() == []
+    assert queue.stats().get('spooled') is None
+
+
+def test_init_app_stops_the_previous_workers(make_app, smtp):
+    app = make_app(MAIL_IDLE_TIMEOUT=30)
+    queue = MailQueue(app)
+    try:
+        queue._start()
+        queue.init_app(app)
+        queue._start()
+        assert len(_mail_threads()) == queue.workers + 1
+    finally:
+        queue.stop()
+
+
+def test_stop_mid_batch_hands_unsent_mail_back(mail_app, smtp):
+    smtp.delay = 0.3
+    queue = MailQueue(mail_app)
+    subjects = [f'mail {i}' for i in range(10)]
+    for subject in subjects:
+        queue._offer(queue._spool.add(payload(subject)))
+    queue._start()
+    wait_for(lambda: len(smtp.subjects) >= 1)
+    path = queue._spool.path
+    queue.stop()
+    # Thư đang gửi được gửi xong, phần còn lại của lô quay về 'pending' ngay
+    spool = MailSpool(path)
+    try:
+        assert spool.count('sending') == 0
+        assert spool.count('pending') + len(smtp.subjects) == len(subjects)
+        assert queue.stats()['sent'] == len(smtp.subjects) < len(subjects)
+    finally:
+        spool.close()
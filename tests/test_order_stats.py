@@ -0,0 +1,50 @@
+import pytest
+
+from app import db
+from app.models.order import Order, UserOrderStats
+from app.models.user import User
+from app.services.order_service import OrderService
+
+
+def _users(*names):
+    users = [User(username=name, email=f'{name}@example.com', password='!', address='1 Le Loi') for name in names]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def _stats():
+    rows = db.session.execute(db.select(UserOrderStats.user_id, UserOrderStats.order_count,
+                                        UserOrderStats.total_spent)).all()
+    return {user_id: (count, pytest.approx(spent)) for user_id, count, spent in rows}
+
+
+def test_order_stats_follow_inserts_edits_and_deletes(app):
+    with app.app_context():
+        alice, bob = _users('alice', 'bob')
+        first, second = Order(user_id=alice, total_price=10.5, status='pending'), \
+            Order(user_id=alice, total_price=4.5, status='pending')
+        db.session.add_all([first, second, Order(user_id=bob, total_price=7.0, status='pending')])
+        db.session.commit()
+        assert _stats() == {alice: (2, 15.0), bob: (1, 7.0)}
+
+        first.total_price = 20.5
+        second.user_id = bob
+        db.session.commit()
+        assert _stats() == {alice: (1, 20.5), bob: (2, 11.5)}
+
+        db.session.delete(first)
+        db.session.commit()
+        assert _stats() == {alice: (0, 0.0), bob: (2, 11.5)}
+        assert OrderService.reconcile_stats() == 0
+
+
+def test_rolled_back_orders_leave_stats_alone(app):
+    with app.app_context():
+        alice, = _users('alice')
+        db.session.add(Order(user_id=alice, total_price=10.0, status='pending'))
+        db.session.flush()
+        db.session.rollback()
+        db.session.add(Order(user_id=alice, total_price=3.0, status='pending'))
+        db.session.commit()
+        assert _stats() == {alice: (1, 3.0)}
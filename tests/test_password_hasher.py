@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from app import password_hasher
+from app.utils.password_hasher import HasherBusy, TooManyAttempts
+
+
+def test_saturated_pool_raises_hasher_busy(make_app):
+    make_app(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_TIMEOUT=0.5)
+    try:
+        password_hasher._run(time.sleep, 0)  # khởi động pool trước khi đo timeout
+        with pytest.raises(HasherBusy):
+            password_hasher._run(time.sleep, 3)
+    finally:
+        password_hasher.shutdown()
+
+
+def test_login_maps_hasher_busy_to_503(app, monkeypatch):
+    client = app.test_client()
+    registered = client.post('/api/register', json={'username': 'hana', 'email': 'hana@example.com',
+                                                    'password': 'secret123', 'address': '1 Le Loi'})
+    assert registered.status_code == 201
+
+    def busy(*args, **kwargs):
+        raise HasherBusy()
+
+    monkeypatch.setattr(password_hasher, 'verify', busy)
+    response = client.post('/api/login', json={'email': 'hana@example.com', 'password': 'secret123'})
+    assert response.status_code == 503
+
+
+def test_too_many_attempts_is_a_429_not_an_overload(app, monkeypatch):
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'hana', 'email': 'hana@example.com',
+                                       'password': 'secret123', 'address': '1 Le Loi'})
+
+    def limited(*args, **kwargs):
+        raise TooManyAttempts('hana@example.com')
+
+    monkeypatch.setattr(password_hasher, 'verify', limited)
+    response = client.post('/api/login', json={'email': 'hana@example.com', 'password': 'secret123'})
+    assert response.status_code == 429
+    assert not issubclass(HasherBusy, TooManyAttempts)
+
+
+def test_hash_many_times_out_with_hasher_busy(make_app):
+    make_app(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_TIMEOUT=0.2, PASSWORD_HASH_METHOD='pbkdf2:sha256:5000000')
+    try:
+        password_hasher._run(time.sleep, 0)
+        with pytest.raises(HasherBusy):
+            password_hasher.hash_many(['secret123'])
+    finally:
+        password_hasher.shutdown()
+
+
+def test_hash_many_falls_back_when_the_pool_dies(make_app):
+    make_app(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_METHOD='pbkdf2:sha256:1000')
+    try:
+        password_hasher._run(time.sleep, 0)
+        for process in list(password_hasher._pool._processes.values()):
+            process.kill()
+            process.join()
+        hashes = password_hasher.hash_many(['secret123', 'hunter22'])
+        assert [check_password_hash(h, p) for h, p in zip(hashes, ['secret123', 'hunter22'])] == [True, True]
+    finally:
+        password_hasher.shutdown()
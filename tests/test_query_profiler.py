@@ -0,0 +1,37 @@
+import pytest
+
+from app import db, query_profiler
+from app.models.user import Log, User
+from app.utils.query_profiler import QueryBudgetExceeded
+
+
+def test_strict_mode_fails_request_over_budget(make_app):
+    app = make_app(QUERY_PROFILER_STRICT=True, QUERY_BUDGETS={'product.get_products': 0})
+    with pytest.raises(QueryBudgetExceeded, match='product.get_products ran'):
+        app.test_client().get('/api/products')
+
+
+def test_request_within_budget_reports_query_count(make_app):
+    app = make_app(QUERY_PROFILER_STRICT=True, QUERY_BUDGETS={'product.get_products': 10})
+    response = app.test_client().get('/api/products')
+    assert response.status_code == 200
+    assert 0 < int(response.headers['X-Query-Count']) <= 10
+
+
+def test_lazy_loads_in_a_loop_are_tagged_as_n_plus_one(make_app):
+    app = make_app(QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_N_PLUS_ONE_THRESHOLD=5)
+    with app.app_context():
+        for i in range(6):
+            user = User(username=f'user{i}', email=f'user{i}@example.com', password='!', address='1 Le Loi')
+            user.logs.append(Log(action='User created'))
+            db.session.add(user)
+        db.session.commit()
+        db.session.expunge_all()
+
+        with query_profiler.capture('loop') as profile:
+            for user in User.query.all():
+                assert len(user.logs) == 1
+
+        suspects = profile.n_plus_one(threshold=5)
+        assert [s['relationship'] for s in suspects] == ['User.logs']
+        assert suspects[0]['queries'] == 6
@@ -0,0 +1,67 @@
+from app import db
+from app.models.product import Product, ProductRating, Review
+from app.models.user import User
+from app.services.product_service import ProductService
+from app.services.review_service import ReviewService
+
+
+def _setup():
+    user = User(username='critic', email='critic@example.com', password='!', address='1 Le Loi')
+    products = [Product(name='tea', price=3.0), Product(name='coffee', price=4.0)]
+    db.session.add_all([user, *products])
+    db.session.commit()
+    return user.id, [product.id for product in products]
+
+
+def _rating(product_id):
+    db.session.expire_all()
+    rating = db.session.get(ProductRating, product_id)
+    if rating is None:
+        return None
+    return rating.rating_count, rating.rating_sum, rating.histogram
+
+
+def test_ratings_follow_review_insert_edit_and_delete(app):
+    with app.app_context():
+        user_id, (tea, coffee) = _setup()
+        first = ReviewService.create_review(user_id, tea, {'rating': 5, 'comment': 'great'})
+        second = ReviewService.create_review(user_id, tea, {'rating': 3})
+        assert _rating(tea) == (2, 8, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+        ReviewService.update_review(second, {'rating': 1})
+        assert _rating(tea) == (2, 6, {1: 1, 2: 0, 3: 0, 4: 0, 5: 1})
+
+        # Chuyển review sang sản phẩm khác: trừ bên cũ, cộng bên mới
+        first.product_id = coffee
+        db.session.commit()
+        assert _rating(tea) == (1, 1, {1: 1, 2: 0, 3: 0, 4: 0, 5: 0})
+        assert _rating(coffee) == (1, 5, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+        ReviewService.delete_review(db.session.get(Review, second.id), user_id)
+        assert _rating(tea) == (0, 0, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+        assert ReviewService.reconcile_ratings() == 0
+
+
+def test_bulk_delete_bypasses_hooks_until_reconciled(app):
+    with app.app_context():
+        user_id, (tea, _) = _setup()
+        for rating in (4, 2):
+            ReviewService.create_review(user_id, tea, {'rating': rating})
+        db.session.execute(db.delete(Review).where(Review.rating == 2))
+        db.session.commit()
+        assert _rating(tea) == (2, 6, {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+
+        assert ReviewService.reconcile_ratings() == 1
+        assert _rating(tea) == (1, 4, {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+        assert ReviewService.reconcile_ratings() == 0
+
+
+def test_deleting_a_product_drops_its_ratings(app):
+    with app.app_context():
+        user_id, (tea, coffee) = _setup()
+        ReviewService.create_review(user_id, tea, {'rating': 4})
+        ReviewService.create_review(user_id, coffee, {'rating': 5})
+        ProductService.delete_product(db.session.get(Product, tea))
+        assert _rating(tea) is None
+        assert _rating(coffee) == (1, 5, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+        assert ReviewService.reconcile_ratings() == 0
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.user import TokenBlocklist
+from app.services.user_service import UserService
+from app.utils.revocation_cache import RevocationCache
+
+
+def _revoke(jti, age):
+    # created_at lùi về quá khứ: hàng được flush sớm nhưng commit muộn
+    db.session.add(TokenBlocklist(jti=jti, created_at=datetime.utcnow() - timedelta(seconds=age)))
+    db.session.commit()
+
+
+def test_default_overlap_covers_busy_timeout(app):
+    cache = RevocationCache(app)
+    assert cache.sync_overlap.total_seconds() > app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000
+
+
+def test_row_committed_late_is_seen_by_other_workers(app):
+    with app.app_context():
+        other = RevocationCache(app)
+        _revoke('seen-at-start', 0)
+        other.sync(force=True)
+
+        _revoke('late-commit', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+        other.sync(force=True)
+        assert other.is_revoked('late-commit', UserService.lookup_revoked_token)
+
+
+def test_full_resync_catches_rows_older_than_the_overlap(make_app):
+    app = make_app(REVOCATION_FULL_SYNC_INTERVAL=0)
+    with app.app_context():
+        other = RevocationCache(app)
+        _revoke('seen-at-start', 0)
+        other.sync(force=True)
+
+        _revoke('very-late-commit', 3600)
+        other.sync(force=True)
+        assert other.is_revoked('very-late-commit', UserService.lookup_revoked_token)
+        assert not other.is_revoked('never-revoked', UserService.lookup_revoked_token)
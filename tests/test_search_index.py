@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import inspect
+
+from app import db, search_index
+from app.models.product import Product
+from app.utils.search_index import TABLE, Fts5Backend
+
+
+def test_app_start_creates_no_search_table(app):
+    with app.app_context():
+        assert not inspect(db.engine).has_table(TABLE)
+        assert search_index.backend.name == 'memory'
+
+
+def test_rebuild_creates_fts5_table_and_indexes_later_writes(app):
+    with app.app_context():
+        if not Fts5Backend.available(db.engine):
+            pytest.skip('SQLite built without FTS5')
+        search_index.rebuild()
+        assert search_index.backend.name == 'fts5'
+        db.session.add(Product(name='Áo khoác gió', description='Chống nước', price=250000))
+        db.session.commit()
+        hits, _, total = search_index.search('ao khoac')
+        assert total == 1
@@ -0,0 +1,59 @@
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from marshmallow import Schema, fields
+
+from app.schemas import OrderSummarySchema, ReviewSchema, UserSchema
+from app.schemas.user_schema import LogSchema
+from app.utils.serializers import compile_serializer
+
+
+class RenamedSchema(Schema):
+    id = fields.Int()
+    created = fields.DateTime(data_key='createdAt', attribute='created_at')
+    active = fields.Boolean(data_key='isActive')
+    display_name = fields.Email(data_key='Ω name')
+
+
+SAMPLES = {
+    fields.Integer: [None, 0, -7, 2 ** 63, True],
+    fields.Float: [None, 0.1, -0.0, 3, 1e16, 1e-7, float('nan'), float('inf'), float('-inf')],
+    fields.String: [None, '', 'plain', 'Hà Nội "quoted" \\ tab\t\n', ' \x00\x7f', '🙂 emoji', 42],
+    fields.Email: [None, 'ánh@example.com'],
+    fields.DateTime: [None, datetime(2024, 2, 29, 23, 59, 59, 123456), datetime(2024, 1, 1),
+                      datetime(2024, 6, 1, 12, 0, tzinfo=timezone(timedelta(hours=7)))],
+    fields.Boolean: [None, True, False, 0, 1],
+}
+
+
+def _rows(schema):
+    """Every sample of each field, padded by cycling the shorter columns."""
+    columns = {(field.attribute or name): SAMPLES[type(field)] for name, field in schema.dump_fields.items()}
+    length = max(len(values) for values in columns.values())
+    cycles = {attribute: itertools.islice(itertools.cycle(values), length) for attribute, values in columns.items()}
+    return [SimpleNamespace(**dict(zip(cycles, values))) for values in zip(*cycles.values())]
+
+
+@pytest.mark.parametrize('schema_class', [UserSchema, LogSchema, ReviewSchema, OrderSummarySchema, RenamedSchema])
+@pytest.mark.parametrize('sort_keys', [True, False])
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+def test_compiled_serializer_matches_marshmallow(schema_class, sort_keys, ensure_ascii):
+    schema = schema_class()
+    only = tuple(schema.dump_fields)
+    serialize = compile_serializer(schema_class, only, sort_keys, ensure_ascii)
+    assert serialize.__name__ == 'serialize'  # không phải đường chậm
+    schema = schema_class(only=only)
+    for row in _rows(schema):
+        expected = json.dumps(schema.dump(row), separators=(',', ':'), sort_keys=sort_keys,
+                              ensure_ascii=ensure_ascii)
+        assert serialize(row) == expected
+
+
+def test_row_missing_a_column_takes_the_slow_path():
+    serialize = compile_serializer(LogSchema, ('id', 'action', 'timestamp'))
+    row = SimpleNamespace(id=1, action='Login')
+    assert serialize(row) == json.dumps(LogSchema(only=('id', 'action', 'timestamp')).dump(row),
+                                        separators=(',', ':'), sort_keys=True)
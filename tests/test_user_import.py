@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db, password_hasher
+from app.models.user import Log, User
+
+
+@pytest.fixture
+def admin(make_app):
+    app = make_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000')
+    with app.app_context():
+        user = User(username='admin', email='admin@example.com', password='!', role='admin', address='HQ')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=user.id)
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def _row(name, **fields):
+    return dict({'username': name, 'email': f'{name}@example.com', 'password': 'secret123',
+                 'address': '1 Le Loi'}, **fields)
+
+
+def _ndjson(*rows):
+    return ''.join((row if isinstance(row, str) else json.dumps(row)) + '\n' for row in rows)
+
+
+def test_chunked_import_reports_bad_rows_by_line(admin):
+    app, headers = admin
+    body = _ndjson(_row('anna'), _row('bao', email='not-an-email'), 'not json', _row('chi'),
+                   _row('anna2', username='anna'), _row('dung'))
+    response = app.test_client().post('/api/users/import?format=ndjson&chunk_size=2', headers=headers,
+                                      data=body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    result = response.get_json()
+    assert result['created'] == 3
+    assert [(failure['row'], sorted(failure['errors'])) for failure in result['failed']] == [
+        (2, ['email']), (3, ['_schema']), (5, ['username'])]
+    with app.app_context():
+        assert db.session.scalars(db.select(User.username).order_by(User.id)).all() == \
+            ['admin', 'anna', 'chi', 'dung']
+        assert password_hasher.verify(db.session.scalar(db.select(User.password).where(User.username == 'chi')),
+                                      'secret123')
+        assert db.session.scalar(db.select(db.func.count()).select_from(Log)
+                                 .where(Log.action == 'User imported')) == 3
+
+
+def test_csv_upload(admin):
+    app, headers = admin
+    body = 'username,email,password,address\n' + ''.join(
+        f"{r['username']},{r['email']},{r['password']},{r['address']}\n" for r in (_row('anna'), _row('bao')))
+    response = app.test_client().post('/api/users/import', headers=headers, content_type='multipart/form-data',
+                                      data={'file': (io.BytesIO(body.encode()), 'users.csv')},
+                                      query_string={'format': 'csv'})
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 2, 'failed': []}
+
+
+def test_rows_taken_concurrently_are_isolated(admin, monkeypatch):
+    app, headers = admin
+    hash_many = password_hasher.hash_many
+
+    def register_first(passwords):
+        # Có người đăng ký 'bao' giữa lúc validate và lúc INSERT
+        with db.engine.begin() as conn:
+            conn.execute(db.insert(User), _row('bao', password='!'))
+        return hash_many(passwords)
+
+    monkeypatch.setattr(password_hasher, 'hash_many', register_first)
+    response = app.test_client().post('/api/users/import?format=ndjson', headers=headers,
+                                      data=_ndjson(_row('anna'), _row('bao'), _row('chi')))
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 2, 'failed': [
+        {'row': 2, 'errors': {'_schema': ['User already exists.']}}]}
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(User)) == 4
+
+
+def test_nothing_created_is_not_a_bad_request(admin):
+    app, headers = admin
+    client = app.test_client()
+    empty = client.post('/api/users/import?format=ndjson', headers=headers, data='')
+    assert (empty.status_code, empty.get_json()) == (200, {'created': 0, 'failed': []})
+
+    invalid = client.post('/api/users/import?format=ndjson', headers=headers, data=_ndjson(_row('x')))
+    assert invalid.status_code == 200
+    assert invalid.get_json()['failed'][0]['row'] == 1
+
+    assert client.post('/api/users/import?format=xml', headers=headers, data='').status_code == 400
+    assert client.post('/api/users/import?format=csv', headers=headers, data=b'\xff\xfe\x00').status_code == 400
+
+
+def test_export_csv_and_ndjson(admin):
+    app, headers = admin
+    client = app.test_client()
+    client.post('/api/users/import?format=ndjson', headers=headers,
+                data=_ndjson(_row('anna'), _row('bảo', address='Hà Nội')))
+
+    exported = client.get('/api/users/export?format=csv', headers=headers)
+    assert exported.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(exported.get_data(as_text=True))))
+    assert [(row['username'], row['address']) for row in rows] == [('admin', 'HQ'), ('anna', '1 Le Loi'),
+                                                                  ('bảo', 'Hà Nội')]
+    assert 'password' not in rows[0]
+
+    exported = client.get('/api/users/export?format=ndjson', headers=headers)
+    assert exported.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in exported.get_data(as_text=True).splitlines()]
+    assert [record['username'] for record in records] == ['admin', 'anna', 'bảo']
+    assert sorted(records[0]) == ['address', 'created_at', 'email', 'id', 'role', 'username']
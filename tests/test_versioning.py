@@ -0,0 +1,40 @@
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.user import User
+from app.services.user_service import UserService
+
+
+def _add_user(name):
+    user = User(username=name, email=f'{name}@example.com', password='!', address='1 Le Loi')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_recreated_user_id_gets_a_new_version(app):
+    with app.app_context():
+        user_id = _add_user('first')
+        old = UserService.get_user_version(user_id)
+        db.session.delete(db.session.get(User, user_id))
+        db.session.commit()
+        # SQLite cấp lại rowid lớn nhất đã xoá cho hàng mới
+        assert _add_user('second') == user_id
+        new = UserService.get_user_version(user_id)
+        assert new[0] == old[0] == 1
+        assert new != old
+
+
+def test_concurrent_updates_do_not_conflict(app):
+    with app.app_context():
+        user_id = _add_user('racer')
+        with Session(db.engine) as first, Session(db.engine) as second:
+            a, b = first.get(User, user_id), second.get(User, user_id)
+            a.address = '2 Le Loi'
+            first.commit()
+            # Bản b đã cũ nhưng vẫn ghi được (ghi sau thắng), không StaleDataError
+            b.password = '!!'
+            second.commit()
+        db.session.expire_all()
+        user = db.session.get(User, user_id)
+        assert (user.address, user.password, user.version_id) == ('2 Le Loi', '!!', 3)